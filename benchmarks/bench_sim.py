@@ -0,0 +1,192 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+cocotb benchmarks timing simulation throughput of the CPU and UART cores
+
+Each benchmark runs the same DUT three ways for BENCH_CYCLES clock cycles:
+
+- free running: one Timer for the whole run, the clock is driven by the
+  simulator so no Python runs per cycle
+- per edge: a coroutine wakes up on every rising edge and does nothing else
+- workload: a representative testbench loop driving and sampling the DUT
+
+The difference between the first two is the cost of a Python wakeup per clock
+edge. Results are written as JSON to BENCH_RESULT for run_benchmarks.py.
+"""
+
+import json
+import os
+import random
+import time
+
+import cocotb
+from cocotb.triggers import RisingEdge, Timer
+from cocotb.utils import get_sim_time
+from tb_utils import LockstepMonitor, SignalBank, reset_dut, setup_clock
+from uart_bfm import UartRxMonitor, UartSource
+
+from hexfile import read_words
+from iss import ISS
+
+CLK_PERIOD_NS = 10
+
+
+def get_cycles() -> int:
+    return int(os.getenv("BENCH_CYCLES", "20000"))
+
+
+async def start(dut) -> None:
+    setup_clock(dut, CLK_PERIOD_NS)
+    await reset_dut(dut)
+
+
+async def time_free_running(dut, cycles: int) -> float:
+    t0 = time.perf_counter()
+    await Timer(cycles * CLK_PERIOD_NS, unit="ns")
+    return time.perf_counter() - t0
+
+
+async def time_per_edge(dut, cycles: int) -> float:
+    edge = RisingEdge(dut.i_clk)
+    t0 = time.perf_counter()
+    for _ in range(cycles):
+        await edge
+    return time.perf_counter() - t0
+
+
+async def measure(dut, workload) -> None:
+    """Time the three modes and write the results out"""
+    cycles = get_cycles()
+    await start(dut)
+
+    free = await time_free_running(dut, cycles)
+    per_edge = await time_per_edge(dut, cycles)
+    t0 = time.perf_counter()
+    workload_cycles = await workload(dut, cycles)
+    work = time.perf_counter() - t0
+
+    result = {
+        "cycles": cycles,
+        "free_running_cycles_per_s": cycles / free,
+        "per_edge_cycles_per_s": cycles / per_edge,
+        "workload_cycles_per_s": workload_cycles / work,
+        "edge_overhead_us": 1e6 * max(per_edge - free, 0.0) / cycles,
+    }
+    dut._log.info(json.dumps(result))
+    with open(os.environ["BENCH_RESULT"], "w") as f:
+        json.dump(result, f)
+
+
+async def insnmem_workload(dut, cycles: int) -> int:
+    """Fetch from random aligned addresses every cycle"""
+    signals = SignalBank.of(dut)
+    set_pc, get_insn = signals.setter("i_pc"), signals.getter("o_insn")
+    words = dut.SIZE.value.to_unsigned() // 4
+    edge = RisingEdge(dut.i_clk)
+    for _ in range(cycles):
+        set_pc(random.randrange(words) << 2)
+        await edge
+        get_insn()
+    return cycles
+
+
+async def regfile_workload(dut, cycles: int) -> int:
+    """Write one register and read two every cycle"""
+    signals = SignalBank.of(dut)
+    edge = RisingEdge(dut.i_clk)
+    for _ in range(cycles):
+        signals.write(
+            i_wr_en=1,
+            i_wr_addr=random.randrange(32),
+            i_wr_data=random.getrandbits(32),
+            i_rd_addr1=random.randrange(32),
+            i_rd_addr2=random.randrange(32),
+        )
+        await edge
+        signals.read("o_rd_data1", "o_rd_data2")
+    return cycles
+
+
+async def uart_rx_workload(dut, cycles: int) -> int:
+    """Send bursts of back to back frames, reading each byte back"""
+    dut.i_parity_cfg.value = 1
+    word_width = dut.WORD_WIDTH.value.to_unsigned()
+    baud_rate = dut.BAUD_RATE.value.to_unsigned()
+    uart = UartSource(dut.i_din, dut.i_clk, baud_rate, word_width, parity=True)
+    monitor = UartRxMonitor(dut)
+    monitor.start()
+
+    start_ns = get_sim_time("ns")
+    end_ns = start_ns + cycles * CLK_PERIOD_NS
+    while get_sim_time("ns") < end_ns:
+        await uart.send([random.getrandbits(word_width) for _ in range(16)])
+    monitor.stop()
+    elapsed = get_sim_time("ns") - start_ns
+    return int(elapsed // CLK_PERIOD_NS)
+
+
+async def cpu_core_workload(dut, cycles: int) -> int:
+    """Run the preloaded program from reset with the ISS checking it, repeatedly"""
+    program = read_words(os.environ["BENCH_PROGRAM"])
+    run_cycles = len(program) + 8
+    reset_cycles = 3  # see reset_dut
+    edge = RisingEdge(dut.i_clk)
+
+    done = 0
+    while done < cycles:
+        await reset_dut(dut)
+        monitor = LockstepMonitor(dut, ISS(program))
+        monitor.start()
+        for _ in range(run_cycles):
+            await edge
+        monitor.stop()
+        done += reset_cycles + run_cycles
+    return done
+
+
+@cocotb.test()
+async def bench_insnmem(dut) -> None:
+    dut.i_wr_en.value = 0
+    await measure(dut, insnmem_workload)
+
+
+@cocotb.test()
+async def bench_insnmem_word(dut) -> None:
+    dut.i_wr_en.value = 0
+    await measure(dut, insnmem_workload)
+
+
+@cocotb.test()
+async def bench_regfile(dut) -> None:
+    await measure(dut, regfile_workload)
+
+
+@cocotb.test()
+async def bench_uart_rx(dut) -> None:
+    await measure(dut, uart_rx_workload)
+
+
+@cocotb.test()
+async def bench_cpu_core(dut) -> None:
+    dut.i_imem_wr_en.value = 0
+    await measure(dut, cpu_core_workload)
@@ -0,0 +1,235 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Simulation throughput benchmarks for insnmem, insnmem_word, regfile, uart_rx
+and cpu_core
+
+Every benchmark is built from scratch (the build is timed) and then runs
+bench_sim.py, which reports simulated cycles per wall clock second with and
+without Python in the loop. Results for all benchmarks are written to one JSON
+file, named after the current commit by default, and can be compared against
+an earlier run with --compare.
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CPU_ROOT = ROOT / "cores" / "cpu"
+UART_ROOT = ROOT / "cores" / "uart"
+sys.path[:0] = [
+    str(Path(__file__).parent),
+    str(CPU_ROOT / "tests"),
+    str(UART_ROOT / "tests"),
+]
+
+from cocotb_tools.runner import get_runner  # noqa: E402
+from tb_utils import SIM_BUILD_ARGS, SIMULATORS, get_build_root, get_sim  # noqa: E402
+from hexfile import write_words  # noqa: E402
+from test_cpu_core import DRAIN_NOPS  # noqa: E402
+from test_cpu_core import SOURCES as CPU_SOURCES  # noqa: E402
+from gen_program import ProgramGenerator  # noqa: E402
+from rv32i import NOP  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+INSNMEM_SIZE = 4096  # bytes, as instantiated by cpu_core
+
+
+def get_benches(work_dir: Path) -> dict[str, dict]:
+    """Build and test options for each benchmark"""
+    cpu_hdl = CPU_ROOT / "hdl"
+    uart_hdl = UART_ROOT / "hdl"
+
+    insnmem_image = work_dir / "insnmem.hex"
+    write_words(
+        insnmem_image, [random.getrandbits(32) for _ in range(INSNMEM_SIZE // 4)]
+    )
+
+    # ALU ops spaced out so the core never stalls, one instruction every four
+    # words, kept short of the end of insnmem so it never fetches past the
+    # program (the 31 register writes ahead of the body are spaced out too).
+    # Its own stream rather than test_cpu_core's, which has branches in it
+    program = work_dir / "cpu_core.hex"
+    generator = ProgramGenerator(mem=0.0, branches=0.0)
+    body = generator.generate(random.Random(0), INSNMEM_SIZE // 16 - 64)
+    ops = [word for insn in body for word in (insn, NOP, NOP, NOP)]
+    write_words(program, ops + [NOP] * DRAIN_NOPS)
+
+    return {
+        "insnmem": {
+            "sources": [cpu_hdl / "insnmem.sv"],
+            "includes": [cpu_hdl],
+            "parameters": {"SIZE": INSNMEM_SIZE},
+            "plusargs": [f"+IMEM_PRELOAD_FILE={insnmem_image}"],
+        },
+        "insnmem_word": {
+            "sources": [cpu_hdl / "insnmem_word.sv"],
+            "includes": [cpu_hdl],
+            "parameters": {"SIZE": INSNMEM_SIZE},
+            "plusargs": [f"+IMEM_PRELOAD_FILE={insnmem_image}"],
+        },
+        "regfile": {
+            "sources": [cpu_hdl / "regfile.sv"],
+        },
+        "uart_rx": {
+            "sources": [
+                uart_hdl / s
+                for s in ["uart_rx.sv", "uart_fifo.sv", "uart_rx_des.sv", "baud_gen.sv"]
+            ],
+            "includes": [uart_hdl, ROOT / "cores"],
+            # 32 clock cycles per bit keeps a frame well inside the run
+            "parameters": {"BAUD_RATE": 3_125_000},
+        },
+        "cpu_core": {
+            "sources": [cpu_hdl / s for s in CPU_SOURCES],
+            "includes": [cpu_hdl],
+            "plusargs": [f"+IMEM_PRELOAD_FILE={program}"],
+            "extra_env": {"BENCH_PROGRAM": str(program)},
+        },
+    }
+
+
+def run_bench(name: str, opts: dict, sim: str, cycles: int, work_dir: Path) -> dict:
+    """Build one benchmark from scratch, run it and collect its results"""
+    build_dir = work_dir / name
+    shutil.rmtree(build_dir, ignore_errors=True)
+    runner = get_runner(sim)
+
+    t0 = time.perf_counter()
+    runner.build(
+        sources=opts["sources"],
+        includes=opts.get("includes", []),
+        parameters=opts.get("parameters", {}),
+        hdl_toplevel=name,
+        build_dir=build_dir,
+        build_args=SIM_BUILD_ARGS.get(sim, []),
+        timescale=("1ns", "1ps"),
+        always=True,
+    )
+    build_s = time.perf_counter() - t0
+
+    result_file = build_dir / "bench.json"
+    t0 = time.perf_counter()
+    runner.test(
+        hdl_toplevel=name,
+        test_module="bench_sim",
+        testcase=f"bench_{name}",
+        test_dir=build_dir,
+        plusargs=opts.get("plusargs", []),
+        extra_env={
+            "BENCH_CYCLES": str(cycles),
+            "BENCH_RESULT": str(result_file),
+            **opts.get("extra_env", {}),
+        },
+    )
+    run_s = time.perf_counter() - t0
+
+    result = json.loads(result_file.read_text())
+    result.update(build_s=build_s, run_s=run_s)
+    return result
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict | None) -> None:
+    columns = ["free_running", "per_edge", "workload"]
+    header = f"{'bench':<10}" + "".join(f"{c + ' cyc/s':>22}" for c in columns)
+    print(header + f"{'edge us':>10}{'build s':>10}{'run s':>8}")
+    for name, r in results["benchmarks"].items():
+        row = f"{name:<10}"
+        for c in columns:
+            value = r[f"{c}_cycles_per_s"]
+            cell = f"{value:,.0f}"
+            base = (baseline or {}).get("benchmarks", {}).get(name)
+            if base:
+                change = 100 * (value / base[f"{c}_cycles_per_s"] - 1)
+                cell += f" ({change:+.0f}%)"
+            row += f"{cell:>22}"
+        row += f"{r['edge_overhead_us']:>10.2f}{r['build_s']:>10.2f}{r['run_s']:>8.2f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("benches", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument(
+        "--sim",
+        choices=SIMULATORS,
+        default=get_sim(),
+        help="simulator (default: $SIM or icarus)",
+    )
+    parser.add_argument("-n", "--cycles", type=int, default=20000)
+    parser.add_argument("-o", "--output", type=Path, help="results JSON file")
+    parser.add_argument("--compare", type=Path, help="earlier results to compare to")
+    args = parser.parse_args()
+
+    work_dir = get_build_root() / "bench"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    benches = get_benches(work_dir)
+    unknown = set(args.benches) - set(benches)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    commit = get_commit()
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "simulator": args.sim,
+        "python": platform.python_version(),
+        "benchmarks": {},
+    }
+    for name in args.benches or benches:
+        results["benchmarks"][name] = run_bench(
+            name, benches[name], args.sim, args.cycles, work_dir
+        )
+
+    output = args.output or RESULTS_DIR / f"{commit}-{args.sim}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_results(results, baseline)
+    print(f"results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
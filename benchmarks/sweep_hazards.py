@@ -0,0 +1,300 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Design space sweep of cpu_core's HAZARD_TECHNIQUE and ENABLE_LOAD_USE_FORWARDING
+
+Every combination of the two parameters is simulated on a fixed set of random
+programs (sweep_sim.py) for its CPI, and put through the yosys/nextpnr-ice40
+flow of fpga/Makefile for the UP5K for its LUT count and estimated Fmax. Both
+kinds of job run in a process pool, and the results are summarised in one
+table ranked by MIPS (Fmax / CPI), the instructions per second the
+configuration would actually reach on the board. Synthesis is skipped with
+--no-synth, or when yosys or nextpnr-ice40 are not on the PATH.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CPU_ROOT = ROOT / "cores" / "cpu"
+sys.path[:0] = [str(Path(__file__).parent), str(CPU_ROOT / "tests")]
+
+from tb_utils import (  # noqa: E402
+    SIMULATORS,
+    build_cached,
+    get_build_root,
+    get_sim,
+    get_sim_runner,
+)
+from gen_program import ProgramGenerator  # noqa: E402
+from hexfile import write_words  # noqa: E402
+from test_cpu_core import DRAIN_NOPS, HAZARD_TECHNIQUES, SOURCES  # noqa: E402
+from rv32i import NOP  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# program groups, by the ProgramGenerator knobs that set their hazard mix
+PROGRAMS = {
+    "alu": {"mem": 0.0},
+    "independent": {"raw_rate": 0.0},
+    "mixed": {},
+    "load_use": {"mem": 0.6, "load_use": 0.9},
+    "branches": {"branches": 0.2},
+}
+PROGRAM_LENGTH = 200
+
+# wraps cpu_core for synthesis: the load port is shifted in from one pin so
+# insnmem is not a constant, and the register file write port is kept so the
+# core is not optimised away for lack of outputs
+SYNTH_TOP = """\
+module sweep_top (
+    input i_clk,
+    input i_rst_n,
+    input i_load
+);
+  logic [64:0] load_q;
+
+  always_ff @(posedge i_clk) load_q <= {load_q[63:0], i_load};
+
+  cpu_core #(
+      .HAZARD_TECHNIQUE({technique}),
+      .ENABLE_LOAD_USE_FORWARDING({load_use})
+  ) core_u (
+      .i_clk         (i_clk),
+      .i_rst_n       (i_rst_n),
+      .i_imem_wr_en  (load_q[64]),
+      .i_imem_wr_addr(load_q[63:32]),
+      .i_imem_wr_data(load_q[31:0])
+  );
+endmodule
+"""
+
+
+def config_name(technique: int, load_use: int) -> str:
+    return f"{HAZARD_TECHNIQUES[technique].lower()}_lu{load_use}"
+
+
+def write_programs(work_dir: Path, seeds: int) -> Path:
+    """Generate the program set, returns a manifest of the files by group"""
+    manifest = {}
+    for group, knobs in PROGRAMS.items():
+        generator = ProgramGenerator(**knobs)
+        paths = manifest[group] = []
+        for seed in range(seeds):
+            program = generator.generate(random.Random(seed), PROGRAM_LENGTH)
+            program.extend([NOP] * DRAIN_NOPS)
+            path = work_dir / "programs" / f"{group}_{seed}.hex"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_words(path, program)
+            paths.append(str(path))
+    path = work_dir / "programs.json"
+    path.write_text(json.dumps(manifest, indent=2))
+    return path
+
+
+def simulate(technique: int, load_use: int, manifest: Path, work_dir: Path) -> dict:
+    """Build one configuration and run the program set on it"""
+    hdl_root = CPU_ROOT / "hdl"
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / src for src in SOURCES],
+        hdl_toplevel="cpu_core",
+        includes=[str(hdl_root)],
+        parameters={
+            "HAZARD_TECHNIQUE": technique,
+            "ENABLE_LOAD_USE_FORWARDING": load_use,
+        },
+        timescale=("1ns", "1ns"),
+    )
+
+    test_dir = work_dir / config_name(technique, load_use)
+    test_dir.mkdir(parents=True, exist_ok=True)
+    result_file = test_dir / "sim.json"
+    result_file.unlink(missing_ok=True)
+    t0 = time.perf_counter()
+    runner.test(
+        hdl_toplevel="cpu_core",
+        test_module="sweep_sim",
+        test_dir=test_dir,
+        extra_env={"SWEEP_PROGRAMS": str(manifest), "SWEEP_RESULT": str(result_file)},
+    )
+    if not result_file.is_file():
+        raise RuntimeError(f"{test_dir.name}: simulation failed, see {test_dir}")
+    groups = json.loads(result_file.read_text())
+    cycles = sum(g["cycles"] for g in groups.values())
+    retired = sum(g["retired"] for g in groups.values())
+    return {
+        "cpi": cycles / retired,
+        "groups": {name: g["cycles"] / g["retired"] for name, g in groups.items()},
+        "sim_s": time.perf_counter() - t0,
+    }
+
+
+def synthesise(technique: int, load_use: int, work_dir: Path, seed: int) -> dict:
+    """Run yosys and nextpnr-ice40 on one configuration for its LUTs and Fmax"""
+    hdl_root = CPU_ROOT / "hdl"
+    synth_dir = work_dir / config_name(technique, load_use) / "synth"
+    synth_dir.mkdir(parents=True, exist_ok=True)
+    top = synth_dir / "sweep_top.sv"
+    top.write_text(SYNTH_TOP.format(technique=technique, load_use=load_use))
+
+    sources = " ".join(str(hdl_root / src) for src in SOURCES)
+    script = (
+        f"read_verilog -sv -I{hdl_root} {sources} {top}; "
+        "hierarchy -top sweep_top; "
+        "setattr -set keep 1 regfile/w:i_wr_*; "
+        "synth_ice40 -top sweep_top -json sweep_top.json; "
+        "tee -q -o stat.json stat -json"
+    )
+    t0 = time.perf_counter()
+    subprocess.run(
+        ["yosys", "-q", "-l", "yosys.log", "-p", script],
+        cwd=synth_dir,
+        check=True,
+        capture_output=True,
+    )
+    cells = json.loads((synth_dir / "stat.json").read_text())["design"]
+    luts = cells["num_cells_by_type"].get("SB_LUT4", 0)
+
+    # the top has three inputs, so no pin constraints are needed
+    subprocess.run(
+        [
+            "nextpnr-ice40",
+            "--up5k",
+            "--package",
+            "sg48",
+            "--json",
+            "sweep_top.json",
+            "--report",
+            "report.json",
+            "--seed",
+            str(seed),
+            "--quiet",
+            "--log",
+            "nextpnr.log",
+        ],
+        cwd=synth_dir,
+        check=True,
+        capture_output=True,
+    )
+    report = json.loads((synth_dir / "report.json").read_text())
+    fmax = min(clock["achieved"] for clock in report["fmax"].values())
+    return {"luts": luts, "fmax_mhz": fmax, "synth_s": time.perf_counter() - t0}
+
+
+def print_table(rows: list[dict]) -> None:
+    def cell(value, fmt: str) -> str:
+        return "-" if value is None else format(value, fmt)
+
+    groups = list(PROGRAMS)
+    header = f"{'technique':<14}{'lu fwd':>7}{'CPI':>7}"
+    header += "".join(f"{g:>13}" for g in groups)
+    print(header + f"{'LUTs':>7}{'Fmax MHz':>10}{'MIPS':>8}")
+    for row in rows:
+        line = f"{row['technique']:<14}{row['load_use']:>7}{cell(row['cpi'], '.3f'):>7}"
+        line += "".join(f"{cell(row['groups'].get(g), '.3f'):>13}" for g in groups)
+        line += f"{cell(row['luts'], 'd'):>7}{cell(row['fmax_mhz'], '.1f'):>10}"
+        line += f"{cell(row['mips'], '.1f'):>8}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sim", choices=SIMULATORS, default=None, help="simulator (default: $SIM)"
+    )
+    parser.add_argument("--seeds", type=int, default=4, help="programs per group")
+    parser.add_argument("-j", "--jobs", type=int, help="processes (default: CPUs)")
+    parser.add_argument("--no-synth", action="store_true", help="simulation only")
+    parser.add_argument("--pnr-seed", type=int, default=1, help="nextpnr seed")
+    parser.add_argument("-o", "--output", type=Path, help="results JSON file")
+    args = parser.parse_args()
+
+    if args.sim:
+        # read by get_sim_runner in every worker
+        os.environ["SIM"] = args.sim
+    sim = get_sim()
+
+    synth = not args.no_synth
+    missing = [tool for tool in ("yosys", "nextpnr-ice40") if not shutil.which(tool)]
+    if synth and missing:
+        print(f"{', '.join(missing)} not found, simulation only", file=sys.stderr)
+        synth = False
+
+    work_dir = get_build_root() / "sweep"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    manifest = write_programs(work_dir, args.seeds)
+
+    configs = list(itertools.product(range(len(HAZARD_TECHNIQUES)), (0, 1)))
+    results = {config: {} for config in configs}
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        jobs = {}
+        for config in configs:
+            jobs[pool.submit(simulate, *config, manifest, work_dir)] = config
+            if synth:
+                job = pool.submit(synthesise, *config, work_dir, args.pnr_seed)
+                jobs[job] = config
+        for job in as_completed(jobs):
+            config = jobs[job]
+            try:
+                results[config].update(job.result())
+            except (RuntimeError, subprocess.CalledProcessError) as e:
+                print(f"{config_name(*config)}: {e}", file=sys.stderr)
+
+    rows = []
+    for (technique, load_use), r in results.items():
+        cpi, fmax = r.get("cpi"), r.get("fmax_mhz")
+        rows.append(
+            {
+                "technique": HAZARD_TECHNIQUES[technique],
+                "load_use": load_use,
+                "cpi": cpi,
+                "groups": r.get("groups", {}),
+                "luts": r.get("luts"),
+                "fmax_mhz": fmax,
+                "mips": fmax / cpi if cpi and fmax else None,
+            }
+        )
+    # best first: MIPS when synthesised, CPI otherwise
+    rows.sort(key=lambda r: (-(r["mips"] or 0), r["cpi"] or float("inf")))
+
+    output = args.output or RESULTS_DIR / f"sweep-{sim}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"simulator": sim, "configs": rows}, indent=2) + "\n")
+    print_table(rows)
+    print(f"results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
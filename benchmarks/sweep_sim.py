@@ -0,0 +1,72 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+cocotb side of sweep_hazards.py: runs the sweep programs on one cpu_core build
+
+Every program in SWEEP_PROGRAMS is swapped into insnmem through the backdoor and
+run to its end, checked in lockstep against the ISS, and its cycle and retired
+instruction counts are read from the performance counters. The totals of each
+program group are written as JSON to SWEEP_RESULT.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import cocotb
+from tb_utils import MemoryBackdoor, read_perf_counters, setup_clock
+from test_cpu_core import run_iss, run_program, swap_program
+
+from hexfile import read_words
+
+
+@cocotb.test()
+async def sweep_cpi(dut) -> None:
+    """Run every sweep program back to back and total its counters by group"""
+    groups = json.loads(Path(os.environ["SWEEP_PROGRAMS"]).read_text())
+    imem = MemoryBackdoor(dut.gen_insnmem.insnmem_u.mem)
+    dmem = MemoryBackdoor(dut.memory_u.mem)
+
+    dut.i_imem_wr_en.value = 0
+    dut.i_rst_n.value = 1
+    setup_clock(dut)
+    results = {}
+    previous = []
+    for group, paths in groups.items():
+        totals = results[group] = {"programs": 0, "cycles": 0, "retired": 0}
+        for path in paths:
+            program = read_words(path).tolist()
+            await swap_program(dut, imem, dmem, program, previous)
+            previous = program
+            _, retired, expected = run_iss(program)
+            checked = await run_program(dut, program, retired)
+            counters = read_perf_counters(dut)
+            assert counters["retired"] >= retired, f"{path} hung"
+            assert (
+                checked == expected
+            ), f"{path}: core retired {checked} writebacks, expected {expected}"
+            totals["programs"] += 1
+            totals["cycles"] += counters["cycles"]
+            totals["retired"] += counters["retired"]
+
+    Path(os.environ["SWEEP_RESULT"]).write_text(json.dumps(results, indent=2))
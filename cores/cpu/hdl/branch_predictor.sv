@@ -0,0 +1,115 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : branch_predictor
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   Conditional branch predictor for the AGGRESSIVE hazard technique
+//
+//   Branches are predicted in ID, where the instruction and its decoded target are first known,
+//   and the core redirects fetch to that target in the same cycle, so a correct prediction costs
+//   nothing. Branches resolve in EX, which updates the predictor.
+//
+// Predictors:
+//   0: BTFN - Backward taken, forward not taken, from the sign of the branch offset
+//   1: BHT  - Direct-mapped branch history table, each entry a tag and a 2-bit saturating
+//             counter; a miss predicts not taken and a taken branch allocates an entry as weakly
+//             taken
+//
+// Parameters:
+//   PREDICTOR - Prediction scheme (0=BTFN, 1=BHT)
+//   BHT_ENTRIES - Branch history table entries, a power of two
+
+module branch_predictor #(
+    parameter int PREDICTOR   = 0,
+    parameter int BHT_ENTRIES = 16
+) (
+    input logic i_clk,
+    input logic i_rst_n,
+
+    // Lookup (ID stage)
+    input  logic        i_id_branch,     // Valid conditional branch in ID
+    input  logic [31:0] i_id_pc,
+    input  logic [31:0] i_id_target,     // Target decoded from the offset
+    output logic        o_predict_taken,
+
+    // Update (EX stage)
+    input logic        i_ex_branch,  // Valid conditional branch resolved in EX
+    input logic [31:0] i_ex_pc,
+    input logic        i_ex_taken
+);
+
+  localparam int IndexBits = $clog2(BHT_ENTRIES);
+  localparam int TagBits = 30 - IndexBits;
+
+  generate
+    if (PREDICTOR == 0) begin : gen_btfn
+      assign o_predict_taken = i_id_branch && $signed(i_id_target - i_id_pc) < 0;
+
+    end else begin : gen_bht
+      logic                 valid    [BHT_ENTRIES];
+      logic [  TagBits-1:0] tag      [BHT_ENTRIES];
+      logic [          1:0] counter  [BHT_ENTRIES];
+
+      logic [IndexBits-1:0] id_index;
+      logic [IndexBits-1:0] ex_index;
+      logic                 id_hit;
+      logic                 ex_hit;
+
+      assign id_index        = i_id_pc[IndexBits+1:2];
+      assign ex_index        = i_ex_pc[IndexBits+1:2];
+      assign id_hit          = valid[id_index] && tag[id_index] == i_id_pc[31:IndexBits+2];
+      assign ex_hit          = valid[ex_index] && tag[ex_index] == i_ex_pc[31:IndexBits+2];
+
+      assign o_predict_taken = i_id_branch && id_hit && counter[id_index][1];
+
+      // only valid needs a reset, tag and counter are written when an entry is allocated
+      always_ff @(posedge i_clk or negedge i_rst_n) begin
+        if (~i_rst_n) begin
+          for (int i = 0; i < BHT_ENTRIES; i++) begin
+            valid[i] <= 1'b0;
+          end
+        end else if (i_ex_branch && !ex_hit && i_ex_taken) begin
+          valid[ex_index] <= 1'b1;
+        end
+      end
+
+      always_ff @(posedge i_clk) begin
+        if (i_ex_branch) begin
+          if (ex_hit) begin
+            if (i_ex_taken && counter[ex_index] != 2'b11) begin
+              counter[ex_index] <= counter[ex_index] + 2'b1;
+            end else if (!i_ex_taken && counter[ex_index] != 2'b00) begin
+              counter[ex_index] <= counter[ex_index] - 2'b1;
+            end
+          end else if (i_ex_taken) begin
+            tag[ex_index]     <= i_ex_pc[31:IndexBits+2];
+            counter[ex_index] <= 2'b10;
+          end
+        end
+      end
+    end
+  endgenerate
+
+endmodule
@@ -36,15 +36,55 @@
 // Parameters:
 //   HAZARD_TECHNIQUE - Hazard handling method (0=STALL, 1=FORWARD, 2=HYBRID, 3=AGGRESSIVE)
 //   ENABLE_LOAD_USE_FORWARDING - Enable forwarding for load-use hazards
+//   BRANCH_PREDICTOR - Branch predictor used by AGGRESSIVE (0=BTFN, 1=BHT)
+//   BHT_ENTRIES - Branch history table entries when BRANCH_PREDICTOR is 1
+//   IMEM_SIZE - Instruction memory size in bytes
+//   IMEM_PREFETCH - Fetch two-word lines from instruction memory (see insnmem_word.sv)
+//   IMEM_SPRAM - Instruction memory on a single port, for iCE40 SPRAM
+//   ICACHE - Fetch through icache from the backing memory ports instead of instruction memory
+//   ICACHE_SIZE - Instruction cache size in bytes
+//   ICACHE_WAYS - Instruction cache associativity (1 or 2)
+//   ICACHE_LINE_WORDS - Instruction cache line size in words
+//
+//   Conditional branches resolve in EX. Without prediction fetch is redirected from MEM,
+//   two bubbles for every branch. AGGRESSIVE predicts them in ID and redirects fetch from EX on
+//   a misprediction, one bubble.
+//
+//   Every pipeline register carries a valid bit, cleared for the bubbles inserted on a stall
+//   or flush, so that perf_u only counts real instructions as retired.
+//
+//   With ICACHE a fetch can take many cycles. Until the instruction is in, ID issues bubbles
+//   and fetch asks for the same PC again, as on a stall.
 
 `include "cpu_types.vh"
 
 module cpu_core #(
     parameter int HAZARD_TECHNIQUE           = 0,
-    parameter int ENABLE_LOAD_USE_FORWARDING = 1
+    parameter int ENABLE_LOAD_USE_FORWARDING = 1,
+    parameter int BRANCH_PREDICTOR           = 0,
+    parameter int BHT_ENTRIES                = 16,
+    parameter int IMEM_SIZE                  = 4096,
+    parameter int IMEM_PREFETCH              = 0,
+    parameter int IMEM_SPRAM                 = 0,
+    parameter int ICACHE                     = 0,
+    parameter int ICACHE_SIZE                = 1024,
+    parameter int ICACHE_WAYS                = 1,
+    parameter int ICACHE_LINE_WORDS          = 4
 ) (
     input i_clk,
-    input i_rst_n
+    input i_rst_n,
+
+    // instruction memory load port, driven by a bootloader while the core is
+    // held in reset
+    input        i_imem_wr_en,
+    input [31:0] i_imem_wr_addr,
+    input [31:0] i_imem_wr_data,
+
+    // backing memory for the instruction cache, a line per request (see icache.sv)
+    output        o_imem_req,
+    output [31:0] o_imem_addr,
+    input         i_imem_valid,
+    input  [31:0] i_imem_data
 );
 
   //------------------------------------------------------------------------------
@@ -66,33 +106,58 @@ module cpu_core #(
   /* p2 out, p3 in */
   assign p3_insn = p2p3_q.insn;
 
-  logic    [31:0] p3_imm_se;
+  logic      [31:0] p3_imm_se;
+
+  /* register file outputs are registered and arrive in p3 */
+  logic      [31:0] p3_reg_rd_data1;
+  logic      [31:0] p3_reg_rd_data2;
+
+  /* register file read data with a write on the same edge bypassed */
+  logic      [31:0] p3_rs1_data;
+  logic      [31:0] p3_rs2_data;
+  logic             wb_bypass_en;
+  logic      [ 4:0] wb_bypass_rd;
+  logic      [31:0] wb_bypass_data;
 
   /* p3 out, p4 in */
-  logic    [31:0] p3_pc_next;  // branch target address
+  logic      [31:0] p3_pc_next;  // branch target address
+
+  /* branch resolution and prediction */
+  logic      [31:0] p2_branch_target;
+  logic             p2_predict_taken;
+  logic             p3_branch_cond;
+  logic             p3_branch_taken;
+  logic      [31:0] p3_branch_resolved;  // PC after the branch in EX
+  logic             branch_mispredict;
 
 
   /* register file  */
-  logic    [31:0] p4_reg_wr_data;
+  logic      [31:0] p4_reg_wr_data;
 
   /* alu & ctrl */
-  logic    [31:0] alu_in1;
-  logic    [31:0] alu_in2;
-  alu_op_t        alu_ctrl;
-  logic    [31:0] alu_in2_pre;
-  logic    [31:0] p3_alu_out;
+  logic      [31:0] alu_in1;
+  logic      [31:0] alu_in2;
+  alu_op_t          alu_ctrl;
+  logic      [31:0] alu_in2_reg;
+  logic      [31:0] p3_alu_out;
 
   /* data memory */
-  logic    [31:0] mem_wdata;
-  logic    [31:0] mem_rdata;
-  logic    [31:0] mem_wdata_forwarded;
+  logic      [31:0] mem_wdata;
+  logic      [31:0] mem_rdata;
+  logic      [31:0] mem_wdata_forwarded;
 
   /* pipeline control signals */
+  cpu_ctrl_t        p2_ctrl;
+  logic             p2_valid;
   logic stall_if, stall_id, stall_ex;
   logic flush_id, flush_ex;
   logic        enable_forwarding;
+  logic        stall_raw;
+  logic        stall_load_use;
+  logic        flush_branch;
 
   logic [31:0] pc;
+  logic        fetch_wait;  // the instruction in p2 has not been fetched yet
   logic [31:0] pc_plus_4_next;
   logic [31:0] pc_plus_4_q;
   logic        p2_pc_jal;
@@ -100,6 +165,15 @@ module cpu_core #(
   /* forwarding unit */
   logic [31:0] alu_in1_forwarded;
   logic [31:0] alu_in2_forwarded;
+  logic [31:0] mem_result_forwarded;
+  logic        forward_rs1;
+  logic        forward_rs2;
+
+  // the memory read data can only be forwarded when the hazard unit does not stall on load-use
+  localparam bit ForwardLoadUse = ENABLE_LOAD_USE_FORWARDING != 0 &&
+      (HAZARD_TECHNIQUE == 1 || HAZARD_TECHNIQUE == 3);
+
+  localparam bit PredictBranches = HAZARD_TECHNIQUE == 3;
 
 
 
@@ -109,10 +183,16 @@ module cpu_core #(
 
   always_comb begin
     pc = pc_plus_4_q;
-    if (p2p3.ctrl.p2.is_jal) begin
-      pc = p2_pc_next;
-    end else if (p3p4_q.ctrl.p4.is_branch) begin
+    if (!PredictBranches && p3p4_q.valid && p3p4_q.ctrl.p4.is_branch) begin
       pc = p3p4_q.pc_next;
+    end else if (branch_mispredict) begin
+      pc = p3_branch_resolved;
+    end else if (stall_if || fetch_wait) begin
+      pc = p1p2_q.pc;  // fetch the instruction held in p2 again
+    end else if (p2_valid && p2_ctrl.p2.is_jal) begin
+      pc = p2_pc_next;
+    end else if (p2_predict_taken) begin
+      pc = p2_branch_target;
     end
   end
 
@@ -126,17 +206,52 @@ module cpu_core #(
 
   assign pc_plus_4_next = pc + 4;
 
-  insnmem #(
-      .SIZE(4096)
-  ) insnmem_u (
-      .i_clk           (i_clk),
-      .i_rst_n         (i_rst_n),
-      .i_pc            (pc),
-      .o_insn          (p2_insn),
-      .o_imem_exception(  /* unused */)
-  );
+  generate
+    if (ICACHE != 0) begin : gen_icache
+      logic imem_ready;
+
+      icache #(
+          .SIZE      (ICACHE_SIZE),
+          .WAYS      (ICACHE_WAYS),
+          .LINE_WORDS(ICACHE_LINE_WORDS)
+      ) icache_u (
+          .i_clk      (i_clk),
+          .i_rst_n    (i_rst_n),
+          .i_pc       (pc),
+          .o_insn     (p2_insn),
+          .o_ready    (imem_ready),
+          .o_mem_req  (o_imem_req),
+          .o_mem_addr (o_imem_addr),
+          .i_mem_valid(i_imem_valid),
+          .i_mem_data (i_imem_data),
+          .o_hits     (  /* sampled by testbenches */),
+          .o_misses   (  /* sampled by testbenches */)
+      );
+
+      assign fetch_wait = p1p2_q.valid && !imem_ready;
+    end else begin : gen_insnmem
+      insnmem_word #(
+          .SIZE    (IMEM_SIZE),
+          .PREFETCH(IMEM_PREFETCH),
+          .SPRAM   (IMEM_SPRAM)
+      ) insnmem_u (
+          .i_clk           (i_clk),
+          .i_rst_n         (i_rst_n),
+          .i_pc            (pc),
+          .o_insn          (p2_insn),
+          .o_imem_exception(  /* unused */),
+          .i_wr_en         (i_imem_wr_en),
+          .i_wr_addr       (i_imem_wr_addr),
+          .i_wr_data       (i_imem_wr_data)
+      );
+
+      assign fetch_wait  = 1'b0;
+      assign o_imem_req  = 1'b0;
+      assign o_imem_addr = '0;
+    end
+  endgenerate
 
-  assign p1p2 = '{pc: pc, pc_plus_4: pc_plus_4_q};
+  assign p1p2 = '{valid: !flush_id, pc: pc, pc_plus_4: pc_plus_4_q};
 
   p1p2 p1p2_u (
       .i_clk  (i_clk),
@@ -154,8 +269,8 @@ module cpu_core #(
       .i_rst_n   (i_rst_n),
       .i_rd_addr1(p2_insn.r_type.rs1),
       .i_rd_addr2(p2_insn.r_type.rs2),
-      .o_rd_data1(p2p3.reg_rd_data1),
-      .o_rd_data2(p2p3.reg_rd_data2),
+      .o_rd_data1(p3_reg_rd_data1),
+      .o_rd_data2(p3_reg_rd_data2),
       .i_wr_addr (p4p5_q.insn.r_type.rd),
       .i_wr_data (p4p5_q.reg_wr_data),
       .i_wr_en   (p4p5_q.ctrl.p5.reg_wr_en)
@@ -163,13 +278,18 @@ module cpu_core #(
 
   control control_u (
       .i_opcode(p2_insn.common.opcode),
-      .o_ctrl  (p2p3.ctrl)
+      .o_ctrl  (p2_ctrl)
   );
 
+  assign p2_valid = p1p2_q.valid && !fetch_wait;
+
+  // stalls and flushes issue a bubble into p3 in place of the instruction in p2
   always_comb begin
+    p2p3.valid     = p2_valid && !flush_ex;
     p2p3.pc        = p1p2_q.pc;
     p2p3.pc_plus_4 = p1p2_q.pc_plus_4;
-    p2p3.insn      = p2_insn;
+    p2p3.ctrl      = p2p3.valid ? p2_ctrl : '0;
+    p2p3.insn      = p2p3.valid ? p2_insn : 32'h00000013;  // NOP
   end
 
   p2p3 p2p3_u (
@@ -194,9 +314,11 @@ module cpu_core #(
   end
 
   aluctrl alucontrol_u (
-      .i_aluop   (p2p3_q.ctrl.p3.alu_ctrl),
-      .i_funct3  (p2p3_q.insn.r_type.funct3),
-      .i_funct7_5(p2p3_q.insn.r_type.funct7[5]),
+      .i_aluop(p2p3_q.ctrl.p3.alu_ctrl),
+      .i_funct3(p2p3_q.insn.r_type.funct3),
+      // funct7 only exists for R-type and the I-type shifts, other I-types carry immediate bits
+      .i_funct7_5(p2p3_q.insn.r_type.funct7[5] &&
+                  (p2p3_q.insn.common.opcode == OP_RTYPE || p2p3_q.insn.r_type.funct3 == 3'b101)),
       .o_alu_ctrl(alu_ctrl)
   );
 
@@ -208,9 +330,70 @@ module cpu_core #(
       .o_alu_exception(  /* unused */)
   );
 
+  always_ff @(posedge i_clk or negedge i_rst_n) begin
+    if (~i_rst_n) begin
+      wb_bypass_en   <= 1'b0;
+      wb_bypass_rd   <= '0;
+      wb_bypass_data <= '0;
+    end else begin
+      wb_bypass_en   <= p4p5_q.ctrl.p5.reg_wr_en;
+      wb_bypass_rd   <= p4p5_q.insn.r_type.rd;
+      wb_bypass_data <= p4p5_q.reg_wr_data;
+    end
+  end
+
+  // the regfile read in p2 sees the old value when p5 writes the same register on that edge
+  assign p3_rs1_data = wb_bypass_en && wb_bypass_rd != 5'b0 && wb_bypass_rd == p3_insn.r_type.rs1 ?
+      wb_bypass_data : p3_reg_rd_data1;
+  assign p3_rs2_data = wb_bypass_en && wb_bypass_rd != 5'b0 && wb_bypass_rd == p3_insn.r_type.rs2 ?
+      wb_bypass_data : p3_reg_rd_data2;
+
+  always_comb begin : resolve_branch
+    case (p3_insn.b_type.funct3)
+      3'b000:  p3_branch_cond = alu_in1 == alu_in2_reg;  // beq
+      3'b001:  p3_branch_cond = alu_in1 != alu_in2_reg;  // bne
+      3'b100:  p3_branch_cond = $signed(alu_in1) < $signed(alu_in2_reg);  // blt
+      3'b101:  p3_branch_cond = $signed(alu_in1) >= $signed(alu_in2_reg);  // bge
+      3'b110:  p3_branch_cond = alu_in1 < alu_in2_reg;  // bltu
+      3'b111:  p3_branch_cond = alu_in1 >= alu_in2_reg;  // bgeu
+      default: p3_branch_cond = 1'b0;
+    endcase
+  end
+
+  assign p3_branch_taken = p2p3_q.ctrl.p4.is_branch && p3_branch_cond;
+  assign p3_branch_resolved = p3_branch_taken ? p3_pc_next : p2p3_q.pc + 32'd4;
+
+  // fetch followed the prediction, so the instruction in p2 is the one the prediction chose
+  assign branch_mispredict = PredictBranches && p2p3_q.valid && p2p3_q.ctrl.p4.is_branch &&
+      !(p1p2_q.valid && p1p2_q.pc == p3_branch_resolved);
+
+  generate
+    if (PredictBranches) begin : gen_predictor
+      branch_predictor #(
+          .PREDICTOR  (BRANCH_PREDICTOR),
+          .BHT_ENTRIES(BHT_ENTRIES)
+      ) predictor_u (
+          .i_clk          (i_clk),
+          .i_rst_n        (i_rst_n),
+          .i_id_branch    (p2_valid && p2_ctrl.p4.is_branch),
+          .i_id_pc        (p1p2_q.pc),
+          .i_id_target    (p2_branch_target),
+          .o_predict_taken(p2_predict_taken),
+          .i_ex_branch    (p2p3_q.valid && p2p3_q.ctrl.p4.is_branch),
+          .i_ex_pc        (p2p3_q.pc),
+          .i_ex_taken     (p3_branch_taken)
+      );
+    end else begin : gen_no_predictor
+      assign p2_predict_taken = 1'b0;
+    end
+  endgenerate
+
   always_comb begin
-    p3p4.pc_next      = p3_pc_next;
-    p3p4.reg_rd_data2 = p2p3_q.reg_rd_data2;
+    p3p4.valid        = p2p3_q.valid;
+    p3p4.pc_next      = p3_branch_resolved;
+    p3p4.reg_rd_data2 = mem_wdata;
+    // jal links the address after it
+    p3p4.alu_out      = p2p3_q.ctrl.p2.is_jal ? p2p3_q.pc + 32'd4 : p3_alu_out;
     p3p4.ctrl         = p2p3_q.ctrl;
     p3p4.insn         = p2p3_q.insn;
   end
@@ -232,14 +415,17 @@ module cpu_core #(
   ) memory_u (
       .i_rst_n         (i_rst_n),
       .i_clk           (i_clk),
-      .i_ctrl_mem_rd_en(p3p4_q.ctrl.p4.mem_rd_en),
-      .i_ctrl_mem_wr_en(p3p4_q.ctrl.p4.mem_wr_en),
+      // address and write data are launched from p3, the read data lands in p4
+      .i_ctrl_mem_rd_en(p2p3_q.ctrl.p4.mem_rd_en),
+      .i_ctrl_mem_wr_en(p2p3_q.ctrl.p4.mem_wr_en),
+      .i_mem_funct3    (p3_insn.i_type.funct3),
       .i_mem_addr      (p3_alu_out),
       .i_mem_wdata     (mem_wdata),
       .o_mem_rdata     (mem_rdata)
   );
 
   always_comb begin
+    p4p5.valid       = p3p4_q.valid;
     p4p5.reg_wr_data = p4_reg_wr_data;
     p4p5.ctrl        = p3p4_q.ctrl;
     p4p5.insn        = p3p4_q.insn;
@@ -252,42 +438,36 @@ module cpu_core #(
       .o_p4p5 (p4p5_q)
   );
 
-  /*
-  // Hazard detection and pipeline control
+  //------------------------------------------------------------------------------
+  // Hazard detection and forwarding
+  //------------------------------------------------------------------------------
+
   hazard_unit #(
       .HAZARD_TECHNIQUE(HAZARD_TECHNIQUE),
       .ENABLE_LOAD_USE_FORWARDING(ENABLE_LOAD_USE_FORWARDING)
   ) hazard_u (
-      .i_clk  (i_clk),
-      .i_rst_n(i_rst_n),
-
       // ID stage
-      .i_id_rs1   (p1p2_q.insn.r_type.rs1),
-      .i_id_rs2   (p1p2_q.insn.r_type.rs2),
-      .i_id_valid (1'b1),                      // TODO: Add proper valid signal
-      .i_id_opcode(p1p2_q.insn.common.opcode),
+      .i_id_rs1     (p2_insn.r_type.rs1),
+      .i_id_rs2     (p2_insn.r_type.rs2),
+      .i_id_uses_rs1(uses_rs1(p2_insn)),
+      .i_id_uses_rs2(uses_rs2(p2_insn)),
+      .i_id_valid   (p2_valid),
 
       // EX stage
-      .i_ex_rs1      (p2p3_q.insn.r_type.rs1),
-      .i_ex_rs2      (p2p3_q.insn.r_type.rs2),
-      .i_ex_valid    (1'b1),                                   // TODO: Add proper valid signal
-      .i_ex_is_store (p2p3_q.insn.common.opcode == OP_STORE),
-      .i_ex_is_branch(p2p3_q.insn.common.opcode == OP_BRANCH),
+      .i_ex_rd       (p2p3_q.insn.r_type.rd),
+      .i_ex_reg_write(p2p3_q.ctrl.p5.reg_wr_en),
+      .i_ex_is_load  (p2p3_q.ctrl.p4.mem_rd_en),
+      .i_ex_is_branch(p2p3_q.ctrl.p4.is_branch),
+      .i_ex_valid    (p2p3_q.valid),
 
       // MEM stage
       .i_mem_rd       (p3p4_q.insn.r_type.rd),
       .i_mem_reg_write(p3p4_q.ctrl.p5.reg_wr_en),
-      .i_mem_is_load  (p3p4_q.insn.common.opcode == OP_LOAD),
-      .i_mem_valid    (1'b1),                                  // TODO: Add proper valid signal
-
-      // WB stage
-      .i_wb_rd       (p4p5_q.insn.r_type.rd),
-      .i_wb_reg_write(p4p5_q.ctrl.p5.reg_wr_en),
-      .i_wb_valid    (1'b1),                      // TODO: Add proper valid signal
+      .i_mem_valid    (p3p4_q.valid),
 
-      // Branch prediction (for future enhancement)
-      .i_branch_taken     (1'b0),  // TODO: Add branch prediction
-      .i_branch_mispredict(1'b0),  // TODO: Add branch prediction
+      // Branch prediction
+      .i_branch_taken     (p3_branch_taken),
+      .i_branch_mispredict(branch_mispredict),
 
       // Pipeline control outputs
       .o_stall_if         (stall_if),
@@ -295,48 +475,76 @@ module cpu_core #(
       .o_stall_ex         (stall_ex),
       .o_flush_id         (flush_id),
       .o_flush_ex         (flush_ex),
-      .o_enable_forwarding(enable_forwarding)
+      .o_enable_forwarding(enable_forwarding),
+      .o_stall_raw        (stall_raw),
+      .o_stall_load_use   (stall_load_use),
+      .o_flush_branch     (flush_branch)
   );
 
+  assign mem_result_forwarded = ForwardLoadUse ? p4_reg_wr_data : p3p4_q.alu_out;
+
   // Data forwarding unit
   forwarding_unit forwarding_u (
       // EX stage (current instruction)
-      .i_ex_rs1     (p2p3_q.insn.r_type.rs1),
-      .i_ex_rs2     (p2p3_q.insn.r_type.rs2),
-      .i_ex_is_store(p2p3_q.insn.common.opcode == OP_STORE),
+      .i_ex_rs1     (p3_insn.r_type.rs1),
+      .i_ex_rs2     (p3_insn.r_type.rs2),
+      .i_ex_is_store(p2p3_q.ctrl.p4.mem_wr_en),
 
       // MEM stage (previous instruction)
-      .i_mem_rd        (p3p4_q.insn.r_type.rd),
-      .i_mem_reg_write (p3p4_q.ctrl.p5.reg_wr_en),
-      .i_mem_alu_result(p3p4_q.alu_out),
+      .i_mem_rd       (p3p4_q.insn.r_type.rd),
+      .i_mem_reg_write(p3p4_q.ctrl.p5.reg_wr_en),
+      .i_mem_result   (mem_result_forwarded),
 
       // WB stage (older instruction)
-      .i_wb_rd        (p4p5_q.insn.r_type.rd),
-      .i_wb_reg_write (p4p5_q.ctrl.p5.reg_wr_en),
-      .i_wb_alu_result(p4p5_q.alu_out),
-      .i_wb_mem_data  (p4p5_q.mem_rdata),
-      .i_wb_mem_to_reg(p4p5_q.ctrl.p5.is_mem_to_reg),
+      .i_wb_rd       (p4p5_q.insn.r_type.rd),
+      .i_wb_reg_write(p4p5_q.ctrl.p5.reg_wr_en),
+      .i_wb_result   (p4p5_q.reg_wr_data),
 
       // Register file data
-      .i_regfile_data1(p2p3_q.reg_rd_data1),
-      .i_regfile_data2(p2p3_q.reg_rd_data2),
+      .i_regfile_data1(p3_rs1_data),
+      .i_regfile_data2(p3_rs2_data),
 
       // Forwarded outputs
       .o_forwarded_data1     (alu_in1_forwarded),
       .o_forwarded_data2     (alu_in2_forwarded),
-      .o_forwarded_store_data(mem_wdata_forwarded)
+      .o_forwarded_store_data(mem_wdata_forwarded),
+      .o_forward_rs1         (forward_rs1),
+      .o_forward_rs2         (forward_rs2)
+  );
+
+  //------------------------------------------------------------------------------
+  // Performance counters
+  //------------------------------------------------------------------------------
+
+  perf_counters perf_u (
+      .i_clk(i_clk),
+      .i_rst_n(i_rst_n),
+      .i_retire(p4p5_q.valid),
+      .i_stall_raw(stall_raw),
+      .i_stall_load_use(stall_load_use),
+      .i_flush(flush_branch),
+      .i_forward({
+        enable_forwarding && p2p3_q.valid && forward_rs2 && uses_rs2(p3_insn),
+        enable_forwarding && p2p3_q.valid && forward_rs1 && uses_rs1(p3_insn)
+      }),
+      .o_mcycle(  /* sampled by testbenches */),
+      .o_minstret(  /* sampled by testbenches */),
+      .o_mhpmcounter3(  /* sampled by testbenches */),
+      .o_mhpmcounter4(  /* sampled by testbenches */),
+      .o_mhpmcounter5(  /* sampled by testbenches */),
+      .o_mhpmcounter6(  /* sampled by testbenches */)
   );
-  */
 
   // Wire assignments after all signals are declared
-  assign p4_reg_wr_data = p3p4_q.ctrl.p4.is_mem_to_reg ? mem_rdata : p3p4_q.alu_out;
-  assign alu_in1        = enable_forwarding ? alu_in1_forwarded : p2p3_q.reg_rd_data1;
-  assign alu_in2        = enable_forwarding ? alu_in2_forwarded : alu_in2_pre;
-  assign alu_in2_pre    = p2p3_q.ctrl.p3.alu_src == ALUSRC_REG ? p2p3_q.reg_rd_data2 : p3_imm_se;
-  assign mem_wdata      = mem_wdata_forwarded;
+  assign p4_reg_wr_data   = p3p4_q.ctrl.p4.is_mem_to_reg ? mem_rdata : p3p4_q.alu_out;
+  assign alu_in1          = enable_forwarding ? alu_in1_forwarded : p3_rs1_data;
+  assign alu_in2_reg      = enable_forwarding ? alu_in2_forwarded : p3_rs2_data;
+  assign alu_in2          = p2p3_q.ctrl.p3.alu_src == ALUSRC_REG ? alu_in2_reg : p3_imm_se;
+  assign mem_wdata        = enable_forwarding ? mem_wdata_forwarded : p3_rs2_data;
 
   // Combinational signal assignments
-  assign p2_pc_next     = p1p2_q.pc + get_j_imm(p2_insn);
-  assign p3_pc_next     = p2p3_q.pc + p3_imm_se;
+  assign p2_pc_next       = p1p2_q.pc + get_j_imm(p2_insn);
+  assign p2_branch_target = p1p2_q.pc + get_b_imm(p2_insn);
+  assign p3_pc_next       = p2p3_q.pc + p3_imm_se;
 
 endmodule
@@ -94,6 +94,15 @@ typedef union packed {
 //------------------------------------------------------------------------------
 // Instruction decode utilities
 //------------------------------------------------------------------------------
+// source registers actually read by an instruction, false matches cost stalls
+function static logic uses_rs1(insn_t insn);
+  return insn.common.opcode != OP_JAL;
+endfunction
+
+function static logic uses_rs2(insn_t insn);
+  return insn.common.opcode inside {OP_RTYPE, OP_STORE, OP_BRANCH};
+endfunction
+
 function static logic [31:0] get_i_imm(insn_t insn);
   return {{20{insn.i_type.imm[11]}}, insn.i_type.imm};
 endfunction
@@ -189,20 +198,21 @@ typedef struct packed {
 // Pipeline registers
 //------------------------------------------------------------------------------
 typedef struct packed {
+  logic        valid;  // cleared for bubbles and flushed instructions
   logic [31:0] pc;
   logic [31:0] pc_plus_4;
 } p1p2_t;
 
 typedef struct packed {
+  logic        valid;
   logic [31:0] pc;
   logic [31:0] pc_plus_4;
-  logic [31:0] reg_rd_data1;
-  logic [31:0] reg_rd_data2;
   cpu_ctrl_t   ctrl;
   insn_t       insn;
 } p2p3_t;
 
 typedef struct packed {
+  logic        valid;
   logic [31:0] pc_next;
   logic [31:0] reg_rd_data2;
   logic [31:0] alu_out;
@@ -211,6 +221,7 @@ typedef struct packed {
 } p3p4_t;
 
 typedef struct packed {
+  logic        valid;
   logic [31:0] reg_wr_data;
   cpu_ctrl_t   ctrl;
   insn_t       insn;
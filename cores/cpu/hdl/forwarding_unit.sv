@@ -32,6 +32,9 @@
 //   - REGFILE: Data read from register file (no forwarding needed)
 //   - EX_MEM:  Data from EX/MEM pipeline register (previous instruction's ALU result)
 //   - MEM_WB:  Data from MEM/WB pipeline register (older instruction's result or memory data)
+//
+//   The EX_MEM source is whatever the core selects: the ALU result, or the memory read data
+//   as well when load-use forwarding is enabled.
 
 `include "cpu_types.vh"
 
@@ -44,14 +47,12 @@ module forwarding_unit (
     // Previous instruction info (in MEM stage)
     input logic [ 4:0] i_mem_rd,         // Destination register address
     input logic        i_mem_reg_write,  // Will write to register
-    input logic [31:0] i_mem_alu_result, // ALU result from MEM stage
+    input logic [31:0] i_mem_result,     // ALU or load result from MEM stage
 
     // Older instruction info (in WB stage)
     input logic [ 4:0] i_wb_rd,          // Destination register address
     input logic        i_wb_reg_write,   // Will write to register
-    input logic [31:0] i_wb_alu_result,  // ALU result from WB stage
-    input logic [31:0] i_wb_mem_data,    // Memory data from WB stage
-    input logic        i_wb_mem_to_reg,  // Select memory data vs ALU result
+    input logic [31:0] i_wb_result,      // Writeback data from WB stage
 
     // Original data from register file
     input logic [31:0] i_regfile_data1,  // Register file output 1
@@ -60,7 +61,11 @@ module forwarding_unit (
     // Forwarded outputs
     output logic [31:0] o_forwarded_data1,      // Forwarded data for ALU input 1
     output logic [31:0] o_forwarded_data2,      // Forwarded data for ALU input 2
-    output logic [31:0] o_forwarded_store_data  // Forwarded data for store operations
+    output logic [31:0] o_forwarded_store_data, // Forwarded data for store operations
+
+    // Forwarding hits, for the performance counters
+    output logic o_forward_rs1,  // rs1 taken from a pipeline register
+    output logic o_forward_rs2   // rs2 (ALU input or store data) taken from a pipeline register
 );
 
   // Internal forwarding control signals
@@ -74,10 +79,6 @@ module forwarding_unit (
   forward_src_t        forward_rs2_src;
   forward_src_t        forward_store_src;
 
-  // WB stage data selection (ALU result or memory data)
-  logic         [31:0] wb_result_data;
-  assign wb_result_data = i_wb_mem_to_reg ? i_wb_mem_data : i_wb_alu_result;
-
   // Hazard detection for RS1 (ALU input 1)
   always_comb begin
     forward_rs1_src = FWD_REGFILE;  // Default: no forwarding
@@ -125,8 +126,8 @@ module forwarding_unit (
   always_comb begin
     case (forward_rs1_src)
       FWD_REGFILE: o_forwarded_data1 = i_regfile_data1;
-      FWD_EX_MEM:  o_forwarded_data1 = i_mem_alu_result;
-      FWD_MEM_WB:  o_forwarded_data1 = wb_result_data;
+      FWD_EX_MEM:  o_forwarded_data1 = i_mem_result;
+      FWD_MEM_WB:  o_forwarded_data1 = i_wb_result;
       default:     o_forwarded_data1 = i_regfile_data1;
     endcase
   end
@@ -134,8 +135,8 @@ module forwarding_unit (
   always_comb begin
     case (forward_rs2_src)
       FWD_REGFILE: o_forwarded_data2 = i_regfile_data2;
-      FWD_EX_MEM:  o_forwarded_data2 = i_mem_alu_result;
-      FWD_MEM_WB:  o_forwarded_data2 = wb_result_data;
+      FWD_EX_MEM:  o_forwarded_data2 = i_mem_result;
+      FWD_MEM_WB:  o_forwarded_data2 = i_wb_result;
       default:     o_forwarded_data2 = i_regfile_data2;
     endcase
   end
@@ -143,11 +144,14 @@ module forwarding_unit (
   always_comb begin
     case (forward_store_src)
       FWD_REGFILE: o_forwarded_store_data = i_regfile_data2;
-      FWD_EX_MEM:  o_forwarded_store_data = i_mem_alu_result;
-      FWD_MEM_WB:  o_forwarded_store_data = wb_result_data;
+      FWD_EX_MEM:  o_forwarded_store_data = i_mem_result;
+      FWD_MEM_WB:  o_forwarded_store_data = i_wb_result;
       default:     o_forwarded_store_data = i_regfile_data2;
     endcase
   end
 
+  assign o_forward_rs1 = forward_rs1_src != FWD_REGFILE;
+  assign o_forward_rs2 = i_ex_is_store ? forward_store_src != FWD_REGFILE :
+      forward_rs2_src != FWD_REGFILE;
 
 endmodule
@@ -28,11 +28,20 @@
 //   Pipeline hazard detection and control unit with configurable hazard handling techniques
 //   Supports different performance/complexity tradeoffs for hazard resolution
 //
+//   Hazards are detected against the instruction in ID, before it issues. The register file
+//   read is registered and bypassed on a same-cycle write, so only producers still in EX or
+//   MEM can conflict. Stalling holds IF/ID and inserts a bubble into EX.
+//
+//   Branches resolve in EX. Without prediction every branch flushes the instructions in IF
+//   and ID, and fetch is redirected to the resolved PC from MEM. With prediction (AGGRESSIVE)
+//   fetch has already followed the prediction, so only a misprediction flushes, and then only
+//   the instruction in ID, since the core fetches the resolved PC in the same cycle.
+//
 // Hazard Handling Techniques:
 //   0: STALL_ONLY     - Always stall on hazards (simplest, lowest performance)
 //   1: FORWARD_ONLY   - Always forward when possible (highest performance, most complex)
 //   2: HYBRID         - Forward for ALU hazards, stall for load-use hazards
-//   3: AGGRESSIVE     - Forward + branch prediction + speculative execution
+//   3: AGGRESSIVE     - Forward + branch prediction (see branch_predictor.sv)
 
 `include "cpu_types.vh"
 
@@ -40,36 +49,28 @@ module hazard_unit #(
     parameter int HAZARD_TECHNIQUE = 0,  // 0=STALL_ONLY, 1=FORWARD_ONLY, 2=HYBRID, 3=AGGRESSIVE
     parameter int ENABLE_LOAD_USE_FORWARDING = 1  // Enable forwarding for load-use hazards
 ) (
-    input logic i_clk,
-    input logic i_rst_n,
-
     // Current instruction info (ID stage)
-    input logic    [4:0] i_id_rs1,    // Source register 1
-    input logic    [4:0] i_id_rs2,    // Source register 2
-    input logic          i_id_valid,  // Instruction is valid
-    input opcode_t       i_id_opcode, // Instruction opcode
-
-    // Current instruction info (EX stage)
-    input logic [4:0] i_ex_rs1,       // Source register 1
-    input logic [4:0] i_ex_rs2,       // Source register 2
-    input logic       i_ex_valid,     // Instruction is valid
-    input logic       i_ex_is_store,  // Is store operation
-    input logic       i_ex_is_branch, // Is branch operation
-
-    // Previous instruction info (MEM stage)
+    input logic [4:0] i_id_rs1,       // Source register 1
+    input logic [4:0] i_id_rs2,       // Source register 2
+    input logic       i_id_uses_rs1,  // Source register 1 is read
+    input logic       i_id_uses_rs2,  // Source register 2 is read
+    input logic       i_id_valid,     // Instruction is valid
+
+    // Previous instruction info (EX stage)
+    input logic [4:0] i_ex_rd,         // Destination register
+    input logic       i_ex_reg_write,  // Will write to register
+    input logic       i_ex_is_load,    // Is load operation
+    input logic       i_ex_is_branch,  // Is branch operation
+    input logic       i_ex_valid,      // Instruction is valid
+
+    // Older instruction info (MEM stage)
     input logic [4:0] i_mem_rd,         // Destination register
     input logic       i_mem_reg_write,  // Will write to register
-    input logic       i_mem_is_load,    // Is load operation
     input logic       i_mem_valid,      // Instruction is valid
 
-    // Older instruction info (WB stage)
-    input logic [4:0] i_wb_rd,         // Destination register
-    input logic       i_wb_reg_write,  // Will write to register
-    input logic       i_wb_valid,      // Instruction is valid
-
     // Branch prediction inputs (for AGGRESSIVE mode)
-    input logic i_branch_taken,      // Branch was taken
-    input logic i_branch_mispredict, // Branch misprediction
+    input logic i_branch_taken,      // Branch in EX is taken
+    input logic i_branch_mispredict, // Branch in EX was mispredicted
 
     // Pipeline control outputs
     output logic o_stall_if,          // Stall instruction fetch
@@ -77,122 +78,93 @@ module hazard_unit #(
     output logic o_stall_ex,          // Stall execute stage
     output logic o_flush_id,          // Flush instruction decode
     output logic o_flush_ex,          // Flush execute stage
-    output logic o_enable_forwarding  // Enable forwarding unit
-);
+    output logic o_enable_forwarding, // Enable forwarding unit
 
+    // Stall causes, for the performance counters
+    output logic o_stall_raw,       // Stalled on a RAW hazard that is not forwarded
+    output logic o_stall_load_use,  // Stalled on a load-use hazard
+    output logic o_flush_branch     // Flushed for the branch in EX
+);
 
   // Hazard detection logic
+  logic raw_hazard_rs1_ex;  // RAW hazard on rs1 with EX stage
+  logic raw_hazard_rs2_ex;  // RAW hazard on rs2 with EX stage
   logic raw_hazard_rs1_mem;  // RAW hazard on rs1 with MEM stage
   logic raw_hazard_rs2_mem;  // RAW hazard on rs2 with MEM stage
-  logic raw_hazard_rs1_wb;  // RAW hazard on rs1 with WB stage
-  logic raw_hazard_rs2_wb;  // RAW hazard on rs2 with WB stage
   logic load_use_hazard_detected;
   logic data_hazard_detected;
   logic control_hazard_detected;
+  logic stall;
+  logic flush;  // discard the instruction in ID
+  logic flush_if;  // and the one being fetched
 
   // RAW hazard detection
   always_comb begin
-    // EX/MEM hazards
+    // ID/EX hazards
+    raw_hazard_rs1_ex = i_ex_reg_write && i_ex_valid && (i_ex_rd != 5'b0) &&
+        (i_ex_rd == i_id_rs1) && i_id_uses_rs1 && i_id_valid;
+    raw_hazard_rs2_ex = i_ex_reg_write && i_ex_valid && (i_ex_rd != 5'b0) &&
+        (i_ex_rd == i_id_rs2) && i_id_uses_rs2 && i_id_valid;
+
+    // ID/MEM hazards
     raw_hazard_rs1_mem = i_mem_reg_write && i_mem_valid && (i_mem_rd != 5'b0) &&
-        (i_mem_rd == i_ex_rs1) && i_ex_valid;
+        (i_mem_rd == i_id_rs1) && i_id_uses_rs1 && i_id_valid;
     raw_hazard_rs2_mem = i_mem_reg_write && i_mem_valid && (i_mem_rd != 5'b0) &&
-        (i_mem_rd == i_ex_rs2) && i_ex_valid;
-
-    // MEM/WB hazards
-    raw_hazard_rs1_wb = i_wb_reg_write && i_wb_valid && (i_wb_rd != 5'b0) &&
-        (i_wb_rd == i_ex_rs1) && i_ex_valid && !(raw_hazard_rs1_mem);  // EX/MEM has priority
-    raw_hazard_rs2_wb = i_wb_reg_write && i_wb_valid && (i_wb_rd != 5'b0) &&
-        (i_wb_rd == i_ex_rs2) && i_ex_valid && !(raw_hazard_rs2_mem);  // EX/MEM has priority
+        (i_mem_rd == i_id_rs2) && i_id_uses_rs2 && i_id_valid;
 
-    // Load-use hazard (ID/EX with EX/MEM)
-    load_use_hazard_detected = i_mem_is_load && i_mem_valid && i_id_valid && (i_mem_rd != 5'b0) &&
-        ((i_mem_rd == i_id_rs1) || (i_mem_rd == i_id_rs2));
+    // Load-use hazard (ID with a load in EX), its data is only ready at the end of MEM
+    load_use_hazard_detected = i_ex_is_load && (raw_hazard_rs1_ex || raw_hazard_rs2_ex);
 
     // Overall data hazard detection
-    data_hazard_detected = raw_hazard_rs1_mem || raw_hazard_rs2_mem || raw_hazard_rs1_wb ||
-        raw_hazard_rs2_wb || load_use_hazard_detected;
+    data_hazard_detected = raw_hazard_rs1_ex || raw_hazard_rs2_ex || raw_hazard_rs1_mem ||
+        raw_hazard_rs2_mem;
 
     // Control hazards (branches, jumps)
-    control_hazard_detected = i_ex_is_branch || i_branch_mispredict;
+    control_hazard_detected = (i_ex_is_branch && i_ex_valid) || i_branch_mispredict;
   end
 
   // Hazard handling based on selected technique
   always_comb begin
     // Default values
-    o_stall_if          = 1'b0;
-    o_stall_id          = 1'b0;
-    o_stall_ex          = 1'b0;
-    o_flush_id          = 1'b0;
-    o_flush_ex          = 1'b0;
+    stall               = 1'b0;
+    flush               = 1'b0;
+    flush_if            = 1'b0;
     o_enable_forwarding = 1'b0;
 
     case (HAZARD_TECHNIQUE)
       // STALL_ONLY: Always stall on any hazard
       0: begin
-        if (data_hazard_detected || load_use_hazard_detected) begin
-          o_stall_if = 1'b1;
-          o_stall_id = 1'b1;
-          o_flush_ex = 1'b1;  // Insert bubble in EX stage
-        end
-        if (control_hazard_detected) begin
-          o_flush_id = 1'b1;
-          o_flush_ex = 1'b1;
-        end
+        stall               = data_hazard_detected;
+        flush               = control_hazard_detected;
+        flush_if            = control_hazard_detected;
         o_enable_forwarding = 1'b0;
       end
 
       // FORWARD_ONLY: Always forward when possible, minimal stalling
       1: begin
         o_enable_forwarding = 1'b1;
-
         // Only stall for load-use hazards if forwarding is disabled
-        if (load_use_hazard_detected && !ENABLE_LOAD_USE_FORWARDING) begin
-          o_stall_if = 1'b1;
-          o_stall_id = 1'b1;
-          o_flush_ex = 1'b1;
-        end
-
-        // Handle control hazards
-        if (control_hazard_detected) begin
-          o_flush_id = 1'b1;
-          o_flush_ex = 1'b1;
-        end
+        stall               = load_use_hazard_detected && ENABLE_LOAD_USE_FORWARDING == 0;
+        flush               = control_hazard_detected;
+        flush_if            = control_hazard_detected;
       end
 
       // HYBRID: Forward for ALU hazards, stall for load-use
       2: begin
         o_enable_forwarding = 1'b1;
-
-        // Always stall for load-use hazards
-        if (load_use_hazard_detected) begin
-          o_stall_if = 1'b1;
-          o_stall_id = 1'b1;
-          o_flush_ex = 1'b1;
-        end
-
-        // Handle control hazards
-        if (control_hazard_detected) begin
-          o_flush_id = 1'b1;
-          o_flush_ex = 1'b1;
-        end
+        stall               = load_use_hazard_detected;
+        flush               = control_hazard_detected;
+        flush_if            = control_hazard_detected;
       end
 
       // AGGRESSIVE: Forward + branch prediction + speculation
       3: begin
         o_enable_forwarding = 1'b1;
-
         // Only stall for unresolvable hazards
-        if (load_use_hazard_detected && !ENABLE_LOAD_USE_FORWARDING) begin
-          o_stall_if = 1'b1;
-          o_stall_id = 1'b1;
-          o_flush_ex = 1'b1;
-        end
-
-        // Only flush on branch misprediction
-        if (i_branch_mispredict) begin
-          o_flush_id = 1'b1;
-          o_flush_ex = 1'b1;
-        end
+        stall               = load_use_hazard_detected && ENABLE_LOAD_USE_FORWARDING == 0;
+        // Only flush on branch misprediction, the resolved PC is fetched in the same cycle
+        flush               = i_branch_mispredict;
+        flush_if            = 1'b0;
       end
 
       default: begin
@@ -202,5 +174,15 @@ module hazard_unit #(
     endcase
   end
 
+  // The instruction in ID is discarded on a flush, so there is nothing to stall for
+  assign o_stall_if       = stall && !flush;
+  assign o_stall_id       = stall && !flush;
+  assign o_stall_ex       = 1'b0;  // hazards are resolved before issue, EX never waits
+  assign o_flush_id       = flush_if;
+  assign o_flush_ex       = stall || flush;  // Insert bubble in EX stage
+
+  assign o_stall_raw      = o_stall_id && !load_use_hazard_detected;
+  assign o_stall_load_use = o_stall_id && load_use_hazard_detected;
+  assign o_flush_branch   = flush;
 
 endmodule
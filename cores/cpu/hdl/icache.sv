@@ -0,0 +1,227 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : icache
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   Instruction cache between the fetch stage and a slow backing memory, such as SPI flash
+//   The fetch port behaves as insnmem's: the instruction at i_pc is out the cycle after, but
+//   only while o_ready is high. Tags and data are read into registers on every clock edge and
+//   compared the cycle after, so each way maps onto block RAM.
+//
+//   A miss fills the whole line from the backing memory and holds o_ready low until it is
+//   in. The fill asks for one line at a time: o_mem_req and the line address o_mem_addr stay
+//   up until the backing memory has returned LINE_WORDS words in order, one on every cycle
+//   i_mem_valid is high, after any latency. The fetch port keeps asking for the missed address
+//   meanwhile and hits once the line is in. With two ways the least recently used one is
+//   refilled. Reset invalidates every line.
+//
+//   o_hits and o_misses count lookups, leaving out the one that hits just after a fill.
+//
+// Parameters:
+//   SIZE - Cache size in bytes (default: 1024)
+//   WAYS - Associativity, 1 for direct mapped or 2 (default: 1)
+//   LINE_WORDS - Words per line, a power of two of at least 2 (default: 4)
+`include "cpu_types.vh"
+
+module icache #(
+    parameter int SIZE       = 1024,
+    parameter int WAYS       = 1,
+    parameter int LINE_WORDS = 4
+) (
+    input logic i_clk,
+    input logic i_rst_n,
+
+    // fetch port
+    input  logic  [31:0] i_pc,    // word aligned, the low bits are ignored
+    output insn_t        o_insn,
+    output logic         o_ready, // o_insn holds the instruction at last cycle's i_pc
+
+    // backing memory, a line per request
+    output logic        o_mem_req,
+    output logic [31:0] o_mem_addr,
+    input  logic        i_mem_valid,
+    input  logic [31:0] i_mem_data,
+
+    output logic [63:0] o_hits,
+    output logic [63:0] o_misses
+);
+
+  localparam int Sets = SIZE / (4 * LINE_WORDS * WAYS);
+  localparam int OffsetBits = $clog2(LINE_WORDS);
+  localparam int IndexBits = $clog2(Sets);
+  localparam int TagBits = 30 - OffsetBits - IndexBits;
+  localparam int WayBits = WAYS > 1 ? $clog2(WAYS) : 1;
+
+  logic [IndexBits-1:0] rd_index;
+  logic [OffsetBits-1:0] rd_offset;
+
+  // lookup, the address read into the way registers last cycle
+  logic [29-OffsetBits:0] line_q;  // i_pc without the word offset
+  logic lookup_q;  // the read was a lookup, not made during a fill
+  logic [IndexBits-1:0] pc_index;
+  logic [TagBits-1:0] pc_tag;
+  logic [WAYS-1:0] hit_way;
+  logic [31:0] way_insn[WAYS];
+  logic hit;
+  logic miss;
+
+  logic [WAYS-1:0] valid_rd_q;
+  logic [WAYS-1:0][Sets-1:0] valid_q;
+  logic [Sets-1:0] lru_q;  // way to refill next, with two ways
+
+  // line fill
+  logic filling_q;
+  logic filled_q;  // the next lookup is the retry of the miss
+  logic [31:0] fill_addr_q;
+  logic [OffsetBits-1:0] fill_count_q;
+  logic [WayBits-1:0] victim;
+  logic [WayBits-1:0] victim_q;
+  logic [IndexBits-1:0] fill_index;
+  logic [TagBits-1:0] fill_tag;
+  logic fill_wr_en;
+  logic fill_last;
+
+  logic [63:0] hits_q;
+  logic [63:0] misses_q;
+
+  assign rd_index   = i_pc[2+OffsetBits+:IndexBits];
+  assign rd_offset  = i_pc[2+:OffsetBits];
+  assign pc_index   = line_q[IndexBits-1:0];
+  assign pc_tag     = line_q[29-OffsetBits-:TagBits];
+  assign fill_index = fill_addr_q[2+OffsetBits+:IndexBits];
+  assign fill_tag   = fill_addr_q[31-:TagBits];
+  assign fill_wr_en = filling_q && i_mem_valid;
+  assign fill_last  = fill_count_q == OffsetBits'(LINE_WORDS - 1);
+
+  generate
+    for (genvar w = 0; w < WAYS; w++) begin : gen_way
+      logic [       31:0] data   [Sets*LINE_WORDS];
+      logic [TagBits-1:0] tags   [           Sets];
+      logic [       31:0] data_q;
+      logic [TagBits-1:0] tag_q;
+
+      always_ff @(posedge i_clk) begin : read_way
+        data_q <= data[{rd_index, rd_offset}];
+        tag_q  <= tags[rd_index];
+      end
+
+      always_ff @(posedge i_clk) begin : fill_way
+        if (fill_wr_en && victim_q == WayBits'(w)) begin
+          data[{fill_index, fill_count_q}] <= i_mem_data;
+          if (fill_last) begin
+            tags[fill_index] <= fill_tag;
+          end
+        end
+      end
+
+      assign hit_way[w]  = lookup_q && valid_rd_q[w] && tag_q == pc_tag;
+      assign way_insn[w] = data_q;
+    end
+  endgenerate
+
+  always_comb begin : select_way
+    o_insn = 32'h00000013;  // NOP
+    for (int w = 0; w < WAYS; w++) begin
+      if (hit_way[w]) begin
+        o_insn = way_insn[w];
+      end
+    end
+  end
+
+  assign hit  = |hit_way;
+  assign miss = lookup_q && !hit;
+
+  // an invalid way first, else the least recently used
+  always_comb begin : choose_victim
+    victim = '0;
+    if (WAYS > 1 && valid_q[0][pc_index]) begin
+      victim = !valid_q[WAYS-1][pc_index] ? WayBits'(WAYS - 1) : WayBits'(lru_q[pc_index]);
+    end
+  end
+
+  always_ff @(posedge i_clk or negedge i_rst_n) begin : lookup
+    if (~i_rst_n) begin
+      line_q     <= '0;
+      lookup_q   <= 1'b0;
+      valid_rd_q <= '0;
+    end else begin
+      line_q   <= i_pc[31:2+OffsetBits];
+      lookup_q <= !filling_q && !miss;
+      for (int w = 0; w < WAYS; w++) begin
+        valid_rd_q[w] <= valid_q[w][rd_index];
+      end
+    end
+  end
+
+  always_ff @(posedge i_clk or negedge i_rst_n) begin : fill_line
+    if (~i_rst_n) begin
+      filling_q    <= 1'b0;
+      filled_q     <= 1'b0;
+      fill_addr_q  <= '0;
+      fill_count_q <= '0;
+      victim_q     <= '0;
+      valid_q      <= '0;
+      lru_q        <= '0;
+    end else begin
+      if (lookup_q) begin
+        filled_q <= 1'b0;
+      end
+      if (miss) begin
+        filling_q    <= 1'b1;
+        fill_addr_q  <= {line_q, {(2 + OffsetBits) {1'b0}}};
+        fill_count_q <= '0;
+        victim_q     <= victim;
+      end else if (hit && WAYS > 1) begin
+        lru_q[pc_index] <= hit_way[0];
+      end
+      if (fill_wr_en) begin
+        fill_count_q <= fill_count_q + 1'b1;
+        if (fill_last) begin
+          filling_q                     <= 1'b0;
+          filled_q                      <= 1'b1;
+          valid_q[victim_q][fill_index] <= 1'b1;
+          lru_q[fill_index]             <= victim_q == '0;
+        end
+      end
+    end
+  end
+
+  always_ff @(posedge i_clk or negedge i_rst_n) begin : count_lookups
+    if (~i_rst_n) begin
+      hits_q   <= '0;
+      misses_q <= '0;
+    end else begin
+      hits_q   <= hits_q + 64'(hit && !filled_q);
+      misses_q <= misses_q + 64'(miss);
+    end
+  end
+
+  assign o_ready    = hit;
+  assign o_mem_req  = filling_q;
+  assign o_mem_addr = fill_addr_q;
+  assign o_hits     = hits_q;
+  assign o_misses   = misses_q;
+
+endmodule
@@ -26,20 +26,30 @@
 //
 // Description:
 //   Instruction memory module for RISC-V processor
-//   Provides read-only access to instruction storage with exception handling
+//   Provides read access to instruction storage with exception handling, and a
+//   word write port for loading programs at run time (see uart_boot)
 //
 // Parameters:
 //   SIZE - Memory size in bytes (default: 512)
+//   PRELOAD_OFFSET - First byte +IMEM_PRELOAD_FILE is loaded at (default: 0)
+//   PRELOAD_SIZE - Bytes loaded from +IMEM_PRELOAD_FILE, 0 for the whole file
 `include "cpu_types.vh"
 
 module insnmem #(
-    parameter int SIZE = 512
+    parameter int SIZE = 512,
+    parameter int PRELOAD_OFFSET = 0,
+    parameter int PRELOAD_SIZE = 0
 ) (
     input  logic         i_clk,
     input  logic         i_rst_n,
     input  logic  [31:0] i_pc,
     output insn_t        o_insn,
-    output logic         o_imem_exception
+    output logic         o_imem_exception,
+
+    // program load, a word aligned word per cycle
+    input logic        i_wr_en,
+    input logic [31:0] i_wr_addr,
+    input logic [31:0] i_wr_data
 );
 
   logic [ 7:0] mem        [SIZE];
@@ -49,16 +59,22 @@ module insnmem #(
   logic [ 1:0] align_bits;
   assign align_bits = i_pc[1:0];
 
+`ifndef SYNTHESIS
   string filename;
 
+  // bytes outside the preloaded range read as zero
   initial begin
+    foreach (mem[i]) mem[i] = '0;
     if ($value$plusargs("IMEM_PRELOAD_FILE=%s", filename)) begin
-      $readmemh(filename, mem);
+      if (PRELOAD_SIZE == 0) begin
+        $readmemh(filename, mem, PRELOAD_OFFSET);
+      end else begin
+        $readmemh(filename, mem, PRELOAD_OFFSET, PRELOAD_OFFSET + PRELOAD_SIZE - 1);
+      end
       $display("Loaded memory from %s", filename);
-    end else begin
-      foreach (mem[i]) mem[i] = '0;
     end
   end
+`endif
 
   always_comb begin : imem_controller
     if (align_bits == 2'b0) begin
@@ -78,6 +94,12 @@ module insnmem #(
     end
   end
 
+  always_ff @(posedge i_clk) begin : load_insn
+    if (i_wr_en) begin
+      {mem[i_wr_addr+3], mem[i_wr_addr+2], mem[i_wr_addr+1], mem[i_wr_addr]} <= i_wr_data;
+    end
+  end
+
   assign o_insn = next_insn;
 
 endmodule
@@ -0,0 +1,169 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : insnmem_word
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   Instruction memory organised as 32-bit words, a drop-in replacement for insnmem
+//   One array element is read per fetch, which maps straight onto iCE40 block RAM, where
+//   insnmem reads four bytes. The fetch port, load port, exception and preload behave as in
+//   insnmem: the instruction at i_pc is out the cycle after, NOP out of reset.
+//
+//   With PREFETCH the array holds lines of two words. A fetch reads the whole line, so the
+//   next word is already in the output register when fetch moves on to it, and the RAM is
+//   not read at all for that fetch. Straight-line code reads the RAM every other cycle.
+//   A load into the line being fetched from makes the next fetch read the RAM again.
+//
+//   With SPRAM the load port and the fetch port share one address, the single port iCE40
+//   SPRAM has, so that synth_ice40 -spram can map the array onto it. A load then takes the
+//   port for its cycle and the fetch in that cycle returns stale data. Hold the core in
+//   reset while loading.
+//
+// Parameters:
+//   SIZE - Memory size in bytes (default: 4096)
+//   PRELOAD_OFFSET - First byte +IMEM_PRELOAD_FILE is loaded at (default: 0)
+//   PRELOAD_SIZE - Bytes loaded from +IMEM_PRELOAD_FILE, 0 for the whole file
+//   PREFETCH - Read lines of two words, serving the second from the output register (0/1)
+//   SPRAM - Share one address between the load and fetch ports (0/1)
+`include "cpu_types.vh"
+
+module insnmem_word #(
+    parameter int SIZE = 4096,
+    parameter int PRELOAD_OFFSET = 0,
+    parameter int PRELOAD_SIZE = 0,
+    parameter int PREFETCH = 0,
+    parameter int SPRAM = 0
+) (
+    input  logic         i_clk,
+    input  logic         i_rst_n,
+    input  logic  [31:0] i_pc,
+    output insn_t        o_insn,
+    output logic         o_imem_exception,
+
+    // program load, a word aligned word per cycle
+    input logic        i_wr_en,
+    input logic [31:0] i_wr_addr,
+    input logic [31:0] i_wr_data
+);
+
+  localparam int LineWords = PREFETCH != 0 ? 2 : 1;
+  localparam int Lines = SIZE / (4 * LineWords);
+  localparam int LineBits = $clog2(Lines);
+  localparam int WordBits = $clog2(LineWords);
+
+  logic [32*LineWords-1:0] mem                                                     [Lines];
+
+  logic [    LineBits-1:0] rd_line;
+  logic [    LineBits-1:0] wr_line;
+  logic                    rd_word;  // word in the line, always 0 without PREFETCH
+  logic                    wr_word;
+  logic                    rd_en;
+  logic                    wr_en;
+
+  logic [32*LineWords-1:0] line_q;  // RAM output register
+  logic [    LineBits-1:0] line_addr_q;  // line held in line_q
+  logic                    line_valid_q;
+  logic                    word_q;  // word of line_q to output
+  logic                    fetched_q;  // NOP until the first fetch out of reset
+
+  logic [            31:0] addr;
+  logic [             1:0] align_bits;
+  assign align_bits = i_pc[1:0];
+
+`ifndef SYNTHESIS
+  string       filename;
+  logic  [7:0] preload  [SIZE];
+
+  // bytes outside the preloaded range read as zero
+  initial begin
+    foreach (preload[i]) preload[i] = '0;
+    if ($value$plusargs("IMEM_PRELOAD_FILE=%s", filename)) begin
+      if (PRELOAD_SIZE == 0) begin
+        $readmemh(filename, preload, PRELOAD_OFFSET);
+      end else begin
+        $readmemh(filename, preload, PRELOAD_OFFSET, PRELOAD_OFFSET + PRELOAD_SIZE - 1);
+      end
+      $display("Loaded memory from %s", filename);
+    end
+    foreach (mem[i]) begin
+      for (int b = 0; b < 4 * LineWords; b++) begin
+        mem[i][8*b+:8] = preload[4*LineWords*i+b];
+      end
+    end
+  end
+`endif
+
+  always_comb begin : imem_controller
+    if (align_bits == 2'b0) begin
+      o_imem_exception = 1'b0;
+      addr             = i_pc;
+    end else begin
+      o_imem_exception = 1'b1;
+      addr             = '0;
+    end
+  end
+
+  assign rd_line = LineBits'(addr >> (2 + WordBits));
+  assign wr_line = LineBits'(i_wr_addr >> (2 + WordBits));
+  assign rd_word = PREFETCH != 0 && addr[2];
+  assign wr_word = PREFETCH != 0 && i_wr_addr[2];
+
+  // a single port RAM gives its port to the load
+  assign wr_en = i_wr_en;
+  assign rd_en = !(SPRAM != 0 && i_wr_en) &&
+      !(PREFETCH != 0 && line_valid_q && line_addr_q == rd_line);
+
+  always_ff @(posedge i_clk) begin : read_line
+    if (rd_en) begin
+      line_q <= mem[rd_line];
+    end
+  end
+
+  always_ff @(posedge i_clk) begin : load_insn
+    if (wr_en) begin
+      mem[wr_line][32*wr_word+:32] <= i_wr_data;
+    end
+  end
+
+  always_ff @(posedge i_clk or negedge i_rst_n) begin : fetch_insn
+    if (~i_rst_n) begin
+      line_addr_q  <= '0;
+      line_valid_q <= 1'b0;
+      word_q       <= 1'b0;
+      fetched_q    <= 1'b0;
+    end else begin
+      if (rd_en) begin
+        line_addr_q <= rd_line;
+      end
+      // the RAM reads the old line during a load into it
+      line_valid_q <= (rd_en || line_valid_q) &&
+          !(wr_en && wr_line == (rd_en ? rd_line : line_addr_q));
+      word_q <= rd_word;
+      fetched_q <= 1'b1;
+    end
+  end
+
+  assign o_insn = fetched_q ? line_q[32*word_q+:32] : 32'h00000013;  //  NOP
+
+endmodule
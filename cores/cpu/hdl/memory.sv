@@ -26,62 +26,132 @@
 //
 // Description:
 //   Data memory module for RISC-V processor
-//   Can be implemented as BRAM on FPGA for efficient synthesis
+//   Organised as 32-bit words with a write enable per byte lane, so it infers iCE40 block RAM
+//   (or SPRAM for large sizes with synth_ice40 -spram) rather than one LUT RAM per byte.
+//
+//   Loads and stores take the access size and signedness from funct3, as LB/LH/LW/LBU/LHU and
+//   SB/SH/SW encode them. A store writes its lanes in the cycle it is presented. A load reads
+//   the whole word into a register; the next cycle selects its lanes and sign or zero extends
+//   them. Read and write enables can both be set, the read then returns the word as it was
+//   before the write. Halfword and word accesses are aligned down to their size.
 //
 // Parameters:
+//   SIZE - Memory size in bytes, a multiple of 4 (default: 512)
 //   PRELOAD - Enable memory preloading (0/1)
-//   PRELOAD_FILE - Path to preload file
+//   PRELOAD_FILE - Path to preload file, one little-endian 32-bit word per entry
+//   PRELOAD_OFFSET - First byte the preload file is loaded at, a multiple of 4 (default: 0)
+//   PRELOAD_SIZE - Bytes loaded from the preload file, a multiple of 4 (default: 32)
 
 module memory #(
-    parameter PRELOAD = 0,
-    parameter PRELOAD_FILE = ""
+    parameter int SIZE = 512,
+    parameter int PRELOAD = 0,
+    parameter PRELOAD_FILE = "",
+    parameter int PRELOAD_OFFSET = 0,
+    parameter int PRELOAD_SIZE = 32
 ) (
-    input         i_rst_n,
-    input         i_clk,
-    input         i_ctrl_mem_rd_en,
-    input         i_ctrl_mem_wr_en,
-    input  [31:0] i_mem_addr,
-    input  [31:0] i_mem_wdata,
-    output [31:0] o_mem_rdata
+    input               i_rst_n,
+    input               i_clk,
+    input               i_ctrl_mem_rd_en,
+    input               i_ctrl_mem_wr_en,
+    input        [ 2:0] i_mem_funct3,      // access size and signedness
+    input        [31:0] i_mem_addr,
+    input        [31:0] i_mem_wdata,
+    output logic [31:0] o_mem_rdata
 );
 
-  localparam MEM_SIZE = 512;
+  localparam int Words = SIZE / 4;
+  localparam int IndexBits = $clog2(Words);
+
+  logic [         31:0] mem                                      [Words];
+
+  logic [IndexBits-1:0] index;
+  logic [          1:0] offset;  // first byte lane of the access
+  logic [          3:0] wr_lanes;
+  logic [         31:0] wr_data;
 
-  // 512 bytes, 128 words
-  logic   [ 7:0] mem        [MEM_SIZE - 1:0];
-  logic   [31:0] next_rdata;
+  // lane select and extension of the word being read, applied a cycle later
+  logic [         31:0] rd_word;
+  logic [          1:0] rd_offset;
+  logic [          2:0] rd_funct3;
+  logic [         31:0] rd_lanes;
 
-  integer        i;
+  generate
+    if (PRELOAD_OFFSET % 4 != 0 || PRELOAD_SIZE % 4 != 0) begin : gen_bad_preload
+      $fatal(1, "memory: PRELOAD_OFFSET and PRELOAD_SIZE must be multiples of 4");
+    end
+  endgenerate
 
+  // the file is read straight into the word array, so synthesis initialises the block RAM
+  // from it too; in simulation words outside the preloaded range read as zero
   initial begin
-    if (PRELOAD) begin
+`ifndef SYNTHESIS
+    foreach (mem[i]) mem[i] = '0;
+`endif
+    if (PRELOAD != 0) begin
       if (PRELOAD_FILE === "") begin
         $display("no preload file provided!");
         $finish;
       end
-      $readmemh(PRELOAD_FILE, mem, 0, 31);
+      $readmemh(PRELOAD_FILE, mem, PRELOAD_OFFSET / 4, (PRELOAD_OFFSET + PRELOAD_SIZE) / 4 - 1);
     end
   end
 
-  always @(posedge i_clk or negedge i_rst_n) begin
-    if (~i_rst_n) begin
-`ifdef FPGA
-      for (i = 0; i < MEM_SIZE; i++) begin
-        mem[i] <= 0;
+  assign index = i_mem_addr[IndexBits+1:2];
+
+  always_comb begin : store_lanes
+    case (i_mem_funct3[1:0])
+      2'b00: begin  // sb
+        offset   = i_mem_addr[1:0];
+        wr_lanes = 4'b0001 << offset;
+        wr_data  = {4{i_mem_wdata[7:0]}};
       end
-`endif
-      next_rdata <= 0;
-    end else begin
-      if (i_ctrl_mem_rd_en) begin
-        next_rdata <= {mem[i_mem_addr+3], mem[i_mem_addr+2], mem[i_mem_addr+1], mem[i_mem_addr]};
-      end else if (i_ctrl_mem_wr_en) begin
-        for (i = 0; i < 4; i++) begin
-          mem[i_mem_addr+i] <= i_mem_wdata[i*8+:8];
-        end
+      2'b01: begin  // sh
+        offset   = {i_mem_addr[1], 1'b0};
+        wr_lanes = 4'b0011 << offset;
+        wr_data  = {2{i_mem_wdata[15:0]}};
+      end
+      default: begin  // sw
+        offset   = 2'b00;
+        wr_lanes = 4'b1111;
+        wr_data  = i_mem_wdata;
       end
+    endcase
+  end
+
+  always_ff @(posedge i_clk) begin : write_word
+    if (i_ctrl_mem_wr_en) begin
+      for (int lane = 0; lane < 4; lane++) begin
+        if (wr_lanes[lane]) mem[index][lane*8+:8] <= wr_data[lane*8+:8];
+      end
+    end
+  end
+
+  always_ff @(posedge i_clk) begin : read_word
+    if (i_ctrl_mem_rd_en) begin
+      rd_word <= mem[index];
+    end
+  end
+
+  always_ff @(posedge i_clk or negedge i_rst_n) begin : read_select
+    if (~i_rst_n) begin
+      rd_offset <= '0;
+      rd_funct3 <= 3'b010;  // lw
+    end else if (i_ctrl_mem_rd_en) begin
+      rd_offset <= offset;
+      rd_funct3 <= i_mem_funct3;
     end
   end
 
-  assign o_mem_rdata = next_rdata;
+  assign rd_lanes = rd_word >> {rd_offset, 3'b000};
+
+  always_comb begin : load_extend
+    case (rd_funct3)
+      3'b000:  o_mem_rdata = {{24{rd_lanes[7]}}, rd_lanes[7:0]};  // lb
+      3'b001:  o_mem_rdata = {{16{rd_lanes[15]}}, rd_lanes[15:0]};  // lh
+      3'b100:  o_mem_rdata = {24'b0, rd_lanes[7:0]};  // lbu
+      3'b101:  o_mem_rdata = {16'b0, rd_lanes[15:0]};  // lhu
+      default: o_mem_rdata = rd_word;  // lw
+    endcase
+  end
 
 endmodule
@@ -0,0 +1,95 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : perf_counters
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   Hardware performance counters for the cpu_core pipeline, named after the RISC-V
+//   machine counter CSRs they model:
+//     mcycle       (0xB00) - clock cycles since reset
+//     minstret     (0xB02) - instructions retired from WB
+//     mhpmcounter3 (0xB03) - cycles stalled on a RAW hazard that is not forwarded
+//     mhpmcounter4 (0xB04) - cycles stalled on a load-use hazard
+//     mhpmcounter5 (0xB05) - pipeline flushes
+//     mhpmcounter6 (0xB06) - source operands taken from the forwarding unit
+//   Counters are free running and not yet readable with csrr, testbenches sample them
+//   hierarchically (see tb_utils.read_perf_counters).
+//
+// Parameters:
+//   WIDTH - Counter width in bits (default: 64)
+
+module perf_counters #(
+    parameter int WIDTH = 64
+) (
+    input logic i_clk,
+    input logic i_rst_n,
+
+    // Events, sampled every cycle
+    input logic       i_retire,          // Instruction leaves WB
+    input logic       i_stall_raw,       // IF/ID held for a RAW hazard
+    input logic       i_stall_load_use,  // IF/ID held for a load-use hazard
+    input logic       i_flush,           // Fetched instructions discarded
+    input logic [1:0] i_forward,         // rs1/rs2 forwarded into EX
+
+    output logic [WIDTH-1:0] o_mcycle,
+    output logic [WIDTH-1:0] o_minstret,
+    output logic [WIDTH-1:0] o_mhpmcounter3,
+    output logic [WIDTH-1:0] o_mhpmcounter4,
+    output logic [WIDTH-1:0] o_mhpmcounter5,
+    output logic [WIDTH-1:0] o_mhpmcounter6
+);
+
+  logic [WIDTH-1:0] mcycle;
+  logic [WIDTH-1:0] minstret;
+  logic [WIDTH-1:0] mhpmcounter3;
+  logic [WIDTH-1:0] mhpmcounter4;
+  logic [WIDTH-1:0] mhpmcounter5;
+  logic [WIDTH-1:0] mhpmcounter6;
+
+  always_ff @(posedge i_clk or negedge i_rst_n) begin
+    if (~i_rst_n) begin
+      mcycle       <= '0;
+      minstret     <= '0;
+      mhpmcounter3 <= '0;
+      mhpmcounter4 <= '0;
+      mhpmcounter5 <= '0;
+      mhpmcounter6 <= '0;
+    end else begin
+      mcycle       <= mcycle + 1'b1;
+      minstret     <= minstret + WIDTH'(i_retire);
+      mhpmcounter3 <= mhpmcounter3 + WIDTH'(i_stall_raw);
+      mhpmcounter4 <= mhpmcounter4 + WIDTH'(i_stall_load_use);
+      mhpmcounter5 <= mhpmcounter5 + WIDTH'(i_flush);
+      mhpmcounter6 <= mhpmcounter6 + WIDTH'(i_forward[0]) + WIDTH'(i_forward[1]);
+    end
+  end
+
+  assign o_mcycle       = mcycle;
+  assign o_minstret     = minstret;
+  assign o_mhpmcounter3 = mhpmcounter3;
+  assign o_mhpmcounter4 = mhpmcounter4;
+  assign o_mhpmcounter5 = mhpmcounter5;
+  assign o_mhpmcounter6 = mhpmcounter6;
+
+endmodule
@@ -43,7 +43,7 @@ module p1p2 (
 
   always_ff @(posedge i_clk or negedge i_rst_n) begin
     if (~i_rst_n) begin
-      p1p2_next <= '{pc: '0, pc_plus_4: '0};
+      p1p2_next <= '{valid: '0, pc: '0, pc_plus_4: '0};
     end else begin
       p1p2_next <= i_p1p2;
     end
@@ -44,10 +44,9 @@ module p2p3 (
   always_ff @(posedge i_clk or negedge i_rst_n) begin
     if (~i_rst_n) begin
       p2p3_next <= '{
+          valid: '0,
           pc: '0,
           pc_plus_4: '0,
-          reg_rd_data1: '0,
-          reg_rd_data2: '0,
           ctrl: '0,
           insn: 32'h00000013  // NOP
       };
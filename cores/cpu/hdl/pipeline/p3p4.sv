@@ -44,6 +44,7 @@ module p3p4 (
   always @(posedge i_clk or negedge i_rst_n) begin
     if (~i_rst_n) begin
       p3p4_next <= '{
+          valid: '0,
           pc_next: '0,
           reg_rd_data2: '0,
           ctrl: '0,
@@ -44,6 +44,7 @@ module p4p5 (
   always @(posedge i_clk or negedge i_rst_n) begin
     if (~i_rst_n) begin
       p4p5_next <= '{
+          valid: '0,
           reg_wr_data: '0,
           ctrl: '0,
           insn: 32'h00000013  // NOP
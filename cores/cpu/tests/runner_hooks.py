@@ -0,0 +1,93 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+pytest hooks shared by all cocotb runners
+
+Registered from each core's conftest.py so that parallel (pytest-xdist) runs
+report build cache statistics and merge per-worker JUnit results once, and so
+every runner simulates with the one picked by --sim.
+"""
+
+import os
+import sys
+import time
+
+from tb_coverage import coverage_summary
+from tb_utils import (
+    SIMULATORS,
+    build_cache_summary,
+    get_build_root,
+    merge_results,
+    get_sim,
+    perf_summary,
+    save_build_cache_stats,
+)
+
+SESSION_START = time.time()
+
+
+def is_worker(config) -> bool:
+    """True when running inside a pytest-xdist worker"""
+    return hasattr(config, "workerinput")
+
+
+def pytest_sessionstart(session) -> None:
+    global SESSION_START
+    SESSION_START = time.time()
+
+
+def pytest_sessionfinish(session) -> None:
+    save_build_cache_stats()
+    if not is_worker(session.config):
+        merge_results(get_build_root() / "results.xml", since=SESSION_START)
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    terminalreporter.write_line(f"simulator: {get_sim()}")
+    terminalreporter.write_line(build_cache_summary(since=SESSION_START))
+    terminalreporter.write_line(f"merged results: {get_build_root() / 'results.xml'}")
+    if summary := perf_summary(since=SESSION_START):
+        terminalreporter.write_sep("-", "performance counters")
+        terminalreporter.write_line(summary)
+    if summary := coverage_summary(since=SESSION_START):
+        terminalreporter.write_sep("-", "functional coverage")
+        terminalreporter.write_line(summary)
+
+
+def add_options(parser) -> None:
+    """Add --sim, from the repository conftest.py so it parses for any path"""
+    parser.addoption(
+        "--sim",
+        choices=SIMULATORS,
+        help=f"simulator for the cocotb runners (default: $SIM or {SIMULATORS[0]})",
+    )
+
+
+def register(config) -> None:
+    """Register these hooks once, however many conftests ask for them"""
+    # runners read the simulator from the environment, which workers inherit
+    if sim := config.getoption("sim", None):
+        os.environ["SIM"] = sim
+    get_sim()  # fail early on a bad $SIM
+    if not config.pluginmanager.has_plugin(__name__):
+        config.pluginmanager.register(sys.modules[__name__], __name__)
@@ -0,0 +1,292 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Functional coverage of the cpu_core hazard and forwarding paths
+
+CoreCoverage samples the pipeline once per clock into covergroups, each a
+fixed list of bins with a preallocated array of counters, so sampling is a few
+signal reads and index increments per cycle:
+
+    opcode_funct3  instruction entering EX, by opcode and funct3
+    forward_rs1    where EX took rs1 from: regfile, the writeback bypass, or
+    forward_rs2    the EX/MEM or MEM/WB registers (forwarding techniques only)
+    forward_store  the same for store data
+    stall          stall cause or flush in each cycle
+    branch         branch outcomes as they resolve in EX, and jumps
+
+Each test saves its counts to `<name>.cov.json` in its results directory.
+coverage_summary() merges every run of the session into one report, lists the
+bins nothing hit and the runs that hit no bin another run had not already, so
+redundant seeds can be dropped. Run this file on saved counts to merge them
+from separate sessions.
+"""
+
+import argparse
+import json
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+
+import cocotb
+from cocotb.triggers import ReadOnly, RisingEdge
+from tb_utils import SignalBank, get_build_root
+
+from rv32i import (
+    INSN_TABLE,
+    OP_AUIPC,
+    OP_BRANCH,
+    OP_JAL,
+    OP_JALR,
+    OP_LUI,
+    OP_RTYPE,
+    OP_STORE,
+)
+
+COVERAGE_SUFFIX = ".cov.json"
+
+# forward_src_t in forwarding_unit.sv, with the regfile source split by whether
+# cpu_core's writeback bypass supplied the value
+FORWARD_BINS = ["regfile", "wb_bypass", "ex_mem", "mem_wb"]
+FWD_BYPASS = 1
+STALL_BINS = ["none", "raw", "load_use", "flush"]
+
+
+class Covergroup:
+    """A fixed set of named bins and their hit counts"""
+
+    def __init__(self, name: str, bins: Iterable[str]) -> None:
+        self.name = name
+        self.bins = list(bins)
+        self.counts = array("Q", bytes(8 * len(self.bins)))
+
+    def to_dict(self) -> dict[str, int]:
+        return dict(zip(self.bins, self.counts))
+
+
+def _opcode_funct3_bins() -> tuple[list[str], array]:
+    """Bins named after the mnemonics sharing each (opcode, funct3), and a
+    lookup from (opcode << 3 | funct3) to the bin, -1 where nothing decodes"""
+    names: dict[tuple[int, int | None], list[str]] = {}
+    for (opcode, funct3, _), (name, _) in INSN_TABLE.items():
+        names.setdefault((opcode, funct3), []).append(name or "system")
+    bins = ["/".join(n) for n in names.values()]
+    index = array("b", [-1] * (1 << 10))
+    for i, (opcode, funct3) in enumerate(names):
+        for f in range(8) if funct3 is None else [funct3]:
+            index[opcode << 3 | f] = i
+    return bins, index
+
+
+OPCODE_FUNCT3_BINS, OPCODE_FUNCT3_INDEX = _opcode_funct3_bins()
+BRANCH_NAMES = {
+    funct3: name for (op, funct3, _), (name, _) in INSN_TABLE.items() if op == OP_BRANCH
+}
+BRANCH_BINS = [
+    f"{name}_{outcome}"
+    for name in BRANCH_NAMES.values()
+    for outcome in ("taken", "not_taken")
+] + ["jal", "jalr"]
+# taken bin of each branch funct3, -1 for the two that do not decode
+BRANCH_INDEX = [
+    2 * list(BRANCH_NAMES).index(f) if f in BRANCH_NAMES else -1 for f in range(8)
+]
+
+
+class CoreCoverage:
+    """Samples cpu_core into the covergroups above once per cycle"""
+
+    def __init__(self, dut) -> None:
+        self.dut = dut
+        self.groups = {
+            "opcode_funct3": Covergroup("opcode_funct3", OPCODE_FUNCT3_BINS),
+            "forward_rs1": Covergroup("forward_rs1", FORWARD_BINS),
+            "forward_rs2": Covergroup("forward_rs2", FORWARD_BINS),
+            "forward_store": Covergroup("forward_store", FORWARD_BINS),
+            "stall": Covergroup("stall", STALL_BINS),
+            "branch": Covergroup("branch", BRANCH_BINS),
+        }
+        self.cycles = 0
+        self._task = None
+
+    def start(self) -> None:
+        self._task = cocotb.start_soon(self._monitor())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _monitor(self) -> None:
+        signals = SignalBank.of(self.dut)
+        # valid leads the pipeline register structs and insn ends them, see
+        # cpu_types.vh
+        ex_stage = signals.getter("p2p3_q")
+        ex_valid = len(signals["p2p3_q"]) - 1
+        branch_taken = signals.getter("p3_branch_taken")
+        forwarding = signals.getter("enable_forwarding")
+        rs1_src = signals.getter("forwarding_u.forward_rs1_src")
+        rs2_src = signals.getter("forwarding_u.forward_rs2_src")
+        store_src = signals.getter("forwarding_u.forward_store_src")
+        bypass_en = signals.getter("wb_bypass_en")
+        bypass_rd = signals.getter("wb_bypass_rd")
+        stall_raw = signals.getter("stall_raw")
+        stall_load_use = signals.getter("stall_load_use")
+        flush = signals.getter("flush_branch")
+
+        opcode_funct3 = self.groups["opcode_funct3"].counts
+        fwd_rs1 = self.groups["forward_rs1"].counts
+        fwd_rs2 = self.groups["forward_rs2"].counts
+        fwd_store = self.groups["forward_store"].counts
+        stall = self.groups["stall"].counts
+        branch = self.groups["branch"].counts
+        jal, jalr = BRANCH_BINS.index("jal"), BRANCH_BINS.index("jalr")
+
+        def source(src: int, rs: int) -> int:
+            if src == 0 and bypass_en() and rs and bypass_rd() == rs:
+                return FWD_BYPASS
+            return src + 1 if src else 0
+
+        edge = RisingEdge(self.dut.i_clk)
+        while True:
+            await edge
+            await ReadOnly()
+            self.cycles += 1
+
+            if flush():
+                stall[3] += 1
+            elif stall_load_use():
+                stall[2] += 1
+            elif stall_raw():
+                stall[1] += 1
+            else:
+                stall[0] += 1
+
+            stage = ex_stage()
+            if stage >> ex_valid:
+                insn = stage & 0xFFFFFFFF
+                opcode, funct3 = insn & 0x7F, (insn >> 12) & 0x7
+                i = OPCODE_FUNCT3_INDEX[opcode << 3 | funct3]
+                if i >= 0:
+                    opcode_funct3[i] += 1
+                if forwarding():
+                    rs1, rs2 = (insn >> 15) & 0x1F, (insn >> 20) & 0x1F
+                    if opcode not in (OP_LUI, OP_AUIPC, OP_JAL):  # no rs1
+                        fwd_rs1[source(rs1_src(), rs1)] += 1
+                    if opcode == OP_STORE:
+                        fwd_store[source(store_src(), rs2)] += 1
+                    elif opcode in (OP_RTYPE, OP_BRANCH):
+                        fwd_rs2[source(rs2_src(), rs2)] += 1
+                if opcode == OP_BRANCH:
+                    i = BRANCH_INDEX[funct3]
+                    if i >= 0:
+                        branch[i + (not branch_taken())] += 1
+                elif opcode == OP_JAL:
+                    branch[jal] += 1
+                elif opcode == OP_JALR:
+                    branch[jalr] += 1
+
+    def to_dict(self) -> dict[str, dict[str, int]]:
+        return {name: group.to_dict() for name, group in self.groups.items()}
+
+    def save(self, name: str) -> Path:
+        """Save the counts to `<name>.cov.json` in the simulator's working directory"""
+        path = Path(f"{name}{COVERAGE_SUFFIX}")
+        path.write_text(json.dumps(self.to_dict()))
+        return path
+
+
+def merge_coverage(records: Iterable[dict]) -> dict[str, dict[str, int]]:
+    """Sum the counts of several runs, bin by bin"""
+    merged: dict[str, dict[str, int]] = {}
+    for record in records:
+        for group, bins in record.items():
+            totals = merged.setdefault(group, {})
+            for name, count in bins.items():
+                totals[name] = totals.get(name, 0) + count
+    return merged
+
+
+def redundant_runs(runs: dict[str, dict]) -> list[str]:
+    """Runs that hit no bin the others did not, picked greedily
+
+    Runs are taken in order of the new bins each adds, the ones left once
+    nothing more is added could be dropped without losing any coverage.
+    """
+    hits = {
+        run: {(g, b) for g, bins in record.items() for b, n in bins.items() if n}
+        for run, record in runs.items()
+    }
+    covered: set = set()
+    left = dict(hits)
+    while left:
+        run, bins = max(left.items(), key=lambda item: len(item[1] - covered))
+        if not bins - covered:
+            break
+        covered |= bins
+        del left[run]
+    return sorted(left)
+
+
+def format_coverage(merged: dict[str, dict[str, int]], redundant=()) -> str:
+    """One line per covergroup with its hit rate and the bins never hit"""
+    width = max(map(len, merged), default=0)
+    lines = []
+    for group, bins in merged.items():
+        holes = [name for name, count in bins.items() if not count]
+        hit = len(bins) - len(holes)
+        line = (
+            f"{group:<{width}}  {hit:>3}/{len(bins):<3} {100 * hit / len(bins):5.1f}%"
+        )
+        if holes:
+            line += "  holes: " + " ".join(holes)
+        lines.append(line)
+    if redundant:
+        lines.append(f"runs adding no coverage: {' '.join(redundant)}")
+    return "\n".join(lines)
+
+
+def coverage_summary(since: float = 0.0) -> str:
+    """Merge the coverage saved by every worker since `since` into one report"""
+    runs = {}
+    for path in (get_build_root() / "results").glob(f"*/*{COVERAGE_SUFFIX}"):
+        if path.stat().st_mtime >= since:
+            runs[path.name.removesuffix(COVERAGE_SUFFIX)] = json.loads(path.read_text())
+    if not runs:
+        return ""
+    return format_coverage(merge_coverage(runs.values()), redundant_runs(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge saved cpu_core coverage")
+    parser.add_argument("files", nargs="+", type=Path, help=f"*{COVERAGE_SUFFIX} files")
+    args = parser.parse_args()
+
+    runs = {
+        path.name.removesuffix(COVERAGE_SUFFIX): json.loads(path.read_text())
+        for path in args.files
+    }
+    print(format_coverage(merge_coverage(runs.values()), redundant_runs(runs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,10 +24,68 @@
 Shared cocotb testbench utilities for CPU core tests
 """
 
+import fcntl
+import hashlib
+import json
+import logging
 import os
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+from collections import Counter, deque
+from collections.abc import Callable, Sequence
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
+
+import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import ClockCycles
+from cocotb.handle import HierarchyObject, LogicArrayObject, LogicObject
+from cocotb.triggers import ClockCycles, ReadOnly, RisingEdge
+from cocotb.utils import get_sim_time
+from cocotb_tools.runner import Icarus, Runner, get_runner
+
+# SignalBank and MemoryBackdoor go straight to the GPI through cocotb internals
+# written against 2.0; any other release falls back to the public handle API
+try:
+    from cocotb.handle import _GPISetAction, _schedule_write
+except ImportError:
+    _GPISetAction = _schedule_write = None
+_RAW_GPI = _schedule_write is not None and cocotb.__version__.startswith("2.0")
+
+HEADER_SUFFIXES = (".vh", ".svh")
+BUILD_STAMP = "build.json"
+BUILD_CACHE_FILE = "build_cache.json"
+BUILD_CACHE_STATS: Counter[str] = Counter()
+PERF_SUFFIX = ".perf.json"
+
+# simulators the runners support, the first is the default
+SIMULATORS = ("icarus", "verilator")
+# build arguments every design needs under a simulator: the cores trip Verilator
+# width lint warnings, and testbench harnesses use delays
+SIM_BUILD_ARGS = {"verilator": ["-Wno-fatal", "--timing"]}
+
+# cpu_core performance counters, by the CSR each one models (see perf_counters.sv)
+PERF_COUNTERS = {
+    "cycles": "perf_u.mcycle",
+    "retired": "perf_u.minstret",
+    "stall_raw": "perf_u.mhpmcounter3",
+    "stall_load_use": "perf_u.mhpmcounter4",
+    "flushes": "perf_u.mhpmcounter5",
+    "forwards": "perf_u.mhpmcounter6",
+}
+# instruction cache counters, when cpu_core is built with ICACHE (see icache.sv)
+ICACHE_COUNTERS = {
+    "icache_hits": "gen_icache.icache_u.o_hits",
+    "icache_misses": "gen_icache.icache_u.o_misses",
+}
+
+# X and Z bits read back as 0 through SignalBank
+_XZ_TO_ZERO = str.maketrans("xXzZuUwW-", "000000000")
+# the four VCD values, the other nine-valued states dumped as x
+_VCD_BITS = str.maketrans("XZUWLH-uwlh", "xzxx01xxx01")
+
+log = logging.getLogger(__name__)
 
 
 def get_env_dir_safe(var: str) -> Path:
@@ -42,6 +100,10 @@ def get_hdl_root() -> Path:
     return get_env_dir_safe("CPU_ROOT") / "hdl"
 
 
+# the golden model and instruction helpers live in tools/
+sys.path.append(str(get_env_dir_safe("TOOLS_ROOT")))
+
+
 async def reset_dut(dut) -> None:
     """Standard reset sequence for DUTs"""
     dut.i_rst_n.value = 1
@@ -67,23 +129,780 @@ async def tb_init_base(dut, init_func=None) -> Clock:
     return clock
 
 
-def get_hex_instructions(hex_path: str) -> list[int]:
-    """Reads the hex file and returns expected instructions"""
+class SignalBank:
+    """Cached signal handles for one DUT, read and written as plain ints
+
+    Looking up `dut.<name>` and building a LogicArray on every access dominates
+    tight testbench loops. A bank resolves each signal once and goes straight to
+    the GPI handle: reads return ints without any LogicArray in between and
+    writes are scheduled exactly like `handle.value = ...`. getter() and read()
+    return X and Z bits as 0, so they are for sampling loops; get() raises on
+    them, and checking assertions should compare `handle.value` anyway.
+    """
+
+    _banks: dict[int, "SignalBank"] = {}
+
+    def __init__(self, dut) -> None:
+        self.dut = dut
+        self.handles = {}
+        self._getters = {}
+        self._setters = {}
+        self._batches = {}
+
+    @classmethod
+    def of(cls, dut) -> "SignalBank":
+        """Get the bank for a DUT, shared by every helper in the test"""
+        bank = cls._banks.get(id(dut))
+        if bank is None or bank.dut is not dut:
+            bank = cls._banks[id(dut)] = cls(dut)
+        return bank
+
+    def __getitem__(self, name: str):
+        handle = self.handles.get(name)
+        if handle is None:
+            handle = self.dut
+            for part in name.split("."):
+                handle = getattr(handle, part)
+            self.handles[name] = handle
+            self._bind(name, handle)
+        return handle
+
+    def _bind(self, name: str, handle) -> None:
+        width = len(handle)
+        mask = (1 << width) - 1
+        gpi = getattr(handle, "_handle", None)
+        if not _RAW_GPI or gpi is None:
+            self._getters[name] = partial(_read_int, handle)
+            self._setters[name] = lambda value: handle.set(value & mask)
+        elif width <= 32:
+            get_long = gpi.get_signal_val_long
+            self._getters[name] = lambda: get_long() & mask
+            set_int = partial(
+                _schedule_write, handle, gpi.set_signal_val_int, _GPISetAction.DEPOSIT
+            )
+            self._setters[name] = lambda value: set_int(value & mask)
+        else:
+            get_binstr = gpi.get_signal_val_binstr
+            self._getters[name] = lambda: int(get_binstr().translate(_XZ_TO_ZERO), 2)
+            set_binstr = partial(
+                _schedule_write,
+                handle,
+                gpi.set_signal_val_binstr,
+                _GPISetAction.DEPOSIT,
+            )
+            self._setters[name] = lambda value: set_binstr(
+                format(value & mask, f"0{width}b")
+            )
+
+    def getter(self, name: str) -> Callable[[], int]:
+        """Get a callable returning the signal as an unsigned int, for hot loops"""
+        if name not in self._getters:
+            self[name]
+        return self._getters[name]
+
+    def binstr_getter(self, name: str) -> Callable[[], str]:
+        """Get a callable returning the signal as a bit string, X and Z included"""
+        handle = self[name]
+        gpi = getattr(handle, "_handle", None)
+        if _RAW_GPI and gpi is not None:
+            return gpi.get_signal_val_binstr
+        return lambda: str(handle.value)
+
+    def setter(self, name: str) -> Callable[[int], None]:
+        """Get a callable writing an int to the signal, for hot loops"""
+        if name not in self._setters:
+            self[name]
+        return self._setters[name]
+
+    def get(self, name: str) -> int:
+        """Read one signal as an unsigned int, raising ValueError on X or Z bits"""
+        return self[name].value.to_unsigned()
+
+    def set(self, name: str, value: int) -> None:
+        """Write an int to one signal"""
+        self.setter(name)(value)
+
+    def read(self, *names: str) -> list[int]:
+        """Read several signals in one call"""
+        getters = self._batches.get(names)
+        if getters is None:
+            getters = self._batches[names] = [self.getter(name) for name in names]
+        return [get() for get in getters]
+
+    def write(self, **values: int) -> None:
+        """Write several signals in one call"""
+        for name, value in values.items():
+            self.setter(name)(value)
+
+
+def _read_int(handle) -> int:
+    return int(str(handle.value).translate(_XZ_TO_ZERO), 2)
+
+
+def _binstr_to_int(get_binstr: Callable[[], str]) -> int:
+    return int(get_binstr().translate(_XZ_TO_ZERO), 2)
+
+
+def _int_to_binstr(set_binstr: Callable[[str], None], bits: int, value: int) -> None:
+    set_binstr(format(value, f"0{bits}b"))
+
+
+class MemoryBackdoor:
+    """Whole-array reads and writes of a memory, without the design
+
+    insnmem and memory are otherwise only loaded at time zero, from a plusarg
+    or parameter, so a new program means a new simulation. The backdoor
+    resolves the handle of every element once and then reads and writes them
+    straight through the GPI rather than scheduling each write. Nothing waits on
+    a clock, so programs can be swapped between runs in one simulation. Hold the
+    core in reset while doing so. Writes are in place by the next clock edge,
+    though Verilator only applies them once the simulator runs again, so read
+    them back after a trigger.
+
+    Elements may be bytes or little-endian words of any width. Addresses and lengths are
+    always in bytes; a write that covers part of a word reads the rest of it
+    back first.
+    """
+
+    def __init__(self, array) -> None:
+        self.array = array
+        self.width = len(array[0]) // 8  # bytes per element
+        self.size = len(array) * self.width
+        self._mask = (1 << 8 * self.width) - 1
+        elements = [array[i] for i in range(len(array))]
+        if not _RAW_GPI:
+            self._get = [partial(_read_int, element) for element in elements]
+            self._set = [element.setimmediatevalue for element in elements]
+            return
+        handles = [element._handle for element in elements]
+        if self.width <= 4:
+            self._get = [gpi.get_signal_val_long for gpi in handles]
+            self._set = [
+                partial(gpi.set_signal_val_int, _GPISetAction.DEPOSIT)
+                for gpi in handles
+            ]
+        else:
+            # wider than the GPI's int, such as the two-word lines of insnmem_word
+            bits = 8 * self.width
+            self._get = [
+                partial(_binstr_to_int, gpi.get_signal_val_binstr) for gpi in handles
+            ]
+            self._set = [
+                partial(
+                    _int_to_binstr,
+                    partial(gpi.set_signal_val_binstr, _GPISetAction.DEPOSIT),
+                    bits,
+                )
+                for gpi in handles
+            ]
+
+    def _check(self, address: int, length: int) -> None:
+        if address < 0 or address + length > self.size:
+            raise IndexError(
+                f"{length} bytes at 0x{address:x} do not fit {self.size} bytes of memory"
+            )
+
+    def write(self, address: int, data: bytes) -> None:
+        """Write bytes starting at `address`"""
+        self._check(address, len(data))
+        width = self.width
+        if width == 1:
+            for setter, byte in zip(self._set[address : address + len(data)], data):
+                setter(byte)
+            return
+        first = address // width
+        end = -(-(address + len(data)) // width)
+        start = address - first * width
+        if start or (address + len(data)) % width:
+            buffer = bytearray(self.read(first * width, (end - first) * width))
+            buffer[start : start + len(data)] = data
+            data = buffer
+        for setter, i in zip(self._set[first:end], range(0, len(data), width)):
+            setter(int.from_bytes(data[i : i + width], "little"))
+
+    def read(self, address: int = 0, length: int | None = None) -> bytes:
+        """Read `length` bytes starting at `address`, to the end by default"""
+        length = self.size - address if length is None else length
+        self._check(address, length)
+        width, mask = self.width, self._mask
+        if width == 1:
+            return bytes(get() & 0xFF for get in self._get[address : address + length])
+        first = address // width
+        end = -(-(address + length) // width)
+        data = b"".join(
+            (get() & mask).to_bytes(width, "little") for get in self._get[first:end]
+        )
+        start = address - first * width
+        return data[start : start + length]
+
+    def fill(self, value: int = 0, address: int = 0, length: int | None = None) -> None:
+        """Set a range of bytes, the whole memory by default"""
+        length = self.size - address if length is None else length
+        self.write(address, bytes([value]) * length)
+
+    def write_words(self, words: Sequence[int], address: int = 0) -> None:
+        """Write little-endian words starting at `address`"""
+        self.write(address, array("I", words).tobytes())
+
+    def read_words(self, address: int = 0, count: int | None = None) -> list[int]:
+        """Read `count` little-endian words starting at `address`"""
+        length = None if count is None else 4 * count
+        data = self.read(address, length)
+        return array("I", data[: len(data) & ~3]).tolist()
+
+
+def get_build_root() -> Path:
+    """Get the root directory for cached simulator builds"""
+    return Path(os.getenv("SIM_BUILD_ROOT", "sim_build")).resolve()
+
+
+def get_sim() -> str:
+    """Get the simulator runners use, from $SIM (set by pytest --sim)"""
+    sim = os.getenv("SIM", SIMULATORS[0]).lower()
+    if sim not in SIMULATORS:
+        raise ValueError(f"unsupported simulator {sim!r}, pick one of {SIMULATORS}")
+    return sim
+
+
+def get_sim_runner() -> Runner:
+    """Get a runner for the simulator chosen with $SIM or pytest --sim"""
+    return get_runner(get_sim())
+
+
+def build_key(runner: Runner, hdl_toplevel: str, sources, **build_opts) -> str:
+    """Hash everything that affects a simulator build into a short key"""
+    h = hashlib.sha256()
+    h.update(f"{type(runner).__name__}:{hdl_toplevel}:{cocotb.__version__}".encode())
+
+    for source in map(Path, sources):
+        h.update(source.name.encode())
+        h.update(source.read_bytes())
+
+    for include in map(Path, build_opts.get("includes", [])):
+        headers = sorted(p for p in include.iterdir() if p.suffix in HEADER_SUFFIXES)
+        for header in headers:
+            h.update(header.name.encode())
+            h.update(header.read_bytes())
+
+    # mirror the runner, which lets the WAVES env var override the argument
+    build_opts["waves"] = bool(os.getenv("WAVES", build_opts.get("waves", False)))
+    opts = {k: v for k, v in build_opts.items() if k != "includes"}
+    h.update(json.dumps(opts, sort_keys=True, default=str).encode())
+
+    return h.hexdigest()[:16]
+
+
+def build_cached(
+    runner: Runner,
+    hdl_toplevel: str,
+    sources: Sequence[os.PathLike | str],
+    build_root: os.PathLike | str | None = None,
+    **build_opts,
+) -> Path:
+    """Build the HDL sources, reusing an earlier build with identical inputs
+
+    The build directory is named after a hash of the sources, include headers,
+    parameters, defines, timescale and build arguments, so any change to them
+    gets a fresh build and everything else reuses the compiled simulation.
+    The arguments in SIM_BUILD_ARGS for the runner's simulator come first.
+    Returns the build directory, which `runner.test` will use.
+    """
+    build_root = Path(build_root) if build_root else get_build_root()
+    sim_args = SIM_BUILD_ARGS.get(type(runner).__name__.lower(), [])
+    build_opts["build_args"] = [*sim_args, *build_opts.get("build_args", [])]
+    key = build_key(runner, hdl_toplevel, sources, **build_opts)
+    build_dir = build_root / f"{hdl_toplevel}-{key}"
+    stamp = build_dir / BUILD_STAMP
+
+    # parallel workers may want the same build, only one of them compiles it
+    build_root.mkdir(parents=True, exist_ok=True)
+    with open(build_root / f"{build_dir.name}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        hit = stamp.is_file()
+        BUILD_CACHE_STATS["hit" if hit else "miss"] += 1
+        log.info("build cache %s: %s", "hit" if hit else "miss", build_dir.name)
+        # on a hit the runner's own up-to-date check skips the compile, and
+        # build() still sets up everything runner.test needs
+        runner.build(
+            hdl_toplevel=hdl_toplevel,
+            sources=sources,
+            build_dir=build_dir,
+            always=not hit,
+            **build_opts,
+        )
+        if hit:
+            return build_dir
+        stamp.write_text(
+            json.dumps(
+                {"hdl_toplevel": hdl_toplevel, "sources": list(map(str, sources))},
+                indent=2,
+            )
+        )
+
+    return build_dir
+
+
+def get_worker_id() -> str:
+    """Get the pytest-xdist worker name, or 'main' when not running in parallel"""
+    return os.getenv("PYTEST_XDIST_WORKER", "main")
+
+
+def get_results_dir() -> Path:
+    """Get the directory this worker runs simulations and writes results in"""
+    return get_build_root() / "results" / get_worker_id()
+
+
+def run_tests(runner: Runner, hdl_toplevel: str, test_module: str, **test_opts) -> Path:
+    """Run cocotb tests against the last build in this worker's results directory
+
+    Builds are shared between workers, so anything a simulation writes (JUnit
+    results, waves) goes to a per-worker directory instead of the build directory.
+    Returns the results file.
+    """
+    test_dir = get_results_dir()
+    test_dir.mkdir(parents=True, exist_ok=True)
+
+    plusargs = list(test_opts.pop("plusargs", []))
+    if isinstance(runner, Icarus):
+        # the dump module otherwise writes into the shared build directory
+        test_name = os.getenv("PYTEST_CURRENT_TEST", hdl_toplevel)
+        test_name = test_name.split(":")[-1].split(" ")[0]
+        plusargs.append(f"+dumpfile_path={test_dir / test_name}.fst")
+
+    return runner.test(
+        hdl_toplevel=hdl_toplevel,
+        test_module=test_module,
+        test_dir=test_dir,
+        plusargs=plusargs,
+        **test_opts,
+    )
+
+
+def save_build_cache_stats() -> None:
+    """Write this worker's build cache statistics next to its results"""
+    results_dir = get_results_dir()
+    results_dir.mkdir(parents=True, exist_ok=True)
+    (results_dir / BUILD_CACHE_FILE).write_text(json.dumps(BUILD_CACHE_STATS))
+
+
+def build_cache_summary(since: float = 0.0) -> str:
+    """Summarise build cache hits and misses across all workers"""
+    stats: Counter[str] = Counter()
+    for path in (get_build_root() / "results").glob(f"*/{BUILD_CACHE_FILE}"):
+        if path.stat().st_mtime >= since:
+            stats.update(json.loads(path.read_text()))
+
+    hits, misses = stats["hit"], stats["miss"]
+    total = hits + misses
+    rate = 100 * hits / total if total else 0.0
+    return f"build cache: {hits} hits, {misses} misses ({rate:.0f}% hit rate)"
+
+
+def merge_results(output: Path, since: float = 0.0) -> int:
+    """Merge every worker's JUnit results written since `since` into one file
+
+    Returns the number of merged result files.
+    """
+    merged = ET.Element("testsuites", name="results")
+    results = sorted((get_build_root() / "results").glob("*/*.result.xml"))
+    results = [r for r in results if r.stat().st_mtime >= since]
+
+    for result in results:
+        for suite in ET.parse(result).getroot().iter("testsuite"):
+            suite.set("name", result.name.removesuffix(".result.xml"))
+            merged.append(suite)
+
+    ET.ElementTree(merged).write(output, encoding="unicode", xml_declaration=True)
+    return len(results)
+
+
+def read_perf_counters(dut) -> dict[str, int]:
+    """Sample every cpu_core performance counter"""
+    signals = SignalBank.of(dut)
+    return dict(zip(PERF_COUNTERS, signals.read(*PERF_COUNTERS.values())))
+
+
+def read_icache_counters(dut) -> dict[str, int]:
+    """Sample the instruction cache hit and miss counters of cpu_core"""
+    signals = SignalBank.of(dut)
+    return dict(zip(ICACHE_COUNTERS, signals.read(*ICACHE_COUNTERS.values())))
+
+
+def hit_rate(counters: dict[str, int]) -> float:
+    """Fraction of instruction cache lookups that hit"""
+    lookups = counters["icache_hits"] + counters["icache_misses"]
+    return counters["icache_hits"] / lookups if lookups else 0.0
+
+
+def report_cpi(dut, name: str, **config) -> dict:
+    """Sample the performance counters at the end of a test and report CPI
+
+    The counters and `config` (the parameters the core was built with) are
+    logged and saved to `<name>.perf.json` in the simulator's working
+    directory, the results directory run_tests() sets, where perf_summary()
+    collects them. A core with an instruction cache adds its hit rate.
+    """
+    counters = read_perf_counters(dut)
+    if hasattr(dut, "gen_icache"):
+        counters.update(read_icache_counters(dut))
+    retired = counters["retired"]
+    cpi = counters["cycles"] / retired if retired else float("inf")
+    record = {"config": config, "cpi": cpi, **counters}
+
+    details = ", ".join(f"{k}={v}" for k, v in counters.items())
+    if "icache_hits" in counters:
+        details += f", hit rate {hit_rate(counters):.1%}"
+    dut._log.info(f"CPI {cpi:.3f} ({details})")
+
+    Path(f"{name}{PERF_SUFFIX}").write_text(json.dumps(record))
+    return record
+
+
+def perf_summary(since: float = 0.0) -> str:
+    """Tabulate CPI and stall counts per configuration across all workers"""
+    totals: dict[str, Counter[str]] = {}
+    for path in (get_build_root() / "results").glob(f"*/*{PERF_SUFFIX}"):
+        if path.stat().st_mtime < since:
+            continue
+        record = json.loads(path.read_text())
+        config = " ".join(f"{k}={v}" for k, v in sorted(record["config"].items()))
+        totals.setdefault(config, Counter()).update(
+            {k: record[k] for k in [*PERF_COUNTERS, *ICACHE_COUNTERS] if k in record}
+        )
+
+    if not totals:
+        return ""
+    columns = list(PERF_COUNTERS)
+    icache = any(counts["icache_hits"] for counts in totals.values())
+    if icache:
+        columns += ICACHE_COUNTERS
+    width = max(len(config) for config in totals)
+    header = f"{'config':<{width}}  {'CPI':>6}  " + "  ".join(columns)
+    lines = [header + ("  hit rate" if icache else "")]
+    for config, counts in sorted(totals.items()):
+        cpi = counts["cycles"] / counts["retired"] if counts["retired"] else 0.0
+        values = "  ".join(f"{counts[c]:>{len(c)}}" for c in columns)
+        if icache:
+            values += f"  {hit_rate(counts):>8.1%}"
+        lines.append(f"{config:<{width}}  {cpi:>6.3f}  {values}")
+    return "\n".join(lines)
+
+
+class LockstepMonitor:
+    """Compares every register writeback of cpu_core against a golden model
+
+    The ISS is stepped to its next register write each time the core writes
+    back, so the two retire the same instruction stream in lockstep.
+    """
+
+    def __init__(self, dut, iss) -> None:
+        self.dut = dut
+        self.iss = iss
+        self.checked = 0
+        self._task = None
+
+    def start(self) -> None:
+        self._task = cocotb.start_soon(self._monitor())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _monitor(self) -> None:
+        signals = SignalBank.of(self.dut)
+        wr_en = signals.getter("regfile_u.i_wr_en")
+        wr_addr = signals.getter("regfile_u.i_wr_addr")
+        wr_data = signals.getter("regfile_u.i_wr_data")
+        edge = RisingEdge(self.dut.i_clk)
+        while True:
+            await edge
+            await ReadOnly()
+            if not wr_en():
+                continue
+            rd = wr_addr()
+            if rd == 0:
+                continue
+            value = wr_data()
+            pc, insn, expected_rd, expected = self.iss.next_writeback()
+            assert (rd, value) == (expected_rd, expected), (
+                f"writeback #{self.checked} mismatch at pc=0x{pc:08x} ({insn:08x}): "
+                f"core x{rd}=0x{value:08x}, iss x{expected_rd}=0x{expected:08x}"
+            )
+            self.checked += 1
+
+
+class CommitTraceMonitor:
+    """Writes a commit trace record for every instruction cpu_core retires
+
+    Pipeline registers have no enables, stalls and flushes insert bubbles
+    instead, so an instruction in p3 is always in p4 on the next cycle and in
+    writeback on the one after. The monitor samples each instruction as it
+    enters p3 (pc, memory address and store data, stall and flush flags),
+    catches load data in p4 and completes the record with the register
+    writeback, following it through the pipeline without any help from the RTL.
+    See tools/commit_trace.py for the format.
+    """
+
+    def __init__(self, dut, path: os.PathLike | str) -> None:
+        self.dut = dut
+        self.path = Path(path)
+        self.count = 0
+        self._task = None
+        self._writer = None
+
+    def start(self) -> None:
+        from commit_trace import TraceWriter
+
+        self._writer = TraceWriter(self.path)
+        self._task = cocotb.start_soon(self._monitor())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self.count = self._writer.count
+            self._writer.close()
+            self._writer = None
+
+    async def _monitor(self) -> None:
+        from commit_trace import FLUSH, LOAD, STALL_LOAD_USE, STALL_RAW, STORE, WB
+
+        signals = SignalBank.of(self.dut)
+        # valid and pc lead p2p3_t, see cpu_types.vh
+        p2p3 = signals.getter("p2p3_q")
+        valid_shift = len(signals["p2p3_q"]) - 1
+        pc_shift = valid_shift - 32
+        insn = signals.getter("p3_insn")
+        rd_en = signals.getter("memory_u.i_ctrl_mem_rd_en")
+        wr_en = signals.getter("memory_u.i_ctrl_mem_wr_en")
+        mem_addr = signals.getter("memory_u.i_mem_addr")
+        mem_wdata = signals.getter("memory_u.i_mem_wdata")
+        mem_rdata = signals.getter("memory_u.o_mem_rdata")
+        reg_wr_en = signals.getter("regfile_u.i_wr_en")
+        reg_wr_addr = signals.getter("regfile_u.i_wr_addr")
+        reg_wr_data = signals.getter("regfile_u.i_wr_data")
+        stall_raw = signals.getter("stall_raw")
+        stall_load_use = signals.getter("stall_load_use")
+        flush = signals.getter("flush_branch")
+        write = self._writer.write
+
+        # [pc, insn, flags, address, data] of the instructions in p3 and p4
+        ex = mem = None
+        stalled = 0  # stall flags of the instruction waiting in p2
+        cycle = 0
+        edge = RisingEdge(self.dut.i_clk)
+        while True:
+            await edge
+            await ReadOnly()
+            cycle += 1
+
+            if mem is not None:
+                pc, word, flags, address, data = mem
+                rd = value = 0
+                if reg_wr_en() and (rd := reg_wr_addr()):
+                    flags |= WB
+                    value = reg_wr_data()
+                write(cycle, pc, word, flags, rd, value, address, data)
+
+            mem = ex
+            if mem is not None and mem[2] & LOAD:
+                mem[4] = mem_rdata()
+
+            ex = None
+            stage = p2p3()
+            if stage >> valid_shift:
+                flags, address, data = stalled, 0, 0
+                if rd_en():
+                    flags |= LOAD
+                    address = mem_addr()
+                elif wr_en():
+                    flags |= STORE
+                    address, data = mem_addr(), mem_wdata()
+                if flush():
+                    flags |= FLUSH
+                ex = [(stage >> pc_shift) & 0xFFFFFFFF, insn(), flags, address, data]
+                stalled = 0
+
+            if flush():
+                stalled = 0  # the instruction in p2 is discarded
+            stalled |= STALL_RAW if stall_raw() else 0
+            stalled |= STALL_LOAD_USE if stall_load_use() else 0
+
+
+def signal_match(dut, name: str, value: int) -> Callable[[], bool]:
+    """WaveDump trigger firing in the cycle `name` reads `value`, such as a PC"""
+    get = SignalBank.of(dut).getter(name)
+    return lambda: get() == value
+
+
+class WaveDump:
+    """Dumps a chosen set of signals to a VCD file over a window the test picks
+
+    Building with waves (WAVES=1) dumps every signal for the whole run, which
+    slows long simulations down and leaves large FST files behind. A WaveDump
+    samples only the signals under `scopes` (signals, or instances for every
+    signal below them), once per clock, from the cycle `start` fires up to the
+    cycle `stop` fires. Either trigger is a cycle number, counted from start(),
+    or a callable checked every cycle, such as signal_match(dut, "pc", 0x40).
+
+    With `ring` set only the last `ring` cycles are kept, in memory, and the
+    file is written by save(). Wrapping the test in on_failure() saves them
+    when an assertion fails, so a passing test costs a few reads per cycle and
+    writes nothing. Values are sampled as bit strings, so X and Z bits show up
+    in the dump as they would in a full trace.
+    """
+
+    def __init__(
+        self,
+        dut,
+        path: os.PathLike | str,
+        scopes: Sequence[str] = ("",),
+        start: int | Callable[[], bool] | None = None,
+        stop: int | Callable[[], bool] | None = None,
+        ring: int | None = None,
+    ) -> None:
+        self.dut = dut
+        self.path = Path(path)
+        self.start_trigger = start
+        self.stop_trigger = stop
+        self.cycles = 0  # cycles sampled
+        self._signals = SignalBank.of(dut)
+        self._names = sorted(set(self._expand(scopes)))
+        self._ring = deque(maxlen=ring) if ring else None
+        self._file = None
+        self._last = None
+        self._task = None
+
+    def _expand(self, scopes):
+        """Signal names under each scope, unpacked arrays and the like skipped"""
+        for scope in scopes:
+            handle = self.dut
+            for part in filter(None, scope.split(".")):
+                handle = getattr(handle, part)
+            if isinstance(handle, LogicObject | LogicArrayObject):
+                yield scope
+            elif isinstance(handle, HierarchyObject):
+                prefix = f"{scope}." if scope else ""
+                yield from self._expand(f"{prefix}{child._name}" for child in handle)
+
+    def start(self) -> None:
+        self._task = cocotb.start_soon(self._monitor())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _fired(trigger, cycle: int) -> bool:
+        return trigger() if callable(trigger) else cycle == trigger
+
+    async def _monitor(self) -> None:
+        getters = [self._signals.binstr_getter(name) for name in self._names]
+        ring = self._ring
+        cycle = 0
+        started = self.start_trigger is None
+        edge = RisingEdge(self.dut.i_clk)
+        while True:
+            await edge
+            await ReadOnly()
+            cycle += 1
+            if not started:
+                started = self._fired(self.start_trigger, cycle)
+                if not started:
+                    continue
+            sample = (int(get_sim_time("ps")), [get() for get in getters])
+            self.cycles += 1
+            if ring is not None:
+                ring.append(sample)
+            else:
+                self._write(*sample)
+            if self.stop_trigger is not None and self._fired(self.stop_trigger, cycle):
+                break
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self) -> None:
+        """Start the file with the VCD header, one scope per instance"""
+        self._file = open(self.path, "w", buffering=1 << 20)
+        self._ids = [self._vcd_id(i) for i in range(len(self._names))]
+        self._widths = [len(self._signals[name]) for name in self._names]
+        self._last = [None] * len(self._names)
+
+        write = self._file.write
+        write("$timescale 1ps $end\n")
+        write(f"$scope module {self.dut._name} $end\n")
+        scope = []
+        for name, vcd_id, width in zip(self._names, self._ids, self._widths):
+            *path, leaf = name.split(".")
+            common = 0
+            while common < min(len(scope), len(path)) and scope[common] == path[common]:
+                common += 1
+            write("$upscope $end\n" * (len(scope) - common))
+            for part in path[common:]:
+                write(f"$scope module {part} $end\n")
+            scope = path
+            write(f"$var wire {width} {vcd_id} {leaf} $end\n")
+        write("$upscope $end\n" * (len(scope) + 1))
+        write("$enddefinitions $end\n")
+
+    @staticmethod
+    def _vcd_id(index: int) -> str:
+        chars = ""
+        while True:
+            index, digit = divmod(index, 94)
+            chars += chr(33 + digit)
+            if not index:
+                return chars
 
-    instructions = []
+    def _write(self, time: int, values: list[str]) -> None:
+        """Write the values that changed since the last sample"""
+        if self._file is None:
+            self._open()
+        changes = [f"#{time}"]
+        last = self._last
+        for i, value in enumerate(values):
+            if value != last[i]:
+                last[i] = value
+                value = value.translate(_VCD_BITS)
+                if self._widths[i] == 1:
+                    changes.append(f"{value}{self._ids[i]}")
+                else:
+                    changes.append(f"b{value} {self._ids[i]}")
+        self._file.write("\n".join(changes) + "\n")
 
-    with open(hex_path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                hex_bytes = line.split()
-                if len(hex_bytes) == 4:
-                    instruction = (
-                        (int(hex_bytes[3], 16) << 24)
-                        | (int(hex_bytes[2], 16) << 16)
-                        | (int(hex_bytes[1], 16) << 8)
-                        | int(hex_bytes[0], 16)
-                    )
-                    instructions.append(instruction)
+    def save(self) -> Path:
+        """Write out the cycles kept in ring mode, or flush the file so far"""
+        if self._ring is not None:
+            self._file = None
+            for sample in self._ring:
+                self._write(*sample)
+            if self._file is None:
+                self._open()
+            self._file.close()
+            self._file = None
+        elif self._file is not None:
+            self._file.flush()
+        log.info(
+            "waves: %d cycles of %d signals in %s",
+            len(self._ring) if self._ring is not None else self.cycles,
+            len(self._names),
+            self.path,
+        )
+        return self.path
 
-    return instructions
+    @contextmanager
+    def on_failure(self):
+        """Save the waves if the block raises, a failing assertion included"""
+        try:
+            yield self
+        except BaseException:
+            self.save()
+            raise
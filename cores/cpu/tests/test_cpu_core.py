@@ -0,0 +1,408 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+cocotb testbench for cpu_core.sv, checked in lockstep against the ISS golden model
+"""
+
+import os
+import random
+from collections.abc import Sequence
+
+import cocotb
+import pytest
+from cocotb.triggers import RisingEdge
+from tb_utils import (
+    CommitTraceMonitor,
+    LockstepMonitor,
+    MemoryBackdoor,
+    WaveDump,
+    build_cached,
+    get_hdl_root,
+    get_results_dir,
+    get_sim_runner,
+    read_perf_counters,
+    report_cpi,
+    run_tests,
+    setup_clock,
+    tb_init_base,
+)
+from commit_trace import WB, TraceReader
+from tb_coverage import CoreCoverage
+from gen_program import ProgramGenerator, loop_program
+from hexfile import read_words, write_words
+from iss import ISS
+from rv32i import NOP, OP_BRANCH
+
+SOURCES = [
+    "cpu_core.sv",
+    "insnmem_word.sv",
+    "aluctrl.sv",
+    "control.sv",
+    "regfile.sv",
+    "alu.sv",
+    "memory.sv",
+    "hazard_unit.sv",
+    "forwarding_unit.sv",
+    "branch_predictor.sv",
+    "icache.sv",
+    "perf_counters.sv",
+    "pipeline/p1p2.sv",
+    "pipeline/p2p3.sv",
+    "pipeline/p3p4.sv",
+    "pipeline/p4p5.sv",
+]
+
+
+HAZARD_TECHNIQUES = ["STALL_ONLY", "FORWARD_ONLY", "HYBRID", "AGGRESSIVE"]
+BRANCH_PREDICTORS = ["BTFN", "BHT"]  # used by AGGRESSIVE only
+# (HAZARD_TECHNIQUE, BRANCH_PREDICTOR) pairs that build different cores
+CORE_CONFIGS = [(technique, 0) for technique in range(len(HAZARD_TECHNIQUES))] + [
+    (HAZARD_TECHNIQUES.index("AGGRESSIVE"), 1)
+]
+DRAIN_NOPS = 4  # keeps whatever is fetched past the program out of the check
+BATCH_PROGRAMS = 50  # programs run back to back in one simulation
+BATCH_SEED = 1000  # clear of the seeds the lockstep runs use
+
+# dumped around a lockstep mismatch: fetch, the pipeline registers, writeback
+# and the hazard and forwarding decisions
+WAVE_SCOPES = [
+    "pc",
+    "p1p2_q",
+    "p2p3_q",
+    "p3p4_q",
+    "p4p5_q",
+    "regfile_u.i_wr_en",
+    "regfile_u.i_wr_addr",
+    "regfile_u.i_wr_data",
+    "hazard_u",
+    "forwarding_u",
+]
+
+
+def gen_program(
+    rng: random.Random, length: int, gap: int = 0, mem_ops: bool = True
+) -> list[int]:
+    """Generate a random program of ALU ops, loads, stores and branches
+
+    Programs come from tools/gen_program.py with its default hazard density,
+    plus forward branches and jumps and byte and halfword loads and stores.
+    Back to back dependencies are left to the hazard unit unless `gap` NOPs are
+    put after each instruction.
+    """
+    generator = ProgramGenerator(mem=0.4 if mem_ops else 0.0, branches=0.1, subword=0.3)
+    program = generator.generate(rng, length)
+
+    padded = []
+    for insn in program:
+        padded += [insn] + [NOP] * gap
+    return padded + [NOP] * DRAIN_NOPS
+
+
+def run_iss(program: Sequence[int]) -> tuple[ISS, int, int]:
+    """Run a program on the ISS up to its drain NOPs
+
+    Returns the ISS in its final state, the instructions retired and the
+    register writebacks among them. Branches can skip or repeat any part of
+    the program, so neither count follows from its length.
+    """
+    iss = ISS(program)
+    end = 4 * (len(program) - DRAIN_NOPS)
+    retired = writebacks = 0
+    while iss.pc != end:
+        writebacks += iss.step()[2] != 0
+        retired += 1
+    return iss, retired, writebacks
+
+
+def max_cycles(retired: int) -> int:
+    """Cycles to wait for `retired` instructions before giving up
+
+    At worst an instruction waits out a producer two stages ahead, and a branch
+    also has the two instructions behind it flushed.
+    """
+    return 5 * retired + 20
+
+
+@cocotb.test()
+async def test_cpu_core_lockstep(dut) -> None:
+    """Run a random program and compare every writeback against the ISS"""
+    program = read_words(os.environ["LOCKSTEP_PROGRAM"])
+    _, retired, expected = run_iss(program)
+    iss = ISS(program)
+
+    monitor = LockstepMonitor(dut, iss)
+    coverage = CoreCoverage(dut)
+    trace = CommitTraceMonitor(dut, f"{os.environ['PERF_NAME']}.trace")
+    # the last cycles of the pipeline, written out only if the test fails
+    waves = WaveDump(dut, f"{os.environ['PERF_NAME']}.vcd", WAVE_SCOPES, ring=64)
+    dut.i_imem_wr_en.value = 0
+    await tb_init_base(dut)
+    monitor.start()
+    trace.start()
+    waves.start()
+    coverage.start()
+    # run until the drain NOPs reach writeback
+    edge = RisingEdge(dut.i_clk)
+    with waves.on_failure():
+        for _ in range(max_cycles(retired)):
+            await edge
+            if read_perf_counters(dut)["retired"] >= retired:
+                break
+    monitor.stop()
+    trace.stop()
+    waves.stop()
+    coverage.stop()
+    coverage.save(os.environ["PERF_NAME"])
+
+    technique = int(os.environ["HAZARD_TECHNIQUE"])
+    report_cpi(
+        dut,
+        os.environ["PERF_NAME"],
+        technique=HAZARD_TECHNIQUES[technique],
+    )
+    assert (
+        monitor.checked == expected
+    ), f"core retired {monitor.checked} writebacks, expected {expected}"
+
+    # the trace must list the program in order, with the ISS's writebacks
+    iss = ISS(program)
+    with TraceReader(trace.path) as reader:
+        assert len(reader) == trace.count >= retired
+        for record in reader[:retired]:
+            pc, insn, rd, value = iss.step()
+            assert (record.pc, record.insn) == (pc, insn), f"trace diverged at {pc:08x}"
+            if rd:
+                assert record.flags & WB and (record.rd, record.value) == (rd, value)
+
+
+async def swap_program(
+    dut,
+    imem: MemoryBackdoor,
+    dmem: MemoryBackdoor,
+    program: Sequence[int],
+    previous: Sequence[int] = (),
+) -> None:
+    """Reset the core with `program` in place of `previous` and data memory cleared"""
+    edge = RisingEdge(dut.i_clk)
+    dut.i_rst_n.value = 0
+    await edge
+    imem.write_words(program)
+    # whatever is left of a longer program before it
+    imem.fill(0, 4 * len(program), 4 * max(0, len(previous) - len(program)))
+    dmem.fill(0)
+    await edge
+    dut.i_rst_n.value = 1
+
+
+async def run_program(dut, program: Sequence[int], retired: int | None = None) -> int:
+    """Run a program until its drain NOPs reach writeback, returns the writebacks
+
+    The program must already be in insnmem and the core out of reset. Every
+    writeback is checked against the ISS. Pass the instructions retired if
+    run_iss() has already been called for the program.
+    """
+    if retired is None:
+        _, retired, _ = run_iss(program)
+    monitor = LockstepMonitor(dut, ISS(program))
+    monitor.start()
+    edge = RisingEdge(dut.i_clk)
+    for _ in range(max_cycles(retired)):
+        await edge
+        if read_perf_counters(dut)["retired"] >= retired:
+            break
+    monitor.stop()
+    return monitor.checked
+
+
+@cocotb.test()
+async def test_cpu_core_batch(dut) -> None:
+    """Run many random programs in one simulation, swapped in through the backdoor
+
+    The core is held in reset while the next program is written into insnmem
+    and data memory is cleared, so each program starts from the state a fresh
+    simulation would, without elaborating the design again.
+    """
+    count = int(os.environ["BATCH_PROGRAMS"])
+    seed = int(os.environ["BATCH_SEED"])
+    imem = MemoryBackdoor(dut.gen_insnmem.insnmem_u.mem)
+    dmem = MemoryBackdoor(dut.memory_u.mem)
+
+    dut.i_imem_wr_en.value = 0
+    dut.i_rst_n.value = 1
+    setup_clock(dut)
+    previous = []
+    for i in range(count):
+        program = gen_program(random.Random(seed + i), 200)
+        await swap_program(dut, imem, dmem, program, previous)
+        previous = program
+
+        iss, retired, expected = run_iss(program)
+        checked = await run_program(dut, program, retired)
+        assert (
+            checked == expected
+        ), f"program {i}: core retired {checked} writebacks, expected {expected}"
+        assert dmem.read() == iss.dmem, f"program {i}: data memory differs from ISS"
+
+
+@cocotb.test()
+async def test_cpu_core_loops(dut) -> None:
+    """Run nested counted loops and count the flushes their branches cost
+
+    Without prediction every branch flushes the instructions behind it. With
+    it, only mispredicted branches do, and most loop branches are taken back
+    to the start of the loop as predicted.
+    """
+    program = read_words(os.environ["LOCKSTEP_PROGRAM"])
+    iss = ISS(program)
+    end = 4 * (len(program) - DRAIN_NOPS)
+    branches = 0
+    while iss.pc != end:
+        branches += iss.step()[1] & 0x7F == OP_BRANCH
+    _, retired, expected = run_iss(program)
+
+    monitor = LockstepMonitor(dut, ISS(program))
+    dut.i_imem_wr_en.value = 0
+    await tb_init_base(dut)
+    monitor.start()
+    edge = RisingEdge(dut.i_clk)
+    for _ in range(max_cycles(retired)):
+        await edge
+        if read_perf_counters(dut)["retired"] >= retired:
+            break
+    monitor.stop()
+
+    technique = HAZARD_TECHNIQUES[int(os.environ["HAZARD_TECHNIQUE"])]
+    predictor = BRANCH_PREDICTORS[int(os.environ["BRANCH_PREDICTOR"])]
+    config = {"technique": technique, "program": "loops"}
+    if technique == "AGGRESSIVE":
+        config["predictor"] = predictor
+    flushes = report_cpi(dut, os.environ["PERF_NAME"], **config)["flushes"]
+    dut._log.info(f"{branches} branches, {flushes} flushes")
+
+    assert (
+        monitor.checked == expected
+    ), f"core retired {monitor.checked} writebacks, expected {expected}"
+    if technique == "AGGRESSIVE":
+        assert flushes < branches // 2, f"{flushes} flushes for {branches} branches"
+    else:
+        assert flushes == branches, f"{flushes} flushes for {branches} branches"
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("technique", range(len(HAZARD_TECHNIQUES)))
+def test_cpu_core_runner(technique: int, seed: int) -> None:
+    """Test runner for the CPU core"""
+    hdl_root = get_hdl_root()
+
+    program_path = get_results_dir() / f"lockstep_{seed}.hex"
+    program_path.parent.mkdir(parents=True, exist_ok=True)
+    write_words(program_path, gen_program(random.Random(seed), 200))
+
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / src for src in SOURCES],
+        hdl_toplevel="cpu_core",
+        includes=[str(hdl_root)],
+        parameters={"HAZARD_TECHNIQUE": technique},
+        timescale=("1ns", "1ns"),
+    )
+
+    run_tests(
+        runner,
+        hdl_toplevel="cpu_core",
+        test_module="test_cpu_core",
+        testcase="test_cpu_core_lockstep",
+        plusargs=[f"+IMEM_PRELOAD_FILE={program_path}"],
+        extra_env={
+            "LOCKSTEP_PROGRAM": str(program_path),
+            "HAZARD_TECHNIQUE": str(technique),
+            "PERF_NAME": f"cpu_core_{HAZARD_TECHNIQUES[technique].lower()}_{seed}",
+        },
+    )
+
+
+@pytest.mark.parametrize("technique,predictor", CORE_CONFIGS)
+def test_cpu_core_batch_runner(technique: int, predictor: int) -> None:
+    """Test runner for back to back programs in one simulation"""
+    hdl_root = get_hdl_root()
+
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / src for src in SOURCES],
+        hdl_toplevel="cpu_core",
+        includes=[str(hdl_root)],
+        parameters={"HAZARD_TECHNIQUE": technique, "BRANCH_PREDICTOR": predictor},
+        timescale=("1ns", "1ns"),
+    )
+
+    run_tests(
+        runner,
+        hdl_toplevel="cpu_core",
+        test_module="test_cpu_core",
+        testcase="test_cpu_core_batch",
+        extra_env={
+            "BATCH_PROGRAMS": str(BATCH_PROGRAMS),
+            "BATCH_SEED": str(BATCH_SEED),
+        },
+    )
+
+
+@pytest.mark.parametrize("technique,predictor", CORE_CONFIGS)
+def test_cpu_core_loops_runner(technique: int, predictor: int) -> None:
+    """Test runner for the loop benchmark, once per predictor"""
+    hdl_root = get_hdl_root()
+
+    program_path = get_results_dir() / "loops.hex"
+    program_path.parent.mkdir(parents=True, exist_ok=True)
+    write_words(
+        program_path, loop_program(random.Random(0)).tolist() + [NOP] * DRAIN_NOPS
+    )
+
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / src for src in SOURCES],
+        hdl_toplevel="cpu_core",
+        includes=[str(hdl_root)],
+        parameters={"HAZARD_TECHNIQUE": technique, "BRANCH_PREDICTOR": predictor},
+        timescale=("1ns", "1ns"),
+    )
+
+    name = HAZARD_TECHNIQUES[technique].lower()
+    if technique == HAZARD_TECHNIQUES.index("AGGRESSIVE"):
+        name += f"_{BRANCH_PREDICTORS[predictor].lower()}"
+    run_tests(
+        runner,
+        hdl_toplevel="cpu_core",
+        test_module="test_cpu_core",
+        testcase="test_cpu_core_loops",
+        plusargs=[f"+IMEM_PRELOAD_FILE={program_path}"],
+        extra_env={
+            "LOCKSTEP_PROGRAM": str(program_path),
+            "HAZARD_TECHNIQUE": str(technique),
+            "BRANCH_PREDICTOR": str(predictor),
+            "PERF_NAME": f"cpu_core_loops_{name}",
+        },
+    )
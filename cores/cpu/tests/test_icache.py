@@ -0,0 +1,385 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+cocotb testbench for icache.sv, behind which a Python model of the backing
+memory serves line fills after a configurable latency
+
+The icache tests fetch address streams from the cache alone and check every
+instruction and the hit and miss counters against a reference cache. The core
+test runs the benchmark programs on cpu_core built with ICACHE, at several
+latencies, checked against the ISS, and reports hit rate and effective CPI.
+"""
+
+import os
+import random
+from collections.abc import Sequence
+
+import cocotb
+import pytest
+from cocotb.triggers import FallingEdge, RisingEdge
+from tb_utils import (
+    LockstepMonitor,
+    MemoryBackdoor,
+    SignalBank,
+    build_cached,
+    get_hdl_root,
+    get_sim_runner,
+    hit_rate,
+    read_icache_counters,
+    read_perf_counters,
+    report_cpi,
+    reset_dut,
+    run_tests,
+    setup_clock,
+    tb_init_base,
+)
+from test_cpu_core import (
+    DRAIN_NOPS,
+    HAZARD_TECHNIQUES,
+    SOURCES,
+    gen_program,
+    max_cycles,
+    run_iss,
+)
+from gen_program import loop_program
+from iss import ISS
+from rv32i import NOP
+
+# (latency, word_cycles) of the backing memory, from a block RAM to SPI flash
+LATENCIES = [(1, 1), (8, 1), (32, 8)]
+STREAM_LENGTH = 2000  # fetches per latency in the icache tests
+
+
+class BackingMemory:
+    """Backing memory model serving icache line fills from a list of words
+
+    The first word of a line arrives `latency` cycles after the request is
+    seen and each word after it `word_cycles` later, as from SPI flash: a fixed
+    cost for the command and address, then a word every so many clocks. Words
+    past the end of the list read as zero. Requests are checked to be line
+    aligned and held until their last word. Signals are sampled and driven on
+    the falling edge.
+    """
+
+    def __init__(
+        self,
+        dut,
+        port: str,
+        line_words: int,
+        words: Sequence[int],
+        latency: int = 1,
+        word_cycles: int = 1,
+    ) -> None:
+        if latency < 1 or word_cycles < 1:
+            raise ValueError("latency and word_cycles must be at least 1")
+        self.dut = dut
+        self.port = port
+        self.line_words = line_words
+        self.words = list(words)
+        self.latency = latency
+        self.word_cycles = word_cycles
+        self.requests = 0
+        self._task = None
+
+    def start(self) -> None:
+        self._task = cocotb.start_soon(self._serve())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        SignalBank.of(self.dut).set(f"i_{self.port}_valid", 0)
+
+    async def _serve(self) -> None:
+        signals = SignalBank.of(self.dut)
+        req = signals.getter(f"o_{self.port}_req")
+        addr = signals.getter(f"o_{self.port}_addr")
+        set_valid = signals.setter(f"i_{self.port}_valid")
+        set_data = signals.setter(f"i_{self.port}_data")
+        edge = FallingEdge(self.dut.i_clk)
+        line_bytes = 4 * self.line_words
+
+        set_valid(0)
+        while True:
+            await edge
+            if not req():
+                continue
+            line = addr()
+            assert line % line_bytes == 0, f"fill of 0x{line:08x} is not line aligned"
+            self.requests += 1
+            for i in range(self.line_words):
+                for _ in range((self.latency if i == 0 else self.word_cycles) - 1):
+                    await edge
+                    assert req() and addr() == line, f"fill of 0x{line:08x} dropped"
+                word = line // 4 + i
+                set_data(self.words[word] if word < len(self.words) else 0)
+                set_valid(1)
+                await edge
+                set_valid(0)
+
+
+class ICacheModel:
+    """Reference for which fetches hit in icache.sv, lines replaced LRU first"""
+
+    def __init__(self, size: int, ways: int, line_words: int) -> None:
+        self.ways = ways
+        self.line_bytes = 4 * line_words
+        self.sets = [[] for _ in range(size // (self.line_bytes * ways))]
+
+    def access(self, address: int) -> bool:
+        line = address // self.line_bytes
+        lines = self.sets[line % len(self.sets)]  # most recently used last
+        hit = line in lines
+        if hit:
+            lines.remove(line)
+        elif len(lines) == self.ways:
+            lines.pop(0)
+        lines.append(line)
+        return hit
+
+
+def fetch_stream(rng: random.Random, length: int, span: int) -> list[int]:
+    """Word aligned fetch addresses below `span`: straight runs, loops and jumps"""
+    addresses = []
+    pc = 0
+    while len(addresses) < length:
+        run = 4 * rng.randint(1, 16)
+        if rng.random() < 0.3 and pc >= run:
+            # loop back over the last run a few times
+            addresses += list(range(pc - run, pc, 4)) * rng.randint(2, 6)
+        else:
+            addresses += range(pc, pc + run, 4)
+            pc += run
+        if rng.random() < 0.3:
+            pc = 4 * rng.randrange(span // 4)
+    return [address % span for address in addresses[:length]]
+
+
+async def fetch(dut, addresses: Sequence[int], words: Sequence[int]) -> int:
+    """Fetch every address in turn as the core does, returns the cycles taken
+
+    An address is held on i_pc until o_ready says its instruction is out, and
+    that instruction is checked against the backing memory.
+    """
+    signals = SignalBank.of(dut)
+    set_pc = signals.setter("i_pc")
+    ready, insn = signals.getter("o_ready"), signals.getter("o_insn")
+    edge = FallingEdge(dut.i_clk)
+
+    cycles = 0
+    for pc in addresses:
+        set_pc(pc)
+        while True:
+            await edge
+            cycles += 1
+            if ready():
+                break
+        actual = insn()
+        assert (
+            actual == words[pc // 4]
+        ), f"0x{pc:08x}: got=0x{actual:08x}, expected=0x{words[pc // 4]:08x}"
+    return cycles
+
+
+async def init_inputs(dut) -> None:
+    """Initialize all inputs to known state"""
+    SignalBank.of(dut).write(i_pc=0, i_mem_valid=0, i_mem_data=0)
+    await FallingEdge(dut.i_clk)
+
+
+def cache_params(dut) -> tuple[int, int, int]:
+    """SIZE, WAYS and LINE_WORDS of the icache under test"""
+    return tuple(
+        getattr(dut, name).value.to_unsigned()
+        for name in ("SIZE", "WAYS", "LINE_WORDS")
+    )
+
+
+@cocotb.test()
+async def test_icache_fetch(dut) -> None:
+    """Fetch random streams at several latencies, checked against the reference"""
+    await tb_init_base(dut, init_inputs)
+    size, ways, line_words = cache_params(dut)
+    signals = SignalBank.of(dut)
+    rng = random.Random(0)
+    span = 4 * size  # four times the cache, so lines are evicted
+    words = [rng.getrandbits(32) for _ in range(span // 4)]
+
+    for latency, word_cycles in LATENCIES:
+        await reset_dut(dut)  # empties the cache
+        memory = BackingMemory(dut, "mem", line_words, words, latency, word_cycles)
+        memory.start()
+        model = ICacheModel(size, ways, line_words)
+        addresses = fetch_stream(rng, STREAM_LENGTH, span)
+        hits = sum(model.access(address) for address in addresses)
+
+        cycles = await fetch(dut, addresses, words)
+        memory.stop()
+        await FallingEdge(dut.i_clk)  # the last hit is counted on the next edge
+        counters = dict(zip(["hits", "misses"], signals.read("o_hits", "o_misses")))
+        dut._log.info(
+            f"latency {latency}/{word_cycles}: {cycles} cycles for "
+            f"{len(addresses)} fetches, {counters}"
+        )
+        assert counters == {"hits": hits, "misses": len(addresses) - hits}
+        assert memory.requests == counters["misses"]
+
+
+@cocotb.test()
+async def test_icache_conflicts(dut) -> None:
+    """Alternate between lines of one set, two fit with two ways but not three"""
+    await tb_init_base(dut, init_inputs)
+    size, ways, line_words = cache_params(dut)
+    signals = SignalBank.of(dut)
+    way_bytes = size // ways  # lines this far apart share a set
+    words = [random.getrandbits(32) for _ in range(4 * size // 4)]
+
+    for lines in [2, 3]:
+        await reset_dut(dut)
+        memory = BackingMemory(dut, "mem", line_words, words)
+        memory.start()
+        addresses = [4 + way_bytes * (i % lines) for i in range(10 * lines)]
+        await fetch(dut, addresses, words)
+        memory.stop()
+
+        misses = signals.get("o_misses")
+        expected = lines if lines <= ways else len(addresses)
+        assert misses == expected, f"{misses} misses across {lines} lines of a set"
+
+
+def benchmark_programs() -> dict[str, list[int]]:
+    """The random mix cpu_core is tested with and the loop benchmark"""
+    return {
+        "random": gen_program(random.Random(1), 200),
+        "loops": loop_program(random.Random(0)).tolist() + [NOP] * DRAIN_NOPS,
+    }
+
+
+@cocotb.test()
+async def test_icache_core(dut) -> None:
+    """Run the benchmark programs on cpu_core fetching through the cache
+
+    The programs only exist in the backing memory model. Every writeback is
+    checked against the ISS, and the hit rate and effective CPI are reported
+    for each program and latency.
+    """
+    technique = HAZARD_TECHNIQUES[int(os.environ["HAZARD_TECHNIQUE"])]
+    ways = dut.ICACHE_WAYS.value.to_unsigned()
+    line_words = dut.ICACHE_LINE_WORDS.value.to_unsigned()
+    dmem = MemoryBackdoor(dut.memory_u.mem)
+
+    SignalBank.of(dut).write(i_imem_wr_en=0, i_imem_valid=0, i_imem_data=0)
+    dut.i_rst_n.value = 1
+    setup_clock(dut)
+    edge = RisingEdge(dut.i_clk)
+    for name, program in benchmark_programs().items():
+        iss, retired, expected = run_iss(program)
+        for latency, word_cycles in LATENCIES:
+            dut.i_rst_n.value = 0
+            await edge
+            dmem.fill(0)
+            await edge
+            dut.i_rst_n.value = 1
+
+            memory = BackingMemory(
+                dut, "imem", line_words, program, latency, word_cycles
+            )
+            monitor = LockstepMonitor(dut, ISS(program))
+            memory.start()
+            monitor.start()
+            timeout = max_cycles(retired) * (latency + line_words * word_cycles + 3)
+            for _ in range(timeout):
+                await edge
+                if read_perf_counters(dut)["retired"] >= retired:
+                    break
+            monitor.stop()
+            memory.stop()
+
+            record = report_cpi(
+                dut,
+                f"icache_{technique.lower()}_{ways}way_{name}_{latency}",
+                technique=technique,
+                ways=ways,
+                program=name,
+                latency=f"{latency}/{word_cycles}",
+            )
+            counters = read_icache_counters(dut)
+            assert record["retired"] >= retired, f"{name}: timed out"
+            assert (
+                monitor.checked == expected
+            ), f"{name}: core retired {monitor.checked} writebacks, expected {expected}"
+            assert dmem.read() == iss.dmem, f"{name}: data memory differs from ISS"
+            assert hit_rate(counters) > 0.5, f"{name}: {counters}"
+
+
+# (SIZE, WAYS, LINE_WORDS) of the icache tests
+CACHE_CONFIGS = [(256, 1, 4), (256, 2, 4), (512, 1, 8), (512, 2, 2)]
+# (HAZARD_TECHNIQUE, ICACHE_WAYS) of the core test
+CORE_CONFIGS = [(1, 1), (1, 2), (3, 2)]
+
+
+@pytest.mark.parametrize("size,ways,line_words", CACHE_CONFIGS)
+def test_icache_runner(size: int, ways: int, line_words: int) -> None:
+    """Test runner for the instruction cache"""
+    hdl_root = get_hdl_root()
+
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / "icache.sv"],
+        hdl_toplevel="icache",
+        includes=[str(hdl_root)],
+        parameters={"SIZE": size, "WAYS": ways, "LINE_WORDS": line_words},
+        timescale=("1ns", "1ns"),
+    )
+
+    run_tests(
+        runner,
+        hdl_toplevel="icache",
+        test_module="test_icache",
+        testcase=["test_icache_fetch", "test_icache_conflicts"],
+    )
+
+
+@pytest.mark.parametrize("technique,ways", CORE_CONFIGS)
+def test_icache_core_runner(technique: int, ways: int) -> None:
+    """Test runner for cpu_core behind the instruction cache"""
+    hdl_root = get_hdl_root()
+
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / src for src in SOURCES],
+        hdl_toplevel="cpu_core",
+        includes=[str(hdl_root)],
+        parameters={"HAZARD_TECHNIQUE": technique, "ICACHE": 1, "ICACHE_WAYS": ways},
+        timescale=("1ns", "1ns"),
+    )
+
+    run_tests(
+        runner,
+        hdl_toplevel="cpu_core",
+        test_module="test_icache",
+        testcase="test_icache_core",
+        extra_env={"HAZARD_TECHNIQUE": str(technique)},
+    )
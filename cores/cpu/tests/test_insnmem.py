@@ -21,16 +21,30 @@
 # SOFTWARE.
 
 """
-cocotb testbench for insnmem.sv
+cocotb testbench for insnmem.sv and insnmem_word.sv
+
+Both are run through the same tests, insnmem_word with and without PREFETCH
+and SPRAM. The prefetch test looks at the RAM read enable, so it only runs on
+insnmem_word.
 """
 
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge
-from cocotb_tools.runner import get_runner
+from cocotb.triggers import ReadOnly, RisingEdge
 import random
 import pytest
-from tb_utils import get_env_dir_safe, get_hdl_root, tb_init_base, get_hex_instructions
+from tb_utils import (
+    MemoryBackdoor,
+    SignalBank,
+    build_cached,
+    get_env_dir_safe,
+    get_hdl_root,
+    get_sim_runner,
+    reset_dut,
+    run_tests,
+    tb_init_base,
+)
+from hexfile import read_words
 
 
 CPU_ROOT = get_env_dir_safe("CPU_ROOT")
@@ -40,22 +54,34 @@ PRELOAD_INSTRUCTIONS = []
 
 async def set_pc_and_wait(dut, pc: int) -> None:
     """Set PC and wait for next instruction to be fetched"""
-    dut.i_pc.value = pc
+    SignalBank.of(dut).set("i_pc", pc)
     await RisingEdge(dut.i_clk)
 
 
+async def fetch_all(dut) -> list[int]:
+    """Fetch every word, each read out one cycle after its address"""
+    mem_words = dut.SIZE.value.to_unsigned() // 4
+    instructions = []
+    await set_pc_and_wait(dut, 0)
+    for word_addr in range(1, mem_words + 1):
+        await set_pc_and_wait(dut, (word_addr % mem_words) << 2)
+        instructions.append(dut.o_insn.value.to_unsigned())
+    return instructions
+
+
 async def init_inputs(dut) -> None:
     """Initialize all inputs to known state"""
     dut.i_pc.value = 0
+    dut.i_wr_en.value = 0
     await RisingEdge(dut.i_clk)
 
 
 async def tb_init(dut) -> Clock:
     """Initialize testbench: setup clock, reset, and init inputs"""
     global PRELOAD_INSTRUCTIONS
-    PRELOAD_INSTRUCTIONS = get_hex_instructions(
+    PRELOAD_INSTRUCTIONS = read_words(
         PRELOAD_PATH.format(size=dut.SIZE.value.to_unsigned())
-    )
+    ).tolist()
 
     return await tb_init_base(dut, init_inputs)
 
@@ -134,25 +160,137 @@ async def test_instrmem_pc_sequence(dut) -> None:
     assert instructions == expected, "Instruction fetch sequence failed"
 
 
-@pytest.mark.parametrize("size", [512, 1024, 2048])
-def test_insnmem_runner(size: int) -> None:
+@cocotb.test()
+async def test_insnmem_prefetch(dut) -> None:
+    """Test straight-line fetch reads the RAM every other cycle with PREFETCH"""
+    _ = await tb_init(dut)
+    signals = SignalBank.of(dut)
+    get_rd_en = signals.getter("rd_en")
+
+    n_words = 64
+    instructions, reads = [], 0
+    for word_addr in range(n_words + 1):
+        signals.set("i_pc", word_addr << 2)
+        await ReadOnly()
+        reads += get_rd_en()
+        await RisingEdge(dut.i_clk)
+        if word_addr:
+            instructions.append(dut.o_insn.value.to_unsigned())
+
+    assert instructions == PRELOAD_INSTRUCTIONS[:n_words]
+    # line 0 was read while the PC sat at 0 out of reset
+    expected = n_words // 2 if dut.PREFETCH.value.to_unsigned() else n_words + 1
+    assert reads == expected, f"{reads} RAM reads for {n_words + 1} fetches"
+
+
+@cocotb.test()
+async def test_insnmem_load(dut) -> None:
+    """Test words written through the load port are fetched back"""
+    _ = await tb_init(dut)
+    signals = SignalBank.of(dut)
+
+    mem_words = dut.SIZE.value.to_unsigned() // 4
+    loaded = {random.randrange(mem_words): random.getrandbits(32) for _ in range(32)}
+    for word_addr, insn in loaded.items():
+        signals.set("i_wr_addr", word_addr << 2)
+        signals.set("i_wr_data", insn)
+        signals.set("i_wr_en", 1)
+        await RisingEdge(dut.i_clk)
+    signals.set("i_wr_en", 0)
+
+    expected = PRELOAD_INSTRUCTIONS[:mem_words]
+    for word_addr, insn in loaded.items():
+        expected[word_addr] = insn
+
+    instructions = await fetch_all(dut)
+    assert instructions == expected, "Loaded words were not fetched back"
+
+
+@cocotb.test()
+async def test_insnmem_load_fetched_line(dut) -> None:
+    """Test a load into the word or line just fetched is fetched back"""
+    _ = await tb_init(dut)
+    signals = SignalBank.of(dut)
+
+    mem_words = dut.SIZE.value.to_unsigned() // 4
+    for _ in range(32):
+        # fetch an even word, so with PREFETCH its line sits in the output register
+        word_addr = random.randrange(0, mem_words, 2)
+        await set_pc_and_wait(dut, word_addr << 2)
+        loaded = {word_addr + i: random.getrandbits(32) for i in range(2)}
+        for addr, insn in loaded.items():
+            signals.write(i_wr_en=1, i_wr_addr=addr << 2, i_wr_data=insn)
+            await RisingEdge(dut.i_clk)
+        signals.set("i_wr_en", 0)
+        for addr in [word_addr + 1, word_addr, word_addr + 1]:
+            await set_pc_and_wait(dut, addr << 2)
+            await ReadOnly()
+            actual = dut.o_insn.value.to_unsigned()
+            assert (
+                actual == loaded[addr]
+            ), f"Word {addr}: got=0x{actual:08x}, expected=0x{loaded[addr]:08x}"
+            await RisingEdge(dut.i_clk)
+
+
+@cocotb.test()
+async def test_insnmem_backdoor(dut) -> None:
+    """Test the backdoor reads what is fetched and its writes are fetched back"""
+    _ = await tb_init(dut)
+    backdoor = MemoryBackdoor(dut.mem)
+
+    # earlier tests may have loaded words over the preload
+    assert backdoor.read_words() == await fetch_all(dut)
+
+    mem_words = dut.SIZE.value.to_unsigned() // 4
+    image = [random.getrandbits(32) for _ in range(mem_words)]
+    backdoor.write_words(image)
+    # as when loading a program, reset drops a line insnmem_word still holds
+    await reset_dut(dut)
+    assert await fetch_all(dut) == image, "Backdoor writes were not fetched back"
+    assert backdoor.read_words() == image
+
+
+# (toplevel, parameters), named for pytest
+VARIANTS = {
+    "byte": ("insnmem", {}),
+    "word": ("insnmem_word", {}),
+    "prefetch": ("insnmem_word", {"PREFETCH": 1}),
+    "spram": ("insnmem_word", {"SPRAM": 1}),
+    "prefetch_spram": ("insnmem_word", {"PREFETCH": 1, "SPRAM": 1}),
+}
+WORD_ONLY_TESTS = ["test_insnmem_prefetch"]
+
+
+@pytest.mark.parametrize("size", [512, 1024, 2048, 8192])
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_insnmem_runner(variant: str, size: int) -> None:
     """Test runner for instruction memory"""
     hdl_root = get_hdl_root()
+    toplevel, parameters = VARIANTS[variant]
 
-    runner = get_runner("icarus")
-    runner.build(
-        sources=[hdl_root / "insnmem.sv"],
-        hdl_toplevel="insnmem",
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / f"{toplevel}.sv"],
+        hdl_toplevel=toplevel,
         includes=[str(hdl_root)],
-        always=True,
-        waves=True,
-        parameters={"SIZE": size},
+        parameters={"SIZE": size, **parameters},
         timescale=("1ns", "1ns"),
     )
 
-    runner.test(
-        hdl_toplevel="insnmem",
+    testcase = None
+    if toplevel == "insnmem":
+        testcase = [
+            name
+            for name in globals()
+            if name.startswith("test_")
+            and not name.endswith("_runner")
+            and name not in WORD_ONLY_TESTS
+        ]
+    run_tests(
+        runner,
+        hdl_toplevel=toplevel,
         test_module="test_insnmem",
-        waves=True,
+        testcase=testcase,
         plusargs=[f"+IMEM_PRELOAD_FILE={PRELOAD_PATH.format(size=size)}"],
     )
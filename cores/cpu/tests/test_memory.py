@@ -19,3 +19,221 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+
+"""
+cocotb testbench for memory.sv, checked against a Python model of the data memory
+"""
+
+import random
+
+import cocotb
+import pytest
+from cocotb.triggers import FallingEdge
+from tb_utils import (
+    MemoryBackdoor,
+    SignalBank,
+    build_cached,
+    get_env_dir_safe,
+    get_hdl_root,
+    get_sim_runner,
+    run_tests,
+    tb_init_base,
+)
+from hexfile import read_hex
+
+CPU_ROOT = get_env_dir_safe("CPU_ROOT")
+PRELOAD_PATH = CPU_ROOT / "tests" / "dmem.hex"
+PRELOAD_SIZE = 32  # memory.sv default
+
+# funct3 of each load and store, as the core passes it through
+LOADS = {"lb": 0b000, "lh": 0b001, "lw": 0b010, "lbu": 0b100, "lhu": 0b101}
+STORES = {"sb": 0b000, "sh": 0b001, "sw": 0b010}
+WIDTHS = {0b00: 1, 0b01: 2, 0b10: 4}
+RANDOM_OPS = 4000
+
+
+class DataMemoryModel:
+    """Byte array reference for memory.sv, accesses aligned down to their size"""
+
+    def __init__(self, size: int, data: bytes = b"") -> None:
+        self.data = bytearray(size)
+        self.data[: len(data)] = data
+
+    def load(self, funct3: int, address: int) -> int:
+        width = WIDTHS[funct3 & 0b11]
+        address &= -width
+        value = int.from_bytes(self.data[address : address + width], "little")
+        sign = 1 << (8 * width - 1)
+        if width < 4 and not funct3 & 0b100 and value & sign:
+            value -= sign << 1
+        return value & 0xFFFFFFFF
+
+    def store(self, funct3: int, address: int, data: int) -> None:
+        width = WIDTHS[funct3 & 0b11]
+        address &= -width
+        self.data[address : address + width] = (data & ((1 << 8 * width) - 1)).to_bytes(
+            width, "little"
+        )
+
+
+async def init_inputs(dut) -> None:
+    """Initialize all inputs to known state"""
+    SignalBank.of(dut).write(
+        i_ctrl_mem_rd_en=0,
+        i_ctrl_mem_wr_en=0,
+        i_mem_funct3=0,
+        i_mem_addr=0,
+        i_mem_wdata=0,
+    )
+    await FallingEdge(dut.i_clk)
+
+
+async def tb_init(dut) -> DataMemoryModel:
+    """Reset the memory and model it from its current contents"""
+    await tb_init_base(dut, init_inputs)
+    return DataMemoryModel(dut.SIZE.value.to_unsigned(), MemoryBackdoor(dut.mem).read())
+
+
+async def run_ops(dut, model: DataMemoryModel, ops) -> int:
+    """Issue one (read, write, funct3, address, wdata) per cycle, checking every load
+
+    Inputs are driven and load data sampled on the falling edge, half a cycle
+    either side of the rising edge the memory acts on, so each load is checked
+    before the next operation is driven. A load in the same cycle as a store
+    returns the data from before it. Returns the number of loads checked.
+    """
+    signals = SignalBank.of(dut)
+    rdata = signals.getter("o_mem_rdata")
+    edge = FallingEdge(dut.i_clk)
+    checked = 0
+    for i, (read, write, funct3, address, wdata) in enumerate(ops):
+        signals.write(
+            i_ctrl_mem_rd_en=int(read),
+            i_ctrl_mem_wr_en=int(write),
+            i_mem_funct3=funct3,
+            i_mem_addr=address,
+            i_mem_wdata=wdata,
+        )
+        expected = model.load(funct3, address)
+        if write:
+            model.store(funct3, address, wdata)
+        await edge
+        if read:
+            actual = rdata()
+            assert actual == expected, (
+                f"op {i}: load funct3={funct3:03b} at 0x{address:x} "
+                f"returned 0x{actual:08x}, expected 0x{expected:08x}"
+            )
+            checked += 1
+    signals.write(i_ctrl_mem_rd_en=0, i_ctrl_mem_wr_en=0)
+    return checked
+
+
+def random_op(rng: random.Random, size: int) -> tuple[int, int, int, int, int]:
+    """A load, a store, both or neither, mostly aligned, at a random address"""
+    read, write = rng.random() < 0.6, rng.random() < 0.5
+    funct3 = rng.choice(list(LOADS.values()) if read else list(STORES.values()))
+    if write and funct3 & 0b100:
+        funct3 &= 0b011  # the store sees size only
+    width = WIDTHS[funct3 & 0b11]
+    address = rng.randrange(size)
+    if rng.random() < 0.9:
+        address &= -width
+    return read, write, funct3, address, rng.getrandbits(32)
+
+
+@cocotb.test()
+async def test_memory_preload(dut) -> None:
+    """Test the preload file lands in the first bytes and the rest reads as zero"""
+    model = await tb_init(dut)
+    image = read_hex(PRELOAD_PATH)[:PRELOAD_SIZE]
+    assert model.data[:PRELOAD_SIZE] == image
+    assert not any(model.data[PRELOAD_SIZE:])
+
+    ops = [(1, 0, LOADS["lw"], address, 0) for address in range(0, PRELOAD_SIZE, 4)]
+    assert await run_ops(dut, model, ops) == len(ops)
+
+
+@cocotb.test()
+async def test_memory_sign_extension(dut) -> None:
+    """Test every load size and signedness at every byte offset"""
+    model = await tb_init(dut)
+    pattern = 0x80FF7F01
+    ops = [(0, 1, STORES["sw"], 0x40, pattern)]
+    for funct3 in LOADS.values():
+        ops += [(1, 0, funct3, 0x40 + offset, 0) for offset in range(4)]
+    assert await run_ops(dut, model, ops) == len(ops) - 1
+
+
+@cocotb.test()
+async def test_memory_byte_lanes(dut) -> None:
+    """Test sub-word stores only write their own byte lanes"""
+    model = await tb_init(dut)
+    ops = [(0, 1, STORES["sw"], 0x80, 0xFFFFFFFF)]
+    for offset in range(4):
+        ops += [(0, 1, STORES["sb"], 0x80 + offset, 0x11 * (offset + 1))]
+        ops += [(1, 0, LOADS["lw"], 0x80, 0)]
+    for offset in (0, 2):
+        ops += [(0, 1, STORES["sh"], 0x84 + offset, 0xABCD0000 | offset)]
+        ops += [(1, 0, LOADS["lw"], 0x84, 0)]
+    await run_ops(dut, model, ops)
+    assert model.load(LOADS["lw"], 0x80) == 0x44332211
+
+
+@cocotb.test()
+async def test_memory_read_during_write(dut) -> None:
+    """Test a load and store in the same cycle both happen, the load first"""
+    model = await tb_init(dut)
+    ops = [
+        (0, 1, STORES["sw"], 0x10, 0x12345678),
+        (1, 1, LOADS["lw"], 0x10, 0xDEADBEEF),  # returns the old word
+        (1, 0, LOADS["lw"], 0x10, 0),
+    ]
+    assert await run_ops(dut, model, ops) == 2
+    assert model.load(LOADS["lw"], 0x10) == 0xDEADBEEF
+
+
+@cocotb.test()
+async def test_memory_random(dut) -> None:
+    """Test back to back random loads and stores against the model"""
+    model = await tb_init(dut)
+    rng = random.Random(cocotb.RANDOM_SEED)
+    size = len(model.data)
+    ops = [random_op(rng, size) for _ in range(RANDOM_OPS)]
+    checked = await run_ops(dut, model, ops)
+    assert checked == sum(1 for read, *_ in ops if read)
+    assert MemoryBackdoor(dut.mem).read() == model.data
+
+
+@cocotb.test()
+async def test_memory_backdoor(dut) -> None:
+    """Test unaligned backdoor writes to the word array are loaded back"""
+    model = await tb_init(dut)
+    backdoor = MemoryBackdoor(dut.mem)
+    assert backdoor.width == 4
+
+    data = bytes(random.getrandbits(8) for _ in range(13))
+    backdoor.write(0x23, data)
+    model.data[0x23 : 0x23 + len(data)] = data
+    ops = [(1, 0, LOADS["lbu"], 0x23 + i, 0) for i in range(len(data))]
+    ops += [(1, 0, LOADS["lw"], address, 0) for address in range(0x20, 0x34, 4)]
+    assert await run_ops(dut, model, ops) == len(ops)
+    assert backdoor.read(0x23, len(data)) == data
+
+
+@pytest.mark.parametrize("size", [512, 4096])
+def test_memory_runner(size: int) -> None:
+    """Test runner for data memory"""
+    hdl_root = get_hdl_root()
+
+    runner = get_sim_runner()
+    build_cached(
+        runner,
+        sources=[hdl_root / "memory.sv"],
+        hdl_toplevel="memory",
+        includes=[str(hdl_root)],
+        parameters={"SIZE": size, "PRELOAD": 1, "PRELOAD_FILE": f'"{PRELOAD_PATH}"'},
+        timescale=("1ns", "1ns"),
+    )
+
+    run_tests(runner, hdl_toplevel="memory", test_module="test_memory")
@@ -27,9 +27,19 @@ cocotb testbench for regfile.sv
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
-from cocotb_tools.runner import get_runner
 import random
-from tb_utils import get_hdl_root, reset_dut, tb_init_base
+from tb_utils import (
+    SignalBank,
+    build_cached,
+    get_hdl_root,
+    get_sim_runner,
+    reset_dut,
+    run_tests,
+    tb_init_base,
+)
+
+RD_ADDR = {1: "i_rd_addr1", 2: "i_rd_addr2"}
+RD_DATA = {1: "o_rd_data1", 2: "o_rd_data2"}
 
 
 async def fill_regfile_random(dut) -> dict[int, int]:
@@ -48,31 +58,27 @@ async def fill_regfile_random(dut) -> dict[int, int]:
 
 async def write_regfile(dut, addr: int, data: int, enable: bool = True) -> None:
     """Write data to a register"""
-    dut.i_wr_addr.value = addr
-    dut.i_wr_data.value = data
-    dut.i_wr_en.value = int(enable)
+    signals = SignalBank.of(dut)
+    signals.write(i_wr_addr=addr, i_wr_data=data, i_wr_en=int(enable))
     await RisingEdge(dut.i_clk)
-    dut.i_wr_en.value = 0
+    signals.set("i_wr_en", 0)
     dut._log.debug(f"Wrote {data:0x} to x{addr}")
 
 
 async def read_launch_regfile(dut, addr: int, port=1) -> None:
     """Launch read address"""
-    port2sig = {1: dut.i_rd_addr1, 2: dut.i_rd_addr2}
-    port2sig[port].value = addr
+    SignalBank.of(dut).set(RD_ADDR[port], addr)
     await RisingEdge(dut.i_clk)
 
 
-def read_capture_regfile(dut, port=1) -> None:
-    """Launch read address"""
-    port2sig = {1: dut.o_rd_data1, 2: dut.o_rd_data2}
-    return port2sig[port].value.to_unsigned()
+def read_capture_regfile(dut, port=1) -> int:
+    """Capture read data"""
+    return getattr(dut, RD_DATA[port]).value.to_unsigned()
 
 
 async def read_launch_regfile_dual(dut, addr: tuple[int, int]) -> None:
     """Launch read address dual"""
-    dut.i_rd_addr1.value = addr[0]
-    dut.i_rd_addr2.value = addr[1]
+    SignalBank.of(dut).write(i_rd_addr1=addr[0], i_rd_addr2=addr[1])
     await RisingEdge(dut.i_clk)
 
 
@@ -256,14 +262,12 @@ async def test_regfile_reset_behavior(dut) -> None:
 def test_regfile_runner() -> None:
     """Test runner for register file"""
     hdl_root = get_hdl_root()
-    runner = get_runner("icarus")
-    runner.build(
+    runner = get_sim_runner()
+    build_cached(
+        runner,
         sources=[hdl_root / "regfile.sv"],
         hdl_toplevel="regfile",
-        always=True,
-        waves=True,
         timescale=("1ns", "1ns"),
-        build_dir="sim",
     )
 
-    runner.test(hdl_toplevel="regfile", test_module="test_regfile", waves=True)
+    run_tests(runner, hdl_toplevel="regfile", test_module="test_regfile")
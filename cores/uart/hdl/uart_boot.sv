@@ -0,0 +1,267 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : uart_boot
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   UART bootloader that writes program images into instruction memory
+//   Frames from the host are checked with a CRC-8 before their words are
+//   written, and every frame is answered with an ACK or NAK so the host can
+//   keep a window of frames in flight (go-back-N). A BOOT frame ends the
+//   upload and raises o_done, which releases the core from reset.
+//
+//   Frame, all fields little-endian:
+//     SYNC (0xA5) | CMD | SEQ | LEN (words) | ADDR (4 bytes) | LEN words | CRC
+//   The CRC-8 (polynomial 0x07, initial value 0) covers CMD to the last data
+//   byte. The response is two bytes, ACK (0x06) or NAK (0x15) then a SEQ:
+//     ACK n - frames up to n have been written
+//     NAK n - a frame was corrupted, resend from n (sent once per loss)
+//   See tools/uart_boot.py for the host side.
+//
+// Parameters:
+//   MAX_WORDS - Largest payload of a frame in words, 1 to 255 (default: 64)
+
+`default_nettype none
+
+module uart_boot #(
+    parameter MAX_WORDS = 64
+) (
+    input wire i_clk,
+    input wire i_rst_n,
+
+    // from uart_rx
+    input  wire       i_rx_valid,
+    input  wire [7:0] i_rx_data,
+    output reg        o_rx_ready,
+
+    // to uart_tx
+    output reg        o_tx_valid,
+    output reg  [7:0] o_tx_data,
+    input  wire       i_tx_ready,
+
+    // instruction memory load port
+    output reg         o_mem_wr_en,
+    output wire [31:0] o_mem_wr_addr,
+    output wire [31:0] o_mem_wr_data,
+
+    output wire o_done
+);
+
+  localparam [7:0] SYNC = 8'hA5, CMD_WRITE = 8'h01, CMD_BOOT = 8'h02, ACK = 8'h06, NAK = 8'h15;
+
+  localparam [2:0] HUNT = 3'd0, HEADER = 3'd1, PAYLOAD = 3'd2, CHECK = 3'd3, COMMIT = 3'd4,
+      RESPOND = 3'd5, RESPOND_SEQ = 3'd6, DONE = 3'd7;
+
+  localparam CTR_WIDTH = $clog2(4 * MAX_WORDS + 1);
+  localparam IDX_WIDTH = MAX_WORDS > 1 ? $clog2(MAX_WORDS) : 1;
+
+  // LEN is a byte, so no frame can carry more than 255 words
+  generate
+    if (MAX_WORDS < 1 || MAX_WORDS > 255) begin : gen_bad_max_words
+      $fatal(1, "uart_boot: MAX_WORDS must be in 1..255, got %0d", MAX_WORDS);
+    end
+  endgenerate
+
+  reg [2:0] state, state_nxt;
+  reg [CTR_WIDTH-1:0] ctr, ctr_nxt;  // header, payload byte or committed word
+  reg [7:0] crc, crc_nxt;
+
+  // header
+  reg [7:0] cmd, cmd_nxt;
+  reg [7:0] seq, seq_nxt;
+  reg [7:0] len, len_nxt;
+  reg [31:0] addr, addr_nxt;
+
+  // go-back-N receiver
+  reg [7:0] expected, expected_nxt;
+  reg nak_sent, nak_sent_nxt;
+  reg [7:0] resp, resp_nxt;
+  reg [7:0] resp_seq, resp_seq_nxt;
+  reg boot, boot_nxt;  // the BOOT frame has been accepted
+
+  // frame payload, written to memory once the CRC has been checked
+  reg [31:0] frame_buf[0:MAX_WORDS-1];
+  reg [23:0] word, word_nxt;
+  reg frame_buf_wr;
+
+  function automatic [7:0] crc8(input [7:0] crc_in, input [7:0] data);
+    integer i;
+    begin
+      crc8 = crc_in ^ data;
+      for (i = 0; i < 8; i = i + 1) crc8 = {crc8[6:0], 1'b0} ^ (crc8[7] ? 8'h07 : 8'h00);
+    end
+  endfunction
+
+  wire                 header_ok = len <= MAX_WORDS && (cmd == CMD_WRITE || cmd == CMD_BOOT);
+  wire [CTR_WIDTH-1:0] payload_last = CTR_WIDTH'({len, 2'b00} - 1);
+
+  always @(posedge i_clk or negedge i_rst_n) begin
+    if (~i_rst_n) begin
+      state    <= HUNT;
+      ctr      <= 0;
+      crc      <= 0;
+      cmd      <= 0;
+      seq      <= 0;
+      len      <= 0;
+      addr     <= 0;
+      expected <= 0;
+      nak_sent <= 1'b0;
+      resp     <= 0;
+      resp_seq <= 0;
+      word     <= 0;
+      boot     <= 1'b0;
+    end else begin
+      state    <= state_nxt;
+      ctr      <= ctr_nxt;
+      crc      <= crc_nxt;
+      cmd      <= cmd_nxt;
+      seq      <= seq_nxt;
+      len      <= len_nxt;
+      addr     <= addr_nxt;
+      expected <= expected_nxt;
+      nak_sent <= nak_sent_nxt;
+      resp     <= resp_nxt;
+      resp_seq <= resp_seq_nxt;
+      word     <= word_nxt;
+      boot     <= boot_nxt;
+    end
+  end
+
+  always @(posedge i_clk) begin
+    if (frame_buf_wr) frame_buf[ctr[IDX_WIDTH+1:2]] <= {i_rx_data, word};
+  end
+
+  always @(*) begin
+    state_nxt    = state;
+    ctr_nxt      = ctr;
+    crc_nxt      = crc;
+    cmd_nxt      = cmd;
+    seq_nxt      = seq;
+    len_nxt      = len;
+    addr_nxt     = addr;
+    expected_nxt = expected;
+    nak_sent_nxt = nak_sent;
+    resp_nxt     = resp;
+    resp_seq_nxt = resp_seq;
+    word_nxt     = word;
+    boot_nxt     = boot;
+
+    o_rx_ready   = 1'b0;
+    o_tx_valid   = 1'b0;
+    o_tx_data    = resp;
+    o_mem_wr_en  = 1'b0;
+    frame_buf_wr = 1'b0;
+
+    case (state)
+      HUNT: begin
+        o_rx_ready = 1'b1;
+        if (i_rx_valid && i_rx_data == SYNC) begin
+          state_nxt = HEADER;
+          ctr_nxt   = 0;
+          crc_nxt   = 0;
+        end
+      end
+      HEADER: begin
+        o_rx_ready = 1'b1;
+        if (i_rx_valid) begin
+          crc_nxt = crc8(crc, i_rx_data);
+          ctr_nxt = ctr + 1'b1;
+          case (ctr)
+            0: cmd_nxt = i_rx_data;
+            1: seq_nxt = i_rx_data;
+            2: len_nxt = i_rx_data;
+            default: addr_nxt = {i_rx_data, addr[31:8]};
+          endcase
+          if (ctr == 6) begin
+            ctr_nxt   = 0;
+            state_nxt = len == 0 ? CHECK : PAYLOAD;
+          end
+        end
+      end
+      PAYLOAD: begin
+        o_rx_ready = 1'b1;
+        if (i_rx_valid) begin
+          crc_nxt      = crc8(crc, i_rx_data);
+          ctr_nxt      = ctr + 1'b1;
+          word_nxt     = {i_rx_data, word[23:8]};
+          frame_buf_wr = ctr[1:0] == 2'd3;
+          // a corrupted length still ends in CHECK, where the CRC catches it
+          if (ctr == payload_last || ctr == CTR_WIDTH'(4 * MAX_WORDS - 1)) begin
+            ctr_nxt   = 0;
+            state_nxt = CHECK;
+          end
+        end
+      end
+      CHECK: begin
+        o_rx_ready = 1'b1;
+        if (i_rx_valid) begin
+          if (crc8(crc, i_rx_data) == 0 && header_ok) begin
+            if (seq == expected) state_nxt = COMMIT;
+            else begin
+              // out of order after a loss, or a resend of a frame already written
+              resp_nxt     = ACK;
+              resp_seq_nxt = expected - 1'b1;
+              state_nxt    = RESPOND;
+            end
+          end else if (!nak_sent) begin
+            resp_nxt     = NAK;
+            resp_seq_nxt = expected;
+            nak_sent_nxt = 1'b1;
+            state_nxt    = RESPOND;
+          end else state_nxt = HUNT;
+        end
+      end
+      COMMIT: begin
+        if (ctr == CTR_WIDTH'(len)) begin
+          expected_nxt = expected + 1'b1;
+          nak_sent_nxt = 1'b0;
+          resp_nxt     = ACK;
+          resp_seq_nxt = seq;
+          boot_nxt     = cmd == CMD_BOOT;
+          state_nxt    = RESPOND;
+        end else begin
+          o_mem_wr_en = 1'b1;
+          ctr_nxt     = ctr + 1'b1;
+        end
+      end
+      RESPOND: begin
+        o_tx_valid = 1'b1;
+        o_tx_data  = resp;
+        if (i_tx_ready) state_nxt = RESPOND_SEQ;
+      end
+      RESPOND_SEQ: begin
+        o_tx_valid = 1'b1;
+        o_tx_data  = resp_seq;
+        // the ACK of the BOOT frame is the last thing sent
+        if (i_tx_ready) state_nxt = boot ? DONE : HUNT;
+      end
+      DONE: ;
+    endcase
+  end
+
+  assign o_mem_wr_addr = addr + (32'(ctr) << 2);
+  assign o_mem_wr_data = frame_buf[ctr[IDX_WIDTH-1:0]];
+  assign o_done        = state == DONE;
+
+endmodule
@@ -0,0 +1,107 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : uart_fifo
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   Synchronous FIFO with valid/ready handshaking for UART data buffering
+//   Data falls through to the read port as soon as it is written. A write
+//   while full is dropped and raises o_overflow_err, which is held until the
+//   reader has emptied the FIFO.
+//
+// Parameters:
+//   WORD_WIDTH - Data word width in bits (default: 8)
+//   DEPTH - Number of words held (default: 16)
+//   ALMOST_FULL - Occupancy at which o_almost_full is raised (default: 12)
+
+`default_nettype none
+
+module uart_fifo #(
+    parameter WORD_WIDTH  = 8,
+    parameter DEPTH       = 16,
+    parameter ALMOST_FULL = 12
+) (
+    input wire i_clk,
+    input wire i_rst_n,
+
+    // write interface
+    input  wire [WORD_WIDTH-1:0] i_wr_data,
+    input  wire                  i_wr_valid,
+    output wire                  o_wr_ready,
+
+    // read interface
+    output wire                  o_rd_valid,
+    output wire [WORD_WIDTH-1:0] o_rd_data,
+    input  wire                  i_rd_ready,
+
+    // status
+    output reg  [$clog2(DEPTH+1)-1:0] o_count,
+    output wire                       o_almost_full,
+    output reg                        o_overflow_err
+);
+
+  localparam PTR_WIDTH = DEPTH > 1 ? $clog2(DEPTH) : 1;
+  localparam COUNT_WIDTH = $clog2(DEPTH + 1);
+  localparam [PTR_WIDTH-1:0] LAST = DEPTH - 1;
+  localparam [COUNT_WIDTH-1:0] FULL = DEPTH;
+  localparam [COUNT_WIDTH-1:0] ALMOST_FULL_COUNT = ALMOST_FULL;
+
+  reg  [WORD_WIDTH-1:0] mem                           [0:DEPTH-1];
+  reg  [ PTR_WIDTH-1:0] wr_ptr;
+  reg  [ PTR_WIDTH-1:0] rd_ptr;
+
+  wire                  wr = i_wr_valid && o_wr_ready;
+  wire                  rd = o_rd_valid && i_rd_ready;
+
+  function automatic [PTR_WIDTH-1:0] next(input [PTR_WIDTH-1:0] ptr);
+    next = ptr == LAST ? 0 : ptr + 1'b1;
+  endfunction
+
+  always @(posedge i_clk or negedge i_rst_n) begin
+    if (~i_rst_n) begin
+      wr_ptr         <= 0;
+      rd_ptr         <= 0;
+      o_count        <= 0;
+      o_overflow_err <= 1'b0;
+    end else begin
+      if (wr) wr_ptr <= next(wr_ptr);
+      if (rd) rd_ptr <= next(rd_ptr);
+      if (wr && !rd) o_count <= o_count + 1'b1;
+      else if (rd && !wr) o_count <= o_count - 1'b1;
+
+      if (i_wr_valid && !o_wr_ready) o_overflow_err <= 1'b1;
+      else if (rd && o_count == 1) o_overflow_err <= 1'b0;
+    end
+  end
+
+  always @(posedge i_clk) begin
+    if (wr) mem[wr_ptr] <= i_wr_data;
+  end
+
+  assign o_wr_ready    = o_count != FULL;
+  assign o_rd_valid    = o_count != 0;
+  assign o_rd_data     = mem[rd_ptr];
+  assign o_almost_full = o_count >= ALMOST_FULL_COUNT;
+
+endmodule
@@ -27,11 +27,15 @@
 // Description:
 //   UART receiver module with configurable word width and baud rate
 //   Deserializes UART data stream to parallel data
+//   Words are queued in a FIFO for the reader; words lost to a full FIFO, a
+//   missing stop bit or bad parity are reported on the status outputs
 //
 // Parameters:
 //   WORD_WIDTH - Data word width in bits (default: 8)
 //   OVERSAMPLING - Oversampling factor (default: 16)
 //   BAUD_RATE - Target baud rate (default: 115200)
+//   FIFO_DEPTH - Words buffered before the reader must catch up (default: 16)
+//   FIFO_ALMOST_FULL - Occupancy that raises o_rd_almost_full (default: 12)
 
 `include "platform.vh"
 `default_nettype none
@@ -39,7 +43,9 @@
 module uart_rx #(
     parameter WORD_WIDTH = 8,
     parameter OVERSAMPLING = 16,
-    parameter BAUD_RATE = 115200
+    parameter BAUD_RATE = 115200,
+    parameter FIFO_DEPTH = 16,
+    parameter FIFO_ALMOST_FULL = 12
 ) (
     input wire i_clk,
     input wire i_rst_n,
@@ -48,14 +54,23 @@ module uart_rx #(
     // read interface
     output wire                  o_rd_valid,
     output wire [WORD_WIDTH-1:0] o_rd_data,
-    input  wire                  i_rd_ready
+    input  wire                  i_rd_ready,
+
+    // config
+    input wire i_parity_cfg,
+
+    // status
+    output wire [$clog2(FIFO_DEPTH+1)-1:0] o_rd_count,        // words waiting to be read
+    output wire                            o_rd_almost_full,
+    output wire                            o_overflow_err,    // word lost to a full FIFO
+    output wire                            o_frame_err,       // pulse, no stop bit
+    output wire                            o_parity_err       // pulse, bad parity
 );
 
   localparam DATA_WIDTH = WORD_WIDTH + 1;
 
   // configuration
-  wire parity_cfg = 1'b1;
-  reg  parity;
+  reg parity;
 
   // configuration update
   always @(posedge i_clk or negedge i_rst_n) begin
@@ -63,7 +78,7 @@ module uart_rx #(
       parity <= 1'b0;
     end
     else begin
-      if (parity != parity_cfg && !des_active) parity <= parity_cfg;
+      if (parity != i_parity_cfg && !des_active) parity <= i_parity_cfg;
     end
   end
 
@@ -73,9 +88,8 @@ module uart_rx #(
   wire                  des_active;
   wire [DATA_WIDTH-1:0] data;
 
-  // errors TODO: deal with errors better
+  // errors
   wire                  frame_err;  // edge
-  wire                  parity_err = parity && !parity_ok;  // edge
   wire                  overflow_err;  // level
 
   baud_gen #(
@@ -105,26 +119,29 @@ module uart_rx #(
 
   wire [WORD_WIDTH-1:0] word = parity ? data[DATA_WIDTH-2:0] : data[DATA_WIDTH-1:1];
   wire                  parity_ok = data[DATA_WIDTH-1] == ~(^word);
-  wire                  flag_clear;
-  wire                  flag;
-  wire [WORD_WIDTH-1:0] flag_data;
-  wire                  flag_set = des_done && (parity ? parity_ok : 1'b1);
-
-  flag_buf #(
-      .WORD_WIDTH(WORD_WIDTH)
-  ) flag_buf0 (
+  wire                  parity_err = des_done && parity && !parity_ok;  // edge
+  wire                  fifo_wr = des_done && !parity_err;
+
+  uart_fifo #(
+      .WORD_WIDTH (WORD_WIDTH),
+      .DEPTH      (FIFO_DEPTH),
+      .ALMOST_FULL(FIFO_ALMOST_FULL)
+  ) rx_fifo0 (
       .i_clk         (i_clk),
       .i_rst_n       (i_rst_n),
-      .i_flag_set    (flag_set),
-      .i_flag_clear  (flag_clear),
-      .i_din         (word),
-      .o_flag        (flag),
-      .o_dout        (flag_data),
+      .i_wr_data     (word),
+      .i_wr_valid    (fifo_wr),
+      .o_wr_ready    (),  // a word that does not fit is dropped as an overflow
+      .o_rd_valid    (o_rd_valid),
+      .o_rd_data     (o_rd_data),
+      .i_rd_ready    (i_rd_ready),
+      .o_count       (o_rd_count),
+      .o_almost_full (o_rd_almost_full),
       .o_overflow_err(overflow_err)
   );
 
-  assign o_rd_valid = flag;
-  assign flag_clear = o_rd_valid && i_rd_ready;
-  assign o_rd_data  = flag_data;
+  assign o_overflow_err = overflow_err;
+  assign o_frame_err    = frame_err;
+  assign o_parity_err   = parity_err;
 
 endmodule
@@ -64,6 +64,15 @@ module uart_rx_des #(
   // outputs
   reg [DATA_WIDTH-1:0] d, d_nxt;
 
+  // a start bit is a falling edge, so a line held low after a frame error is not
+  // taken as back to back frames
+  reg din_q;
+
+  always @(posedge i_clk or negedge i_rst_n) begin
+    if (~i_rst_n) din_q <= 1'b0;
+    else din_q <= i_din;
+  end
+
   always @(posedge i_clk or negedge i_rst_n) begin
     if (~i_rst_n) begin
       state    <= IDLE;
@@ -89,7 +98,7 @@ module uart_rx_des #(
 
     case (state)
       IDLE: begin
-        if (~i_din) begin
+        if (din_q && ~i_din) begin
           state_nxt    = START_BIT;
           tick_ctr_nxt = TICK_MID_VAL;
         end
@@ -107,14 +116,14 @@ module uart_rx_des #(
         if (i_tick) begin
           tick_ctr_nxt = tick_ctr - 1;
           if (tick_ctr == 0) begin
-            if (bit_ctr == N) begin
+            d_nxt = {i_din, d[DATA_WIDTH-1 : 1]};
+            // the stop bit is sampled one bit after the last data bit, so back to back
+            // frames are seen in time for the next start bit
+            if (bit_ctr == N - 1) begin
               state_nxt   = STOP_BIT;
               bit_ctr_nxt = 0;
             end
-            else begin
-              bit_ctr_nxt = bit_ctr + 1;
-              d_nxt       = {i_din, d[DATA_WIDTH-1 : 1]};
-            end
+            else bit_ctr_nxt = bit_ctr + 1;
             tick_ctr_nxt = OVERSAMPLING - 1;
           end
         end
@@ -27,16 +27,23 @@
 // Description:
 //   UART transmitter module with configurable word width and baud rate
 //   Serializes parallel data for UART transmission
+//   Words written are queued in a FIFO until the serializer is free
 //
 // Parameters:
 //   WORD_WIDTH - Data word width in bits (default: 8)
 //   OVERSAMPLING - Oversampling factor (default: 16)
 //   BAUD_RATE - Target baud rate (default: 115200)
+//   FIFO_DEPTH - Words that can be written ahead of the serializer (default: 16)
+//   FIFO_ALMOST_FULL - Occupancy that raises o_wr_almost_full (default: 12)
+
+`default_nettype none
 
 module uart_tx #(
     parameter WORD_WIDTH = 8,
     parameter OVERSAMPLING = 16,
-    parameter BAUD_RATE = 115200
+    parameter BAUD_RATE = 115200,
+    parameter FIFO_DEPTH = 16,
+    parameter FIFO_ALMOST_FULL = 12
 ) (
     input wire i_clk,
     input wire i_rst_n,
@@ -48,7 +55,11 @@ module uart_tx #(
     output wire                  o_wr_ready,
 
     // config
-    wire i_parity_cfg,
+    input wire i_parity_cfg,
+
+    // status
+    output wire [$clog2(FIFO_DEPTH+1)-1:0] o_wr_count,       // words waiting to be sent
+    output wire                            o_wr_almost_full,
 
     output wire o_dout
 );
@@ -56,11 +67,9 @@ module uart_tx #(
   wire [WORD_WIDTH-1:0] word;
   wire                  ser_tx_start;
   wire                  ser_active;
-  wire                  flag;
-  wire                  flag_set;
-  wire                  flag_clear;
+  wire                  fifo_valid;
 
-  wire                  overflow_err;
+  reg                   parity;
 
   // configuration update
   always @(posedge i_clk or negedge i_rst_n) begin
@@ -80,26 +89,33 @@ module uart_tx #(
       .i_rst_n   (i_rst_n),
       .i_tick    (i_tick),
       .i_din     (word),
-      .i_tx_start(flag),
+      .i_tx_start(ser_tx_start),
       .i_parity  (parity),
       .o_dout    (o_dout),
       .o_active  (ser_active)
   );
 
 
-  flag_buf #(
-      .WORD_WIDTH(WORD_WIDTH)
-  ) flag_buf0 (
+  // writes only happen with o_wr_ready, so the FIFO never overflows
+  uart_fifo #(
+      .WORD_WIDTH (WORD_WIDTH),
+      .DEPTH      (FIFO_DEPTH),
+      .ALMOST_FULL(FIFO_ALMOST_FULL)
+  ) tx_fifo0 (
       .i_clk         (i_clk),
       .i_rst_n       (i_rst_n),
-      .i_flag_set    (flag_set),
-      .i_flag_clear  (flag_clear),
-      .i_din         (i_wr_data),
-      .o_flag        (flag),
-      .o_dout        (word),
-      .o_overflow_err(overflow_err)
+      .i_wr_data     (i_wr_data),
+      .i_wr_valid    (i_wr_valid),
+      .o_wr_ready    (o_wr_ready),
+      .o_rd_valid    (fifo_valid),
+      .o_rd_data     (word),
+      .i_rd_ready    (!ser_active),
+      .o_count       (o_wr_count),
+      .o_almost_full (o_wr_almost_full),
+      .o_overflow_err()
   );
 
-  assign o_wr_ready = !flag;
+  // the next word is handed to the serializer as soon as it is idle
+  assign ser_tx_start = fifo_valid && !ser_active;
 
 endmodule
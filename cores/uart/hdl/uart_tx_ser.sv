@@ -66,8 +66,10 @@ module uart_tx_ser #(
 
   always @(posedge i_clk or negedge i_rst_n) begin
     if (~i_rst_n) begin
-      d     <= 0;
-      state <= IDLE;
+      d        <= 0;
+      state    <= IDLE;
+      tick_ctr <= 0;
+      bit_ctr  <= 0;
     end
     else begin
       d        <= d_nxt;
@@ -83,7 +85,7 @@ module uart_tx_ser #(
     tick_ctr_nxt = tick_ctr;
     bit_ctr_nxt  = bit_ctr;
 
-    o_dout       = 1'b0;
+    o_dout       = 1'b1;  // line idles high
     case (state)
       IDLE: begin
         if (i_tx_start) begin
@@ -98,7 +100,7 @@ module uart_tx_ser #(
           if (tick_ctr == 0) begin
             state_nxt    = DATA;
             tick_ctr_nxt = OVERSAMPLING - 1;
-            bit_ctr_nxt  = N;
+            bit_ctr_nxt  = N - 1;  // bits left after the one being sent
           end
           else tick_ctr_nxt = tick_ctr - 1;
         end
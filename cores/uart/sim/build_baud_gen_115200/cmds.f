@@ -1 +0,0 @@
-+timescale+1ns/1ps
@@ -27,8 +27,8 @@ from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles
 
 from pathlib import Path
-from cocotb_tools import runner
 import pytest
+from tb_utils import build_cached, get_sim_runner, run_tests
 
 
 @cocotb.test
@@ -48,27 +48,25 @@ async def simple_task(dut):
 
 @pytest.mark.parametrize("baud_rate", [9600, 19200, 115200])
 def test_baud_gen_runner(baud_rate: int):
-    sim = runner.Icarus()
+    sim = get_sim_runner()
 
     core_root = Path(__file__).parent.parent
     hdl_root = core_root / "hdl"
-    sim_root = core_root / "sim"
 
     module = "baud_gen"
-    sources = [f"{module}.v"]
+    sources = [f"{module}.sv"]
     sources = [hdl_root / s for s in sources]
 
-    sim.build(
+    build_cached(
+        sim,
         sources=sources,
         includes=[hdl_root],
         hdl_toplevel=module,
         timescale=("1ns", "1ps"),
-        build_dir=f"{str(sim_root)}/{__name__}/build_{module}_{baud_rate}",
         parameters={
             "BAUD_RATE": baud_rate,
         },
-        waves=True,
     )
 
-    test_opts = {"test_module": "test_baud_gen,", "waves": True}
-    sim.test(hdl_toplevel=module, **test_opts)
+    test_opts = {"test_module": "test_baud_gen,"}
+    run_tests(sim, hdl_toplevel=module, **test_opts)
@@ -0,0 +1,191 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+cocotb testbench for uart_boot, uploading program images into insnmem
+
+The host side is BootSession from tools/uart_boot.py, with UartSource sending
+its frames back to back while the window allows and UartSink collecting the
+replies as they arrive. Once the BOOT frame has been acknowledged the image is
+fetched back through insnmem word by word.
+"""
+
+import random
+from pathlib import Path
+
+import cocotb
+import pytest
+from cocotb.triggers import FallingEdge, ReadOnly, RisingEdge, SimTimeoutError
+from cocotb.triggers import with_timeout
+from cocotb.utils import get_sim_time
+from tb_utils import build_cached, get_sim_runner, run_tests, tb_init_base
+from uart_bfm import UartSink, UartSource
+
+from gen_hex_data import generate_insns
+from hexfile import read_hex, to_words, write_hex
+from uart_boot import ACK, HEADER_BYTES, MAX_WORDS, NAK, BootSession
+
+IMAGE_WORDS = 1000  # not a whole number of frames
+
+
+async def init_dut(dut) -> tuple[UartSource, UartSink]:
+    baud_rate = dut.BAUD_RATE.value.to_unsigned()
+    dut.i_pc.value = 0
+    source = UartSource(dut.i_rx, dut.i_clk, baud_rate)
+    sink = UartSink(dut.o_tx, baud_rate)
+    await tb_init_base(dut)
+    sink.start()
+    return source, sink
+
+
+def make_image(n_words: int) -> bytes:
+    """Random instructions from RANDOM_SEED, as a hex file the uploader would read"""
+    path = Path(f"uart_boot_{n_words}.hex")
+    write_hex(path, generate_insns(random.Random(cocotb.RANDOM_SEED), n_words))
+    return bytes(read_hex(path))
+
+
+async def upload(session: BootSession, source: UartSource, sink: UartSink, corrupt=()):
+    """Run a session, damaging the frames in `corrupt` the first time they are sent"""
+    damaged = set()
+    replies = []
+    # a full window of the largest frames and their replies
+    timeout_ns = (
+        2 * session.window * (HEADER_BYTES + 4 * MAX_WORDS + 3) * source.frame_ns
+    )
+
+    def take_replies():
+        while not sink.queue.empty():
+            replies.append(sink.queue.get_nowait())
+        while len(replies) >= 2:
+            if replies[0] not in (ACK, NAK):
+                del replies[0]
+                continue
+            session.on_response(replies.pop(0), replies.pop(0))
+
+    while not session.done:
+        frame = session.next_frame()
+        if frame is not None:
+            seq = frame[2]
+            if seq in corrupt and seq not in damaged:
+                damaged.add(seq)
+                frame = bytearray(frame)
+                frame[-2] ^= 0x10
+            await source.send(frame)
+            take_replies()
+            continue
+        # the window is full, wait for the receiver
+        try:
+            replies.append(await with_timeout(sink.recv(), timeout_ns, "ns"))
+        except SimTimeoutError:
+            session.rewind()
+            replies.clear()
+        take_replies()
+
+
+async def read_back(dut, n_words: int) -> list[int]:
+    """Fetch words 0 to n_words - 1 through the insnmem fetch port"""
+    words = []
+    falling, rising = FallingEdge(dut.i_clk), RisingEdge(dut.i_clk)
+    for i in range(n_words):
+        await falling
+        dut.i_pc.value = 4 * i
+        await rising
+        await ReadOnly()
+        words.append(dut.o_insn.value.to_unsigned())
+    return words
+
+
+@cocotb.test()
+async def upload_image(dut):
+    """upload an image at full rate and check it word by word"""
+    source, sink = await init_dut(dut)
+    image = make_image(IMAGE_WORDS)
+    session = BootSession(image)
+
+    start_ns = get_sim_time("ns")
+    await upload(session, source, sink)
+    elapsed_s = (get_sim_time("ns") - start_ns) * 1e-9
+    # uart_boot is done once the last ACK is queued, before it reaches the host
+    assert dut.o_done.value == 1
+
+    line_rate = 1e9 / source.frame_ns
+    dut._log.info(
+        f"{len(image)} bytes in {len(session.frames)} frames, "
+        f"{len(image) / elapsed_s:,.0f} bytes/s of {line_rate:,.0f} bytes/s line rate"
+    )
+    assert session.resent == 0
+    assert await read_back(dut, IMAGE_WORDS) == to_words(image).tolist()
+
+
+@cocotb.test()
+async def upload_with_errors(dut):
+    """corrupted frames are NAKed and sent again from the first bad one"""
+    source, sink = await init_dut(dut)
+    image = make_image(IMAGE_WORDS // 2)
+    session = BootSession(image, window=4)
+
+    await upload(session, source, sink, corrupt={1, 3, len(session.frames) - 1})
+    # uart_boot is done once the last ACK is queued, before it reaches the host
+    assert dut.o_done.value == 1
+
+    dut._log.info(f"{session.resent} frames resent")
+    assert session.resent > 0
+    assert await read_back(dut, IMAGE_WORDS // 2) == to_words(image).tolist()
+
+
+@pytest.mark.parametrize("baud_rate", [1_000_000, 3_125_000])
+def test_uart_boot_runner(baud_rate: int):
+    sim = get_sim_runner()
+
+    tests_root = Path(__file__).parent
+    core_root = tests_root.parent
+    hdl_root = core_root / "hdl"
+    cpu_hdl_root = core_root.parent / "cpu" / "hdl"
+
+    module = "uart_boot_harness"
+    sources = [
+        hdl_root / s
+        for s in [
+            "uart_boot.sv",
+            "uart_rx.sv",
+            "uart_rx_des.sv",
+            "uart_tx.sv",
+            "uart_tx_ser.sv",
+            "uart_fifo.sv",
+            "baud_gen.sv",
+        ]
+    ]
+
+    build_cached(
+        sim,
+        sources=[cpu_hdl_root / "insnmem.sv", *sources, tests_root / f"{module}.sv"],
+        includes=[hdl_root, core_root.parent, cpu_hdl_root],
+        hdl_toplevel=module,
+        timescale=("1ns", "1ps"),
+        parameters={"BAUD_RATE": baud_rate},
+    )
+
+    test_opts = {
+        "test_module": "test_uart_boot,",
+    }
+    run_tests(sim, hdl_toplevel=module, **test_opts)
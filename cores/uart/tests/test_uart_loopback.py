@@ -0,0 +1,178 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Loopback throughput bench for uart_tx into uart_rx
+
+Streams a random payload through uart_loopback.sv as fast as uart_tx accepts
+it and reports the sustained rate against the line rate, for every
+BAUD_RATE/WORD_WIDTH/parity combination the runner builds. uart_rx is kept
+ready, so any overrun flagged by its FIFO is a failure; not_ready checks the
+FIFO holds FIFO_DEPTH words for a stalled reader and flags the ones after.
+"""
+
+import os
+from pathlib import Path
+from random import getrandbits
+
+import cocotb
+import pytest
+from cocotb.triggers import ReadOnly, RisingEdge, Timer, with_timeout
+from cocotb.utils import get_sim_time
+from tb_utils import build_cached, get_sim_runner, run_tests, tb_init_base
+from uart_bfm import (
+    CLK_PERIOD_NS,
+    PulseCounter,
+    UartRxMonitor,
+    UartSink,
+    UartTxWriter,
+    bit_cycles,
+)
+
+# simulated clock cycles the throughput test may spend on traffic
+STREAM_CYCLES = 2_000_000
+# sustained rate expected as a fraction of what baud_gen's divisor allows
+MIN_EFFICIENCY = 0.95
+
+
+class Params:
+    """Build parameters of the DUT, read back once"""
+
+    def __init__(self, dut) -> None:
+        self.baud_rate = dut.BAUD_RATE.value.to_unsigned()
+        self.word_width = dut.WORD_WIDTH.value.to_unsigned()
+        self.fifo_depth = dut.FIFO_DEPTH.value.to_unsigned()
+        self.parity = bool(int(os.getenv("TB_PARITY", "0")))
+        self.frame_bits = 2 + self.word_width + self.parity
+        self.frame_ns = self.frame_bits * bit_cycles(self.baud_rate) * CLK_PERIOD_NS
+
+
+async def init_dut(dut) -> Params:
+    params = Params(dut)
+    dut.i_parity_cfg.value = int(params.parity)
+    dut.i_rd_ready.value = 0
+    dut.i_wr_valid.value = 0
+    await tb_init_base(dut)
+    return params
+
+
+@cocotb.test()
+async def throughput(dut):
+    """stream a random payload back to back and measure the sustained rate"""
+    params = await init_dut(dut)
+    n = max(16, min(4096, STREAM_CYCLES * CLK_PERIOD_NS // params.frame_ns))
+    payload = [getrandbits(params.word_width) for _ in range(n)]
+
+    rx = UartRxMonitor(dut)
+    line = UartSink(dut.o_line, params.baud_rate, params.word_width, params.parity)
+    overruns = PulseCounter(dut.o_overflow_err)
+    rx.start()
+    line.start()
+
+    start_ns = get_sim_time("ns")
+    cocotb.start_soon(UartTxWriter(dut).send(payload))
+    timeout_ns = 2 * n * params.frame_ns
+    received = await with_timeout(rx.recv(n), timeout_ns, "ns")
+    elapsed_s = (get_sim_time("ns") - start_ns) * 1e-9
+
+    achieved = n / elapsed_s
+    nominal = params.baud_rate / params.frame_bits
+    ceiling = 1e9 / params.frame_ns
+    dut._log.info(
+        f"{params.baud_rate} baud, {params.word_width} bits, "
+        f"parity {'ON' if params.parity else 'OFF'}: {n} words, "
+        f"{achieved:,.0f} words/s sustained, line rate {nominal:,.0f} words/s "
+        f"({100 * achieved / nominal:.1f}%, divisor allows {ceiling:,.0f})"
+    )
+
+    assert received == payload
+    assert await line.recv(n) == payload
+    assert line.parity_errors == 0 and line.frame_errors == 0
+    assert overruns.count == 0, f"{overruns.count} overruns with the reader ready"
+    assert achieved >= MIN_EFFICIENCY * ceiling
+
+
+@cocotb.test()
+async def not_ready(dut):
+    """a stalled reader gets the first FIFO_DEPTH words, the rest are flagged"""
+    params = await init_dut(dut)
+    depth = params.fifo_depth
+    overruns = PulseCounter(dut.o_overflow_err)
+
+    payload = [getrandbits(params.word_width) for _ in range(depth + 3)]
+    await UartTxWriter(dut).send(payload)
+    timeout_ns = (depth + 3) * params.frame_ns
+    await with_timeout(RisingEdge(dut.o_overflow_err), timeout_ns, "ns")
+    # let the words after the first lost one arrive, and be lost too
+    await Timer(3 * params.frame_ns, unit="ns")
+
+    assert overruns.count == 1
+    assert dut.o_rd_count.value.to_unsigned() == depth
+
+    # draining the FIFO returns the words that fitted and clears the flag
+    rx = UartRxMonitor(dut)
+    rx.start()
+    assert await rx.recv(depth) == payload[:depth]
+    # the last word is taken on the next edge
+    await RisingEdge(dut.i_clk)
+    await ReadOnly()
+    assert dut.o_rd_valid.value == 0
+    assert dut.o_overflow_err.value == 0
+
+
+@pytest.mark.parametrize("parity", ["0", "1"])
+@pytest.mark.parametrize("word_width", [5, 8, 9])
+@pytest.mark.parametrize("baud_rate", [9600, 115200, 3_125_000])
+def test_uart_loopback_runner(baud_rate: int, word_width: int, parity: str):
+    sim = get_sim_runner()
+
+    tests_root = Path(__file__).parent
+    core_root = tests_root.parent
+    hdl_root = core_root / "hdl"
+
+    module = "uart_loopback"
+    sources = [
+        hdl_root / s
+        for s in [
+            "uart_tx.sv",
+            "uart_tx_ser.sv",
+            "uart_rx.sv",
+            "uart_rx_des.sv",
+            "uart_fifo.sv",
+            "baud_gen.sv",
+        ]
+    ]
+
+    build_cached(
+        sim,
+        sources=[tests_root / f"{module}.sv", *sources],
+        includes=[hdl_root, core_root.parent],
+        hdl_toplevel=module,
+        timescale=("1ns", "1ps"),
+        parameters={"BAUD_RATE": baud_rate, "WORD_WIDTH": word_width},
+    )
+
+    test_opts = {
+        "test_module": "test_uart_loopback,",
+        "extra_env": {"TB_PARITY": parity},
+    }
+    run_tests(sim, hdl_toplevel=module, **test_opts)
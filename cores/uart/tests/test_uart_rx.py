@@ -23,77 +23,46 @@
 # Smoke test for UART module
 
 import cocotb
-from cocotb.clock import Clock
-from cocotb.triggers import ClockCycles, RisingEdge, Timer
+from cocotb.triggers import ClockCycles, ReadOnly, RisingEdge, with_timeout
 from random import getrandbits, randint
-import logging
 
 import os
 from pathlib import Path
-from cocotb_tools import runner
 import pytest
+from tb_utils import build_cached, get_sim_runner, run_tests, tb_init_base
+from uart_bfm import CLK_PERIOD_NS, PulseCounter, UartRxMonitor, UartSource
 
+# simulated clock cycles the stress test may spend on traffic
+STRESS_CYCLES = 2_000_000
 
-class UartTxDriver:
-    def __init__(self, dut_din, baud_rate: int, word_width: int, parity: bool):
-        self.tx = dut_din
-        self.baud_rate = baud_rate
-        self.word_width = word_width
-        self.parity = parity
-        self.log = logging.getLogger(f"cocotb.{dut_din._path}")
-
-        self.tx.value = 1
-        self.log.info(f"UART TX driver: parity {'ON' if parity else 'OFF'}")
-
-    async def send_byte(self, data):
-        brt = Timer(int(1e9 / self.baud_rate), units="ns")
-        to_send = data
-        self.log.info(f"sending byte 0x{data:02x}")
-        # start bit
-        self.tx.value = 0
-        await brt
-        # data bits
-        data_len = self.word_width + 1 if self.parity else self.word_width
-        parity_val = ~(to_send.bit_count() % 2)
-        to_send |= parity_val << self.word_width
-        for i in range(data_len):
-            self.tx.value = (to_send >> i) & 1
-            await brt
-        # stop bit
-        self.tx.value = 1
-        await brt
-
-
-async def init_dut(dut) -> UartTxDriver:
+
+async def init_dut(dut) -> UartSource:
     BAUD_RATE = dut.BAUD_RATE.value.to_unsigned()
     WORD_WIDTH = dut.WORD_WIDTH.value.to_unsigned()
     parity = int(os.getenv("TB_PARITY", ""))
     dut.i_parity_cfg.value = parity
-    # clock & reset
-    cocotb.start_soon(Clock(dut.i_clk, 10, units="ns").start())
-    dut.i_rst_n.value = 0
-    await ClockCycles(dut.i_clk, 3)
-    dut.i_rst_n.value = 1
+    dut.i_rd_ready.value = 0
 
-    return UartTxDriver(dut.i_din, BAUD_RATE, WORD_WIDTH, bool(parity))
+    uart_tx = UartSource(dut.i_din, dut.i_clk, BAUD_RATE, WORD_WIDTH, bool(parity))
+    dut._log.info(f"UART TX driver: parity {'ON' if parity else 'OFF'}")
+    await tb_init_base(dut)
+    return uart_tx
 
 
 @cocotb.test
 async def one_byte(dut):
     WORD_WIDTH = dut.WORD_WIDTH.value.to_unsigned()
     uart_tx = await init_dut(dut)
+    monitor = UartRxMonitor(dut)
+    monitor.start()
 
     # add some "aysnchronicity"
-    await ClockCycles(dut.i_clk, randint(2, dut.baud_gen0.M.value.to_unsigned()))
+    await ClockCycles(dut.i_clk, randint(2, 64))
 
-    dut.i_rd_ready.value = 1
     to_send = getrandbits(WORD_WIDTH)
-    await uart_tx.send_byte(to_send)
-
-    while int(dut.o_rd_valid.value) != 1:
-        await RisingEdge(dut.i_clk)
+    await uart_tx.send(to_send)
 
-    received = int(dut.o_rd_data.value)
+    received = await monitor.recv()
     dut._log.info(f"byte received: 0x{received:02x}")
     assert received == to_send
 
@@ -102,93 +71,189 @@ async def one_byte(dut):
 
 @cocotb.test()
 async def stress_test(dut):
-    """send bytes consecutively with variable delay"""
+    """send bursts of back to back bytes with variable idle time between them"""
 
     WORD_WIDTH = dut.WORD_WIDTH.value.to_unsigned()
     uart_tx = await init_dut(dut)
-    dut.i_rd_ready.value = 1
-
-    target = 20
-    for _ in range(target):
-        # add some "aysnchronicity"
-        tick_cycles = dut.baud_gen0.M.value.to_unsigned()
-        await ClockCycles(dut.i_clk, randint(0, 3 * tick_cycles))
-
-        to_send = getrandbits(WORD_WIDTH)
-        await uart_tx.send_byte(to_send)
-
-        while int(dut.o_rd_valid.value) != 1:
-            await RisingEdge(dut.i_clk)
-
-        received = int(dut.o_rd_data.value)
-        dut._log.info(f"byte received: 0x{received:02x}")
-        assert received == to_send
+    monitor = UartRxMonitor(dut)
+    monitor.start()
+
+    frame_cycles = uart_tx.frame_ns // CLK_PERIOD_NS
+    target = max(20, min(4096, STRESS_CYCLES // frame_cycles))
+    sent = []
+    while len(sent) < target:
+        burst = [getrandbits(WORD_WIDTH) for _ in range(randint(1, 64))]
+        burst = burst[: target - len(sent)]
+        # add some "aysnchronicity" between bursts, none within them
+        await uart_tx.idle(randint(0, 3 * uart_tx.frame_bits))
+        await uart_tx.send(burst)
+        sent += burst
+
+    # the last frame is still being deserialised when send() returns
+    received = await with_timeout(monitor.recv(len(sent)), 2 * uart_tx.frame_ns, "ns")
+    monitor.stop()
+    assert received == sent
 
     dut._log.info(f"sent {target} bytes, stress test finished")
 
 
 @cocotb.test()
 async def not_ready(dut):
-    """tests valid/ready interface"""
+    """words sent back to back while the reader is not ready wait in the FIFO"""
 
     WORD_WIDTH = dut.WORD_WIDTH.value.to_unsigned()
+    FIFO_DEPTH = dut.FIFO_DEPTH.value.to_unsigned()
+    FIFO_ALMOST_FULL = dut.FIFO_ALMOST_FULL.value.to_unsigned()
     uart_tx = await init_dut(dut)
 
-    dut.i_rd_ready.value = 0
     # add some "aysnchronicity"
-    await ClockCycles(dut.i_clk, randint(2, dut.baud_gen0.M.value.to_unsigned()))
+    await ClockCycles(dut.i_clk, randint(2, 64))
+
+    sent = [getrandbits(WORD_WIDTH) for _ in range(FIFO_DEPTH)]
+    for i, word in enumerate(sent):
+        await uart_tx.send(word)
+        # the stop bit is sampled half way through, the word is already queued
+        assert dut.o_rd_count.value.to_unsigned() == i + 1
+        assert dut.o_rd_almost_full.value == (i + 1 >= FIFO_ALMOST_FULL)
+        assert dut.o_rd_valid.value == 1
+
+    assert dut.o_overflow_err.value == 0
+
+    monitor = UartRxMonitor(dut)
+    monitor.start()
+    received = await with_timeout(monitor.recv(FIFO_DEPTH), uart_tx.frame_ns, "ns")
+    assert received == sent
+    # the last word is taken on the next edge
+    await RisingEdge(dut.i_clk)
+    await ReadOnly()
+    assert dut.o_rd_count.value.to_unsigned() == 0
 
+    dut._log.info("not ready test finished")
+
+
+@cocotb.test()
+async def overrun(dut):
+    """a burst longer than the FIFO loses the words that do not fit"""
+
+    WORD_WIDTH = dut.WORD_WIDTH.value.to_unsigned()
+    FIFO_DEPTH = dut.FIFO_DEPTH.value.to_unsigned()
+    uart_tx = await init_dut(dut)
+    overflows = PulseCounter(dut.o_overflow_err)
+
+    sent = [getrandbits(WORD_WIDTH) for _ in range(FIFO_DEPTH + 4)]
+    await uart_tx.send(sent)
+    await uart_tx.idle(uart_tx.frame_bits)
+
+    assert overflows.count == 1
+    assert dut.o_overflow_err.value == 1
+    assert dut.o_rd_count.value.to_unsigned() == FIFO_DEPTH
+
+    # the flag is held until the reader has caught up
+    monitor = UartRxMonitor(dut)
+    monitor.start()
+    received = await with_timeout(monitor.recv(FIFO_DEPTH), uart_tx.frame_ns, "ns")
+    assert received == sent[:FIFO_DEPTH]
+    # the last word is taken on the next edge
+    await RisingEdge(dut.i_clk)
+    await ReadOnly()
+    assert dut.o_overflow_err.value == 0
+
+    # nothing else was queued and new words are received again
     to_send = getrandbits(WORD_WIDTH)
-    await uart_tx.send_byte(to_send)
+    await uart_tx.send(to_send)
+    assert await with_timeout(monitor.recv(), uart_tx.frame_ns, "ns") == to_send
+    assert monitor.count == FIFO_DEPTH + 1
 
-    while int(dut.o_rd_valid.value) != 1:
-        await RisingEdge(dut.i_clk)
+    dut._log.info("overrun test finished")
 
-    received = int(dut.o_rd_data.value)
-    dut._log.info(f"byte received: 0x{received:02x}")
-    assert received == to_send
 
-    # check that data is not read
-    for _ in range(5):
-        await RisingEdge(dut.i_clk)
-        assert int(dut.o_rd_valid.value) == 1
+@cocotb.test()
+async def frame_error(dut):
+    """a frame without its stop bit is dropped and the receiver resynchronises"""
 
-    dut._log.info("not ready test finished")
+    WORD_WIDTH = dut.WORD_WIDTH.value.to_unsigned()
+    uart_tx = await init_dut(dut)
+    frame_errors = PulseCounter(dut.o_frame_err)
+    monitor = UartRxMonitor(dut)
+    monitor.start()
+
+    before = [getrandbits(WORD_WIDTH) for _ in range(8)]
+    after = [getrandbits(WORD_WIDTH) for _ in range(8)]
+    bad = uart_tx.frame(getrandbits(WORD_WIDTH))
+    bad[-1] = 0
+
+    await uart_tx.send(before)
+    await uart_tx.send_bits(bad)
+    # the next start bit needs a falling edge, so the line has to go idle first
+    await uart_tx.idle(1)
+    await uart_tx.send(after)
+
+    received = await with_timeout(monitor.recv(16), 2 * uart_tx.frame_ns, "ns")
+    assert received == before + after
+    assert frame_errors.count == 1
+
+    dut._log.info("frame error test finished")
+
+
+@cocotb.test()
+async def parity_error(dut):
+    """a word with a bad parity bit is dropped without breaking the burst"""
+
+    WORD_WIDTH = dut.WORD_WIDTH.value.to_unsigned()
+    uart_tx = await init_dut(dut)
+    if not uart_tx.parity:
+        cocotb.pass_test("parity is disabled")
+
+    parity_errors = PulseCounter(dut.o_parity_err)
+    monitor = UartRxMonitor(dut)
+    monitor.start()
+
+    sent = [getrandbits(WORD_WIDTH) for _ in range(16)]
+    bad = {3, 4, 11}
+    bits = []
+    for i, word in enumerate(sent):
+        frame = uart_tx.frame(word)
+        if i in bad:
+            frame[-2] ^= 1
+        bits += frame
+    await uart_tx.send_bits(bits)
 
+    expected = [word for i, word in enumerate(sent) if i not in bad]
+    received = await with_timeout(monitor.recv(len(expected)), uart_tx.frame_ns, "ns")
+    assert received == expected
+    assert parity_errors.count == len(bad)
 
-# TODO: test parity error, frame error, buffer overrun error
+    dut._log.info("parity error test finished")
 
 
+@pytest.mark.parametrize("baud_rate", [115200, 3_125_000])
 @pytest.mark.parametrize("parity", ["0", "1"])
-def test_uart_rx_runner(parity: int):
-    sim = runner.Icarus()
+def test_uart_rx_runner(parity: int, baud_rate: int):
+    sim = get_sim_runner()
 
     core_root = Path(__file__).parent.parent
     hdl_root = core_root / "hdl"
-    sim_root = core_root / "sim"
 
     module = "uart_rx"
     sources = [
-        f"{module}.v",
-        "flag_buf.v",
-        "uart_rx_des.v",
-        "baud_gen.v",
+        f"{module}.sv",
+        "uart_fifo.sv",
+        "uart_rx_des.sv",
+        "baud_gen.sv",
     ]
     sources = [hdl_root / s for s in sources]
 
-    sim.build(
+    build_cached(
+        sim,
         sources=sources,
-        includes=[hdl_root],
+        includes=[hdl_root, core_root.parent],
         hdl_toplevel=module,
         timescale=("1ns", "1ps"),
-        build_dir=f"{str(sim_root)}/{__name__}/build_{module}_{parity}",
-        clean=True,
-        waves=True,
+        parameters={"BAUD_RATE": baud_rate},
     )
 
     test_opts = {
         "test_module": "test_uart_rx,",
-        "waves": True,
         "extra_env": {"TB_PARITY": parity},
     }
-    sim.test(hdl_toplevel=module, **test_opts)
+    run_tests(sim, hdl_toplevel=module, **test_opts)
@@ -0,0 +1,268 @@
+# MIT License
+#
+# Copyright (c) 2025 Matias Wang Silva
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Cycle-accurate UART bus functional models for the uart cores
+
+UartSource drives frames onto a serial input. A burst of frames is turned into
+runs of equal bits and each run is a single Timer lasting a whole number of
+clock cycles, so a frame costs a few simulator callbacks instead of one per bit
+(or per clock), and bit boundaries stay on the clock edges baud_gen counts.
+
+UartRxMonitor collects words from the uart_rx read interface, waking on rising
+edges of o_rd_valid rather than polling every clock while the FIFO is empty.
+UartTxWriter feeds the uart_tx write interface, and UartSink decodes a serial
+output independently of uart_rx, sampling each bit once in its middle.
+"""
+
+import itertools
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+import cocotb
+from cocotb.queue import Queue
+from cocotb.triggers import FallingEdge, ReadOnly, RisingEdge, Timer
+from cocotb.utils import get_sim_time
+
+SIM_FREQ = 100_000_000  # SYSFREQ in platform.vh when not synthesising
+CLK_PERIOD_NS = 10
+OVERSAMPLING = 16
+
+
+def bit_cycles(baud_rate: int, freq: int = SIM_FREQ, oversampling: int = OVERSAMPLING):
+    """Clock cycles per bit, with the divisor rounded up as baud_gen does"""
+    oversampling_freq = oversampling * baud_rate
+    return oversampling * ((freq + oversampling_freq - 1) // oversampling_freq)
+
+
+def parity_bit(word: int) -> int:
+    """Odd parity, as generated by uart_tx_ser and checked by uart_rx"""
+    return (word.bit_count() + 1) % 2
+
+
+class UartSource:
+    """Drives UART frames onto a serial line, a whole burst at a time"""
+
+    def __init__(
+        self,
+        line,
+        clk,
+        baud_rate: int,
+        word_width: int = 8,
+        parity: bool = False,
+        clk_period_ns: int = CLK_PERIOD_NS,
+    ) -> None:
+        self.line = line
+        self.clk = clk
+        self.word_width = word_width
+        self.parity = parity
+        self.bit_ns = clk_period_ns * bit_cycles(baud_rate, round(1e9 / clk_period_ns))
+        self._timers: dict[int, Timer] = {}
+        self._end_ns = None  # when the last burst finished
+        line.value = 1
+
+    @property
+    def frame_bits(self) -> int:
+        """Bit times in one frame: start, data, parity if enabled, stop"""
+        return 2 + self.word_width + self.parity
+
+    @property
+    def frame_ns(self) -> int:
+        return self.frame_bits * self.bit_ns
+
+    def frame(self, word: int) -> list[int]:
+        """Line levels for one frame, start bit first"""
+        bits = [0] + [(word >> i) & 1 for i in range(self.word_width)]
+        if self.parity:
+            bits.append(parity_bit(word))
+        return bits + [1]
+
+    def _timer(self, bits: int) -> Timer:
+        timer = self._timers.get(bits)
+        if timer is None:
+            timer = self._timers[bits] = Timer(bits * self.bit_ns, unit="ns")
+        return timer
+
+    async def send_bits(self, bits: Iterable[int]) -> None:
+        """Drive raw line levels for one bit time each"""
+        if self._end_ns != get_sim_time("ns"):
+            # start on a clock edge, every run after it lasts whole cycles
+            await RisingEdge(self.clk)
+        for level, run in itertools.groupby(bits):
+            self.line.value = level
+            await self._timer(sum(1 for _ in run))
+        self._end_ns = get_sim_time("ns")
+
+    async def send(self, data: int | Iterable[int], gap_bits: int = 0) -> None:
+        """Send a word or a burst of words, `gap_bits` idle bit times apart"""
+        words = [data] if isinstance(data, int) else data
+        idle = [1] * gap_bits
+        frames = (self.frame(word) + idle for word in words)
+        await self.send_bits(itertools.chain.from_iterable(frames))
+
+    async def idle(self, bits: int) -> None:
+        """Hold the line idle for `bits` bit times"""
+        await self.send_bits([1] * bits)
+
+
+class Monitor(ABC):
+    """Background coroutine queueing the words it observes"""
+
+    def __init__(self) -> None:
+        self.queue: Queue[int] = Queue()
+        self.count = 0
+        self._task = None
+
+    def start(self) -> None:
+        self._task = cocotb.start_soon(self._monitor())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _put(self, word: int) -> None:
+        self.queue.put_nowait(word)
+        self.count += 1
+
+    @abstractmethod
+    async def _monitor(self) -> None:
+        """Watch the interface forever, calling _put() for every word"""
+
+    async def recv(self, n: int | None = None) -> int | list[int]:
+        """Wait for the next word, or for the next `n` words"""
+        if n is None:
+            return await self.queue.get()
+        return [await self.queue.get() for _ in range(n)]
+
+
+class PulseCounter:
+    """Counts rising edges of a status output, such as uart_rx's error pulses"""
+
+    def __init__(self, signal) -> None:
+        self.signal = signal
+        self.count = 0
+        self._task = cocotb.start_soon(self._count())
+
+    async def _count(self) -> None:
+        edge = RisingEdge(self.signal)
+        while True:
+            await edge
+            self.count += 1
+
+
+class UartRxMonitor(Monitor):
+    """Collects words read from uart_rx, which it keeps ready
+
+    The monitor sleeps until o_rd_valid rises. When the FIFO drains several
+    words back to back, valid stays high, so the monitor takes one word per
+    clock until it falls.
+    """
+
+    def __init__(self, dut) -> None:
+        super().__init__()
+        self.dut = dut
+
+    async def _monitor(self) -> None:
+        valid, data = self.dut.o_rd_valid, self.dut.o_rd_data
+        edge, clk = RisingEdge(valid), RisingEdge(self.dut.i_clk)
+        # away from the rising edge, so a word already waiting is not taken unseen
+        await FallingEdge(self.dut.i_clk)
+        self.dut.i_rd_ready.value = 1
+        while True:
+            await ReadOnly()
+            if not valid.value:
+                await edge
+                await ReadOnly()
+            self._put(data.value.to_unsigned())
+            # the word is taken on this edge
+            await clk
+
+
+class UartSink(Monitor):
+    """Decodes frames from a serial line, counting parity and framing errors"""
+
+    def __init__(
+        self,
+        line,
+        baud_rate: int,
+        word_width: int = 8,
+        parity: bool = False,
+        clk_period_ns: int = CLK_PERIOD_NS,
+    ) -> None:
+        super().__init__()
+        self.line = line
+        self.word_width = word_width
+        self.parity = parity
+        self.bit_ns = clk_period_ns * bit_cycles(baud_rate, round(1e9 / clk_period_ns))
+        self.parity_errors = 0
+        self.frame_errors = 0
+
+    async def _monitor(self) -> None:
+        line = self.line
+        start = FallingEdge(line)
+        half_bit = Timer(self.bit_ns // 2, unit="ns")
+        bit = Timer(self.bit_ns, unit="ns")
+        while True:
+            await start
+            await half_bit
+            if line.value:
+                continue  # too short for a start bit
+            word = 0
+            for i in range(self.word_width):
+                await bit
+                word |= int(line.value) << i
+            if self.parity:
+                await bit
+                self.parity_errors += int(line.value) != parity_bit(word)
+            await bit
+            self.frame_errors += not line.value
+            self._put(word)
+
+
+class UartTxWriter:
+    """Writes words into the uart_tx valid/ready interface as fast as it takes them
+
+    Inputs change on the falling clock edge, so a word is accepted on the next
+    rising edge that finds o_wr_ready high.
+    """
+
+    def __init__(self, dut) -> None:
+        self.dut = dut
+        dut.i_wr_valid.value = 0
+
+    async def send(self, data: int | Iterable[int]) -> None:
+        """Write a word or a burst of words"""
+        dut = self.dut
+        words = [data] if isinstance(data, int) else data
+        falling, rising = FallingEdge(dut.i_clk), RisingEdge(dut.i_clk)
+        ready = RisingEdge(dut.o_wr_ready)
+        for word in words:
+            await falling
+            dut.i_wr_data.value = word
+            dut.i_wr_valid.value = 1
+            while not dut.o_wr_ready.value:
+                await ready
+                await falling
+            await rising
+        await falling
+        dut.i_wr_valid.value = 0
@@ -0,0 +1,139 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : uart_boot_harness
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   Test harness for the UART bootloader path into instruction memory
+//   uart_rx feeds uart_boot, which answers through uart_tx and writes insnmem
+//   through its load port. The insnmem fetch port is brought out so the
+//   testbench can read the loaded image back.
+//
+// Parameters:
+//   BAUD_RATE - Target baud rate (default: 115200)
+//   IMEM_SIZE - Instruction memory size in bytes (default: 4096)
+
+`include "platform.vh"
+`default_nettype none
+
+module uart_boot_harness #(
+    parameter BAUD_RATE = 115200,
+    parameter IMEM_SIZE = 4096
+) (
+    input wire i_clk,
+    input wire i_rst_n,
+
+    // serial lines, host side
+    input  wire i_rx,
+    output wire o_tx,
+
+    // instruction fetch
+    input  wire [31:0] i_pc,
+    output wire [31:0] o_insn,
+
+    output wire o_done
+);
+
+  wire        rx_valid;
+  wire [ 7:0] rx_data;
+  wire        rx_ready;
+  wire        tx_valid;
+  wire [ 7:0] tx_data;
+  wire        tx_ready;
+  wire        tx_tick;
+
+  wire        mem_wr_en;
+  wire [31:0] mem_wr_addr;
+  wire [31:0] mem_wr_data;
+
+  baud_gen #(
+      .FREQ     (`SYSFREQ),
+      .BAUD_RATE(BAUD_RATE)
+  ) baud_gen0 (
+      .i_clk  (i_clk),
+      .i_rst_n(i_rst_n),
+      .o_tick (tx_tick)
+  );
+
+  uart_rx #(
+      .BAUD_RATE(BAUD_RATE)
+  ) uart_rx0 (
+      .i_clk           (i_clk),
+      .i_rst_n         (i_rst_n),
+      .i_din           (i_rx),
+      .o_rd_valid      (rx_valid),
+      .o_rd_data       (rx_data),
+      .i_rd_ready      (rx_ready),
+      .i_parity_cfg    (1'b0),
+      .o_rd_count      (),
+      .o_rd_almost_full(),
+      .o_overflow_err  (),
+      .o_frame_err     (),
+      .o_parity_err    ()
+  );
+
+  uart_tx #(
+      .BAUD_RATE(BAUD_RATE)
+  ) uart_tx0 (
+      .i_clk           (i_clk),
+      .i_rst_n         (i_rst_n),
+      .i_tick          (tx_tick),
+      .i_wr_data       (tx_data),
+      .i_wr_valid      (tx_valid),
+      .o_wr_ready      (tx_ready),
+      .i_parity_cfg    (1'b0),
+      .o_wr_count      (),
+      .o_wr_almost_full(),
+      .o_dout          (o_tx)
+  );
+
+  uart_boot uart_boot0 (
+      .i_clk        (i_clk),
+      .i_rst_n      (i_rst_n),
+      .i_rx_valid   (rx_valid),
+      .i_rx_data    (rx_data),
+      .o_rx_ready   (rx_ready),
+      .o_tx_valid   (tx_valid),
+      .o_tx_data    (tx_data),
+      .i_tx_ready   (tx_ready),
+      .o_mem_wr_en  (mem_wr_en),
+      .o_mem_wr_addr(mem_wr_addr),
+      .o_mem_wr_data(mem_wr_data),
+      .o_done       (o_done)
+  );
+
+  insnmem #(
+      .SIZE(IMEM_SIZE)
+  ) insnmem_u (
+      .i_clk           (i_clk),
+      .i_rst_n         (i_rst_n),
+      .i_pc            (i_pc),
+      .o_insn          (o_insn),
+      .o_imem_exception(),
+      .i_wr_en         (mem_wr_en),
+      .i_wr_addr       (mem_wr_addr),
+      .i_wr_data       (mem_wr_data)
+  );
+
+endmodule
@@ -0,0 +1,120 @@
+// MIT License
+//
+// Copyright (c) 2025 Matias Wang Silva
+//
+// Permission is hereby granted, free of charge, to any person obtaining a copy
+// of this software and associated documentation files (the "Software"), to deal
+// in the Software without restriction, including without limitation the rights
+// to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+// copies of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in all
+// copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+// AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+// OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+// Module  : uart_loopback
+// Author  : Matias Wang Silva
+// Date    : 18/10/2026
+//
+// Description:
+//   Test harness that wires uart_tx's serial output straight into uart_rx
+//   The transmitter gets its own baud_gen, as it would next to a CPU, so the two
+//   ends are not phase aligned. The line and the receiver's overrun flag are
+//   brought out for the testbench.
+//
+// Parameters:
+//   WORD_WIDTH - Data word width in bits (default: 8)
+//   OVERSAMPLING - Oversampling factor (default: 16)
+//   BAUD_RATE - Target baud rate (default: 115200)
+//   FIFO_DEPTH - Depth of the transmit and receive FIFOs (default: 16)
+
+`include "platform.vh"
+`default_nettype none
+
+module uart_loopback #(
+    parameter WORD_WIDTH = 8,
+    parameter OVERSAMPLING = 16,
+    parameter BAUD_RATE = 115200,
+    parameter FIFO_DEPTH = 16
+) (
+    input wire i_clk,
+    input wire i_rst_n,
+
+    // write interface
+    input  wire [WORD_WIDTH-1:0] i_wr_data,
+    input  wire                  i_wr_valid,
+    output wire                  o_wr_ready,
+
+    // read interface
+    output wire                  o_rd_valid,
+    output wire [WORD_WIDTH-1:0] o_rd_data,
+    input  wire                  i_rd_ready,
+
+    // config
+    input wire i_parity_cfg,
+
+    // observation
+    output wire                            o_line,
+    output wire [$clog2(FIFO_DEPTH+1)-1:0] o_rd_count,
+    output wire                            o_overflow_err
+);
+
+  wire tx_tick;
+
+  baud_gen #(
+      .OVERSAMPLING(OVERSAMPLING),
+      .FREQ(`SYSFREQ),
+      .BAUD_RATE(BAUD_RATE)
+  ) baud_gen0 (
+      .i_clk  (i_clk),
+      .i_rst_n(i_rst_n),
+      .o_tick (tx_tick)
+  );
+
+  uart_tx #(
+      .WORD_WIDTH  (WORD_WIDTH),
+      .OVERSAMPLING(OVERSAMPLING),
+      .BAUD_RATE   (BAUD_RATE),
+      .FIFO_DEPTH  (FIFO_DEPTH)
+  ) uart_tx0 (
+      .i_clk           (i_clk),
+      .i_rst_n         (i_rst_n),
+      .i_tick          (tx_tick),
+      .i_wr_data       (i_wr_data),
+      .i_wr_valid      (i_wr_valid),
+      .o_wr_ready      (o_wr_ready),
+      .i_parity_cfg    (i_parity_cfg),
+      .o_wr_count      (),
+      .o_wr_almost_full(),
+      .o_dout          (o_line)
+  );
+
+  uart_rx #(
+      .WORD_WIDTH  (WORD_WIDTH),
+      .OVERSAMPLING(OVERSAMPLING),
+      .BAUD_RATE   (BAUD_RATE),
+      .FIFO_DEPTH  (FIFO_DEPTH)
+  ) uart_rx0 (
+      .i_clk           (i_clk),
+      .i_rst_n         (i_rst_n),
+      .i_din           (o_line),
+      .o_rd_valid      (o_rd_valid),
+      .o_rd_data       (o_rd_data),
+      .i_rd_ready      (i_rd_ready),
+      .i_parity_cfg    (i_parity_cfg),
+      .o_rd_count      (o_rd_count),
+      .o_rd_almost_full(),
+      .o_overflow_err  (o_overflow_err),
+      .o_frame_err     (),
+      .o_parity_err    ()
+  );
+
+endmodule
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Binary commit trace of the instructions cpu_core retires
+
+A trace is an 8 byte header followed by one length-prefixed record per retired
+instruction:
+
+    u8 length   bytes that follow, so unknown fields can be skipped
+    u8 flags    WB, LOAD, STORE, STALL_RAW, STALL_LOAD_USE, FLUSH
+    u32 cycle   cycle the instruction left writeback
+    u32 pc
+    u32 insn
+    u8 rd, u32 value          if WB
+    u32 address, u32 data     if LOAD or STORE
+
+A record is 14 to 27 bytes, against several kB per instruction for FST waves of
+the whole core. TraceWriter packs records into a buffer and writes it out a
+large block at a time. TraceReader memory-maps a trace, indexes the record
+offsets in one pass and then decodes any record or slice on demand, so slices of
+multi-million instruction runs print without reading the rest of the file. The
+text format follows `iss.py --trace`.
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from os import PathLike
+from typing import NamedTuple
+
+from rv32i import disassemble
+
+MAGIC = b"RVCT"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, reserved
+
+# record flags
+WB = 0x01  # writes rd (never x0)
+LOAD = 0x02
+STORE = 0x04
+STALL_RAW = 0x08  # held in decode for a RAW hazard
+STALL_LOAD_USE = 0x10  # held in decode for a load-use hazard
+FLUSH = 0x20  # flushed the instructions fetched after it
+
+FLAG_NAMES = {
+    STALL_RAW: "stall-raw",
+    STALL_LOAD_USE: "stall-load-use",
+    FLUSH: "flush",
+}
+
+_BASE = struct.Struct("<BBIII")  # length, flags, cycle, pc, insn
+_WB = struct.Struct("<BI")
+_MEM = struct.Struct("<II")
+
+BUFFER_SIZE = 1 << 20
+
+
+class TraceRecord(NamedTuple):
+    cycle: int
+    pc: int
+    insn: int
+    flags: int = 0
+    rd: int = 0
+    value: int = 0
+    address: int = 0
+    data: int = 0
+
+
+def _record_struct(flags: int) -> struct.Struct:
+    fmt = _BASE.format
+    if flags & WB:
+        fmt += _WB.format[1:]
+    if flags & (LOAD | STORE):
+        fmt += _MEM.format[1:]
+    return struct.Struct(fmt)
+
+
+# one precompiled layout per combination of the fields present
+_LAYOUTS = [_record_struct(flags) for flags in range((WB | LOAD | STORE) + 1)]
+
+
+class TraceWriter:
+    """Streams records into a trace file through an in-memory buffer"""
+
+    def __init__(self, path: str | PathLike, buffer_size: int = BUFFER_SIZE) -> None:
+        self.path = path
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._buffer = bytearray(HEADER.pack(MAGIC, VERSION, 0))
+        self._file = open(path, "wb")
+
+    def write(
+        self,
+        cycle: int,
+        pc: int,
+        insn: int,
+        flags: int = 0,
+        rd: int = 0,
+        value: int = 0,
+        address: int = 0,
+        data: int = 0,
+    ) -> None:
+        """Append one retired instruction, fields absent from `flags` are dropped"""
+        layout = _LAYOUTS[flags & (WB | LOAD | STORE)]
+        fields = [layout.size - 1, flags, cycle, pc, insn]
+        if flags & WB:
+            fields += (rd, value)
+        if flags & (LOAD | STORE):
+            fields += (address, data)
+        self._buffer += layout.pack(*fields)
+        self.count += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.write(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TraceReader:
+    """Random access to the records of a trace file, through mmap"""
+
+    def __init__(self, path: str | PathLike) -> None:
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._map = b""  # an empty file cannot be mapped
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{path}: too short for a commit trace")
+        magic, version, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} commit trace")
+        self._offsets = self._index()
+
+    def _index(self) -> array:
+        """Offsets of every record, following the length prefixes once"""
+        data = self._map
+        offsets = array("Q")
+        append = offsets.append
+        offset, end = HEADER.size, len(data)
+        while offset < end:
+            append(offset)
+            offset += data[offset] + 1
+        if offset > end:
+            offsets.pop()  # truncated by a writer that did not close
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _decode(self, offset: int) -> TraceRecord:
+        flags = self._map[offset + 1]
+        fields = _LAYOUTS[flags & (WB | LOAD | STORE)].unpack_from(self._map, offset)
+        cycle, pc, insn = fields[2:5]
+        rd = value = address = data = 0
+        rest = fields[5:]
+        if flags & WB:
+            rd, value, *rest = rest
+        if flags & (LOAD | STORE):
+            address, data = rest
+        return TraceRecord(cycle, pc, insn, flags, rd, value, address, data)
+
+    def __getitem__(self, index: int | slice) -> TraceRecord | list[TraceRecord]:
+        if isinstance(index, slice):
+            return [self._decode(offset) for offset in self._offsets[index]]
+        return self._decode(self._offsets[index])
+
+    def __iter__(self):
+        return map(self._decode, self._offsets)
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def format_record(record: TraceRecord) -> str:
+    """One line of text for a record, in the layout of `iss.py --trace`"""
+    line = f"{record.pc:08x}: {record.insn:08x}  {disassemble(record.insn):<28}"
+    if record.flags & WB:
+        line += f" x{record.rd}=0x{record.value:08x}"
+    if record.flags & LOAD:
+        line += f" [0x{record.address:08x}]->0x{record.data:08x}"
+    if record.flags & STORE:
+        line += f" [0x{record.address:08x}]<-0x{record.data:08x}"
+    names = [name for flag, name in FLAG_NAMES.items() if record.flags & flag]
+    if names:
+        line += f" ({', '.join(names)})"
+    return f"{record.cycle:>10}  {line}".rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a commit trace as text")
+    parser.add_argument("trace", help="trace written by TraceWriter")
+    parser.add_argument(
+        "-s", "--start", type=int, default=0, help="first record (negative from end)"
+    )
+    parser.add_argument("-n", "--count", type=int, help="number of records")
+    args = parser.parse_args()
+
+    with TraceReader(args.trace) as reader:
+        start = args.start if args.start >= 0 else max(0, len(reader) + args.start)
+        stop = len(reader) if args.count is None else start + args.count
+        try:
+            for record in reader[start:stop]:
+                print(format_record(record))
+        except BrokenPipeError:
+            sys.stderr.close()  # piped into head
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,50 +1,109 @@
 #!/usr/bin/env python3
 """
 Generates random hex data for $readmemh
+
+Data is drawn in bulk with Random.randbytes and written a chunk at a time, so
+multi-MB images generate in a fraction of a second. Several sizes can be
+emitted in one pass: each output is a prefix of the same stream. With --insns
+the stream is made of valid RV32I instructions instead of random bytes.
 """
 
-import random
 import argparse
+import random
+import sys
+from array import array
+
+from hexfile import format_hex, from_words
+from rv32i import MNEMONICS, encode
+
+CHUNK_WORDS = 1 << 18
+
+# bits left random for each instruction format: register fields and
+# immediates, with imm[1] of branches and jumps cleared to keep targets aligned
+RANDOM_BITS = {
+    "R": 0x01FF8F80,
+    "SH": 0x01FF8F80,
+    "I": 0xFFFF8F80,
+    "L": 0xFFFF8F80,
+    "S": 0xFFFF8F80,
+    "B": 0xFFFF8E80,
+    "U": 0xFFFFFF80,
+    "J": 0xFFDFFF80,
+    "F": 0x00000000,
+}
+
+
+def insn_templates() -> list[tuple[int, int]]:
+    """Build 256 (random bits, fixed bits) templates, one per selector byte"""
+    templates = [
+        (RANDOM_BITS[fmt], encode(name)) for name, (_, fmt) in MNEMONICS.items()
+    ]
+    return [templates[i % len(templates)] for i in range(256)]
+
+
+INSN_TEMPLATES = insn_templates()
 
 
-def generate_hex_word():
-    """Generate 4 random hex bytes"""
-    bytes_list = [random.randint(0, 255) for _ in range(4)]
-    return " ".join(f"{b:02x}" for b in bytes_list)
+def generate_bytes(rng: random.Random, n_words: int) -> bytes:
+    """Generate n_words of random bytes"""
+    return rng.randbytes(4 * n_words)
+
+
+def generate_insns(rng: random.Random, n_words: int) -> bytes:
+    """Generate n_words random, valid RV32I instructions"""
+    words = array("I", rng.randbytes(4 * n_words))
+    templates = map(INSN_TEMPLATES.__getitem__, rng.randbytes(n_words))
+    insns = [(word & mask) | fixed for word, (mask, fixed) in zip(words, templates)]
+    return from_words(insns)
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Generate random hex words (4 bytes each)"
     )
-    parser.add_argument("n", type=int, help="Number of hex words to generate")
+    parser.add_argument(
+        "n", type=int, nargs="+", help="Number of hex words to generate, per output"
+    )
     parser.add_argument("--seed", type=int, help="Random seed for reproducible output")
+    parser.add_argument(
+        "--insns", action="store_true", help="Generate valid RV32I instructions"
+    )
     parser.add_argument(
         "-o",
         "--output",
         type=str,
-        help="Output file (if not specified, prints to stdout)",
+        help="Output file (if not specified, prints to stdout). "
+        "With several sizes, {n} and {bytes} in the name are replaced per size",
     )
 
     args = parser.parse_args()
 
-    if args.seed:
-        random.seed(args.seed)
+    sizes = sorted(set(args.n))
+    if len(sizes) > 1 and not (args.output and "{" in args.output):
+        parser.error("several sizes need an -o pattern containing {n} or {bytes}")
 
-    # Generate all hex words
-    hex_words = []
-    for _ in range(args.n):
-        hex_words.append(generate_hex_word())
+    rng = random.Random(args.seed)
+    generate = generate_insns if args.insns else generate_bytes
 
-    # Output to file or stdout
     if args.output:
-        with open(args.output, "w") as f:
-            for hex_word in hex_words:
-                f.write(hex_word + "\n")
-        print(f"Generated {args.n} hex words and saved to {args.output}")
+        outputs = [(n, open(args.output.format(n=n, bytes=4 * n), "w")) for n in sizes]
     else:
-        for hex_word in hex_words:
-            print(hex_word)
+        outputs = [(sizes[0], sys.stdout)]
+
+    # every output is a prefix of one stream, generated and written in chunks
+    written = 0
+    while written < outputs[-1][0]:
+        n_words = min(CHUNK_WORDS, outputs[-1][0] - written)
+        chunk = generate(rng, n_words)
+        for n, f in outputs:
+            if n > written:
+                f.write(format_hex(chunk[: 4 * (n - written)]))
+        written += n_words
+
+    if args.output:
+        for n, f in outputs:
+            f.close()
+            print(f"Generated {n} hex words and saved to {f.name}")
 
 
 if __name__ == "__main__":
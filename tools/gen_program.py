@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Generates random RV32I programs that stress the pipeline hazard logic
+
+Unlike `gen_hex_data.py --insns`, which draws independent valid encodings, the
+programs here run from start to end on the ISS: every register and data memory
+word is set first, memory is only reached through loads and stores off x0
+inside DMEM_WORDS, aligned to their size, and branches and jumps only go
+forward, never past the end of the program. Operands are chosen to hit the
+hazards hazard_unit.sv and forwarding_unit.sv deal with, in proportions set by
+a few knobs:
+
+    raw_distance  sources read a register written 1 to raw_distance
+    raw_rate      instructions back, with probability raw_rate
+    load_use      a load is followed straight away by a reader of its rd: an
+                  ALU op or branch through rs1, or a store through its data
+                  (loads address off x0 and read no register)
+    branches      an instruction is a forward branch or jal
+    alias         a load reads an address one of the last stores wrote
+    mem           an instruction is a load or a store
+    subword       a load or store is a byte or halfword one (lb, lhu, sh, ...)
+
+loop_program() builds the opposite case for branch prediction: counted loops
+of random ALU bodies, each closed by a backward bne and nested in an outer
+loop, with an optional data-dependent forward branch in every body.
+
+Instructions are assembled from precomputed opcode/funct templates rather than
+through rv32i.encode, and operands come from random() and getrandbits() rather
+than randrange(), so a few thousand 200-instruction programs are generated per
+second.
+"""
+
+import argparse
+import random
+import sys
+from array import array
+from collections import deque
+
+from hexfile import format_hex, from_words, write_words
+from rv32i import NOP, encode, encode_b, encode_j
+
+DMEM_WORDS = 128  # memory.sv is 512 bytes
+ALIAS_WINDOW = 8  # stores a load can alias with
+MAX_SKIP = 4  # instructions a forward branch or jump can skip
+LOOP_COUNTERS = (30, 31)  # outer and inner loop counters of loop_program
+
+ALU_R = ["add", "sub", "sll", "slt", "sltu", "xor", "srl", "sra", "or", "and"]
+ALU_I = ["addi", "slti", "sltiu", "xori", "ori", "andi"]
+ALU_SH = ["slli", "srli", "srai"]
+BRANCHES = ["beq", "bne", "blt", "bge", "bltu", "bgeu"]
+
+LOADS = {1: ["lb", "lbu"], 2: ["lh", "lhu"], 4: ["lw"]}  # by access width
+STORES = {1: "sb", 2: "sh", 4: "sw"}
+
+# every field zero, operands are or'd in
+TEMPLATES = {
+    name: encode(name)
+    for name in ALU_R + ALU_I + ALU_SH + sum(LOADS.values(), []) + list(STORES.values())
+}
+R_TEMPLATES = [TEMPLATES[name] for name in ALU_R]
+I_TEMPLATES = [TEMPLATES[name] for name in ALU_I]
+SH_TEMPLATES = [TEMPLATES[name] for name in ALU_SH]
+LOAD_TEMPLATES = {
+    width: [TEMPLATES[name] for name in names] for width, names in LOADS.items()
+}
+BRANCH_FUNCT3 = [(encode(name) >> 12) & 0x7 for name in BRANCHES]
+OP_BRANCH = encode("beq") & 0x7F
+OP_JAL = encode("jal") & 0x7F
+
+
+def store_word(address: int, rs2: int, width: int = 4) -> int:
+    """sw rs2, address(x0), or sb/sh for a `width` of 1 or 2"""
+    return (
+        TEMPLATES[STORES[width]]
+        | ((address >> 5) << 25)
+        | (rs2 << 20)
+        | ((address & 0x1F) << 7)
+    )
+
+
+ZERO_DMEM = [store_word(4 * i, 0) for i in range(DMEM_WORDS)]
+
+
+class ProgramGenerator:
+    """Random RV32I programs with a given hazard density"""
+
+    def __init__(
+        self,
+        raw_distance: int = 3,
+        raw_rate: float = 0.5,
+        load_use: float = 0.3,
+        branches: float = 0.0,
+        alias: float = 0.5,
+        mem: float = 0.3,
+        subword: float = 0.0,
+        init: bool = True,
+    ) -> None:
+        if raw_distance < 1:
+            raise ValueError("raw_distance must be at least 1")
+        self.raw_distance = raw_distance
+        self.raw_rate = raw_rate
+        self.load_use = load_use
+        self.branches = branches
+        self.alias = alias
+        self.mem = mem
+        self.subword = subword
+        self.init = init
+
+    def prologue(self, rng: random.Random) -> list[int]:
+        """Set every register and zero data memory, so nothing reads reset state"""
+        addi, bits = TEMPLATES["addi"], rng.getrandbits
+        program = [addi | (bits(12) << 20) | (r << 7) for r in range(1, 32)]
+        return program + ZERO_DMEM if self.mem else program
+
+    def generate(self, rng: random.Random, length: int) -> array:
+        """Generate a program of `length` instructions after the prologue"""
+        program = array("I", self.prologue(rng) if self.init else [])
+        append = program.append
+        rand, bits = rng.random, rng.getrandbits
+
+        raw_distance, raw_rate = self.raw_distance, self.raw_rate
+        branch_rate = self.branches
+        subword = self.subword
+        load_rate = self.mem / 2
+        store_rate = self.mem
+        written = deque([0] * raw_distance, maxlen=raw_distance)  # recent rd
+        stores = deque(maxlen=ALIAS_WINDOW)  # recent store addresses
+        forced = 0  # a register the next instruction must read (load-use)
+
+        def source() -> int:
+            if rand() < raw_rate:
+                rd = written[-1 - int(rand() * raw_distance)]
+                if rd:
+                    return rd
+            return bits(5)
+
+        for i in range(length):
+            rs1 = forced or source()
+            loaded, forced = forced, 0
+            rd = 0
+            kind = rand()
+            if kind < branch_rate:
+                rs2 = source()
+                # skip at most to the end of the program
+                skip = int(rand() * (min(MAX_SKIP, length - i - 1) + 1))
+                offset = 4 * (skip + 1)
+                # a quarter are jal, which reads no register
+                if loaded or rand() < 0.75:
+                    funct3 = BRANCH_FUNCT3[int(rand() * len(BRANCH_FUNCT3))]
+                    append(encode_b(OP_BRANCH, funct3, rs1, rs2, offset))
+                else:
+                    rd = bits(5)
+                    append(encode_j(OP_JAL, rd, offset))
+            elif kind < branch_rate + load_rate:
+                width = 4
+                if subword and rand() < subword:
+                    width = 1 + bits(1)
+                if stores and rand() < self.alias:
+                    address = stores[int(rand() * len(stores))] & -width
+                else:
+                    address = 4 * int(rand() * DMEM_WORDS)
+                    if width < 4:
+                        address += width * int(rand() * (4 // width))
+                templates = LOAD_TEMPLATES[width]
+                template = templates[bits(1)] if width < 4 else templates[0]
+                rd = bits(5) or 1
+                append(template | (address << 20) | (rd << 7))
+                if rand() < self.load_use:
+                    forced = rd
+            elif kind < branch_rate + store_rate:
+                width = 4
+                if subword and rand() < subword:
+                    width = 1 + bits(1)
+                address = 4 * int(rand() * DMEM_WORDS)
+                if width < 4:
+                    address += width * int(rand() * (4 // width))
+                stores.append(address)
+                append(store_word(address, loaded or source(), width))
+            else:
+                rd = bits(5)
+                match bits(2):
+                    case 0 | 1:
+                        template = R_TEMPLATES[int(rand() * len(R_TEMPLATES))]
+                        operand = source() << 20
+                    case 2:
+                        template = I_TEMPLATES[int(rand() * len(I_TEMPLATES))]
+                        operand = bits(12) << 20
+                    case _:
+                        template = SH_TEMPLATES[int(rand() * len(SH_TEMPLATES))]
+                        operand = bits(5) << 20
+                append(template | operand | (rs1 << 15) | (rd << 7))
+            written.append(rd)
+
+        return program
+
+
+def loop_program(
+    rng: random.Random,
+    loops: int = 3,
+    body: int = 6,
+    iterations: int = 16,
+    outer: int = 4,
+    if_rate: float = 0.5,
+) -> array:
+    """Nested counted loops, `outer` times over `loops` loops of `body` ALU ops
+
+    Each inner loop runs `iterations` times. With probability `if_rate` a body
+    also holds a forward bltu over its next instruction, taken or not depending
+    on the data. Registers are set by the ProgramGenerator prologue and the
+    bodies never write the loop counters.
+    """
+    outer_rd, inner_rd = LOOP_COUNTERS
+    program = array("I", ProgramGenerator(mem=0.0).prologue(rng))
+    append, rand, bits = program.append, rng.random, rng.getrandbits
+
+    def reg() -> int:
+        return 1 + int(rand() * (outer_rd - 1))
+
+    append(encode("addi", outer_rd, 0, imm=outer))
+    outer_start = len(program)
+    for _ in range(loops):
+        append(encode("addi", inner_rd, 0, imm=iterations))
+        start = len(program)
+        for _ in range(body):
+            if rand() < if_rate:
+                append(encode("bltu", rs1=reg(), rs2=reg(), imm=8))
+            if bits(1):
+                template = R_TEMPLATES[int(rand() * len(R_TEMPLATES))]
+                operand = reg() << 20
+            else:
+                template = I_TEMPLATES[int(rand() * len(I_TEMPLATES))]
+                operand = bits(12) << 20
+            append(template | operand | (reg() << 15) | (reg() << 7))
+        append(encode("addi", inner_rd, inner_rd, imm=-1))
+        append(encode("bne", rs1=inner_rd, rs2=0, imm=4 * (start - len(program))))
+    append(encode("addi", outer_rd, outer_rd, imm=-1))
+    append(encode("bne", rs1=outer_rd, rs2=0, imm=4 * (outer_start - len(program))))
+    return program
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate random RV32I programs for pipeline hazard stress"
+    )
+    parser.add_argument("length", type=int, help="instructions after the prologue")
+    parser.add_argument("--seed", type=int, help="seed of the first program")
+    parser.add_argument("--count", type=int, default=1, help="number of programs")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="output file (stdout if not given), with several programs {i} in "
+        "the name is replaced by the program number",
+    )
+    parser.add_argument("--raw-distance", type=int, default=3)
+    parser.add_argument("--raw-rate", type=float, default=0.5)
+    parser.add_argument("--load-use", type=float, default=0.3)
+    parser.add_argument("--branches", type=float, default=0.0)
+    parser.add_argument("--alias", type=float, default=0.5)
+    parser.add_argument("--mem", type=float, default=0.3)
+    parser.add_argument("--subword", type=float, default=0.0)
+    parser.add_argument("--pad", type=int, default=4, help="NOPs after the program")
+    args = parser.parse_args()
+
+    if args.count > 1 and not (args.output and "{i}" in args.output):
+        parser.error("several programs need an -o pattern containing {i}")
+
+    generator = ProgramGenerator(
+        raw_distance=args.raw_distance,
+        raw_rate=args.raw_rate,
+        load_use=args.load_use,
+        branches=args.branches,
+        alias=args.alias,
+        mem=args.mem,
+        subword=args.subword,
+    )
+    seed = args.seed if args.seed is not None else random.getrandbits(32)
+    for i in range(args.count):
+        program = generator.generate(random.Random(seed + i), args.length)
+        program.extend([NOP] * args.pad)
+        if args.output:
+            write_words(args.output.format(i=i), program)
+        else:
+            sys.stdout.write(format_hex(from_words(program)))
+    if args.output:
+        print(f"Generated {args.count} programs from seed {seed}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import sys
-import tempfile
-import subprocess
+
+from rv32i import disassemble
 
 
 def main():
@@ -13,42 +13,20 @@ def main():
         if not line:
             return 0
 
-        if "x" in line:
+        if "x" in line or "z" in line:
             fh_out.write(line)
             fh_out.flush()
             continue
 
-        obj_temp = tempfile.NamedTemporaryFile(delete=False, mode="w")
-        with tempfile.NamedTemporaryFile(delete=False, mode="w") as asm_temp:
-            asm_temp.write(".word 0x%s\n" % line)
-            asm_temp.flush()
-            subprocess.run(
-                [
-                    "riscv64-unknown-elf-as",
-                    "-mno-arch-attr",
-                    "-o",
-                    obj_temp.name,
-                    asm_temp.name,
-                ]
-            )
-            result = subprocess.run(
-                [
-                    "riscv64-unknown-elf-objdump",
-                    "-D",
-                    "-b",
-                    "elf32-littleriscv",
-                    "--disassembler-options=numeric,no-aliases",
-                    obj_temp.name,
-                ],
-                capture_output=True,
-            )
-            lastline = result.stdout.splitlines()[-1]
-            chunks = lastline.decode().split("\t")
-
-            opcodes = " ".join(chunks[2:4])
-
-            fh_out.write("%s\n" % opcodes)
+        try:
+            insn = int(line, 16) & 0xFFFFFFFF
+        except ValueError:
+            fh_out.write(line)
             fh_out.flush()
+            continue
+
+        fh_out.write("%s\n" % disassemble(insn))
+        fh_out.flush()
 
 
 if __name__ == "__main__":
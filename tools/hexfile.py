@@ -0,0 +1,175 @@
+"""
+Memory image reader and writer for $readmemh and `objcopy -O verilog` hex files
+
+Images are flat little-endian byte buffers starting at address 0, so the same
+image can be viewed as bytes (insnmem, memory) or as an array('I') of words
+(the ISS, testbenches). Parsing and formatting are done a whole section at a
+time with bytes.fromhex/bytes.hex and array byteswaps rather than per token.
+
+Both byte-per-element files (objcopy, the test fixtures) and wider elements
+(`$readmemh` into a word array) are read; the element width is taken from the
+digits in the first token of each section. `@address` records are in units of
+that element, as $readmemh interprets them, and gaps are zero filled.
+"""
+
+import io
+import re
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from os import PathLike
+from typing import TextIO
+
+# array typecodes for the element widths that can be byteswapped in bulk
+WORD_TYPECODES = {2: "H", 4: "I", 8: "Q"}
+
+_ADDRESS = re.compile(r"@([0-9a-fA-F]+)")
+_TOKEN = re.compile(r"\S+")
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def swap_elements(data: bytes, width: int) -> bytes:
+    """Reverse the byte order of every `width` byte element in data"""
+    if width == 1:
+        return bytes(data)
+    if width in WORD_TYPECODES:
+        elements = array(WORD_TYPECODES[width], data)
+        elements.byteswap()
+        return elements.tobytes()
+    return b"".join(data[i : i + width][::-1] for i in range(0, len(data), width))
+
+
+def _parse_section(body: str) -> tuple[bytes, int]:
+    """Parse whitespace separated hex tokens into little-endian bytes and width"""
+    first = _TOKEN.search(body)
+    if first is None:
+        return b"", 1
+    digits = len(first.group())
+    width = max(1, (digits + 1) // 2)
+    if digits == 2 * width:
+        # equally sized, zero padded tokens decode in one go, then byteswap
+        try:
+            data = bytes.fromhex(body)
+        except ValueError:
+            data = None
+        if data is not None and (width == 1 or len(data) == width * len(body.split())):
+            return swap_elements(data, width), width
+
+    # $readmemh allows short tokens ("13" into a word), fall back to int()
+    data = bytearray()
+    for token in body.split():
+        data += int(token, 16).to_bytes(width, "little")
+    return bytes(data), width
+
+
+def iter_hex(f: TextIO, chunk_size: int = 1 << 20) -> Iterator[tuple[int, bytes]]:
+    """Stream (byte address, data) runs from an open hex file
+
+    The file is consumed a chunk of whole lines at a time, so memory use is
+    bounded by `chunk_size` however large the image is. Consecutive runs are
+    contiguous unless an `@address` record moves the write position.
+    """
+    position = 0
+    address = None
+    while lines := f.readlines(chunk_size):
+        text = "".join(lines)
+        if "/" in text:
+            text = _COMMENT.sub("", text)
+
+        for i, part in enumerate(_ADDRESS.split(text)):
+            if i % 2:
+                address = int(part, 16)
+                continue
+            data, width = _parse_section(part)
+            if not data:
+                continue
+            if address is not None:
+                position = address * width
+                address = None
+            yield position, data
+            position += len(data)
+
+
+def _assemble(runs: Iterable[tuple[int, bytes]]) -> bytearray:
+    image = bytearray()
+    for offset, data in runs:
+        if offset > len(image):
+            image.extend(bytes(offset - len(image)))
+        image[offset : offset + len(data)] = data
+    return image
+
+
+def parse_hex(text: str) -> bytearray:
+    """Parse the contents of a hex file into a byte image"""
+    return _assemble(iter_hex(io.StringIO(text)))
+
+
+def read_hex(path: str | PathLike) -> bytearray:
+    """Read a $readmemh or objcopy verilog hex file into a byte image"""
+    with open(path) as f:
+        return _assemble(iter_hex(f))
+
+
+def to_words(data: bytes) -> array:
+    """View a byte image as little-endian 32-bit words, zero padding the tail"""
+    if len(data) % 4:
+        data = bytes(data) + bytes(4 - len(data) % 4)
+    words = array("I", data)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words
+
+
+def from_words(words) -> bytes:
+    """Pack 32-bit words into a little-endian byte image"""
+    words = array("I", words)
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words.tobytes()
+
+
+def read_words(path: str | PathLike) -> array:
+    """Read a hex file as little-endian 32-bit words"""
+    return to_words(read_hex(path))
+
+
+def format_hex(
+    data: bytes,
+    width: int = 1,
+    per_line: int = 4,
+    byteorder: str = "little",
+    address: int | None = None,
+) -> str:
+    """Format a byte image as hex text
+
+    Elements are `width` bytes wide, interpreted in `byteorder`, with
+    `per_line` elements on each line. If `address` is given an `@address`
+    record (in elements) is written first, as objcopy does.
+    """
+    if len(data) % width:
+        data = bytes(data) + bytes(width - len(data) % width)
+    if byteorder == "little":
+        data = swap_elements(data, width)
+
+    lines = [] if address is None else [f"@{address:08x}"]
+    if per_line == 1 and data:
+        # one element per line needs no slicing, newline is the separator
+        lines.append(data.hex("\n", width))
+    else:
+        line_bytes = width * per_line
+        lines += [
+            data[i : i + line_bytes].hex(" ", width)
+            for i in range(0, len(data), line_bytes)
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_hex(path: str | PathLike, data: bytes, **format_opts) -> None:
+    """Write a byte image as hex, see format_hex for the options"""
+    with open(path, "w") as f:
+        f.write(format_hex(data, **format_opts))
+
+
+def write_words(path: str | PathLike, words, **format_opts) -> None:
+    """Write 32-bit words as a byte image, four little-endian bytes per line"""
+    write_hex(path, from_words(words), **format_opts)
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+RV32I instruction set simulator, used as the golden model for cpu_core
+
+Like the core, instruction and data memory are separate (Harvard) and both
+start at address 0. Every instruction word is decoded once up front into a
+(handler, rd, rs1, rs2, imm) tuple so the run loop is a single indexed lookup
+and call per instruction.
+"""
+
+import argparse
+import sys
+from array import array
+from collections.abc import Iterable
+
+from hexfile import read_words
+from rv32i import (
+    disassemble,
+    get_b_imm,
+    get_fields,
+    get_i_imm,
+    get_j_imm,
+    get_s_imm,
+    get_u_imm,
+    lookup,
+)
+
+MASK = 0xFFFFFFFF
+HALT = -1
+
+
+class IllegalInstruction(Exception):
+    pass
+
+
+def _signed(v: int) -> int:
+    return v - ((v & 0x80000000) << 1)
+
+
+# handlers take (x, mem, pc, rd, rs1, rs2, imm) and return the next pc
+def _lui(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = imm & MASK
+    return pc + 4
+
+
+def _auipc(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (pc + imm) & MASK
+    return pc + 4
+
+
+def _jal(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = pc + 4
+    return (pc + imm) & MASK
+
+
+def _jalr(x, m, pc, rd, rs1, rs2, imm):
+    target = (x[rs1] + imm) & 0xFFFFFFFE
+    x[rd] = pc + 4
+    return target
+
+
+def _beq(x, m, pc, rd, rs1, rs2, imm):
+    return (pc + imm) & MASK if x[rs1] == x[rs2] else pc + 4
+
+
+def _bne(x, m, pc, rd, rs1, rs2, imm):
+    return (pc + imm) & MASK if x[rs1] != x[rs2] else pc + 4
+
+
+def _blt(x, m, pc, rd, rs1, rs2, imm):
+    return (pc + imm) & MASK if _signed(x[rs1]) < _signed(x[rs2]) else pc + 4
+
+
+def _bge(x, m, pc, rd, rs1, rs2, imm):
+    return (pc + imm) & MASK if _signed(x[rs1]) >= _signed(x[rs2]) else pc + 4
+
+
+def _bltu(x, m, pc, rd, rs1, rs2, imm):
+    return (pc + imm) & MASK if x[rs1] < x[rs2] else pc + 4
+
+
+def _bgeu(x, m, pc, rd, rs1, rs2, imm):
+    return (pc + imm) & MASK if x[rs1] >= x[rs2] else pc + 4
+
+
+# halfword and word accesses are aligned down to their size, as memory.sv does
+def _load(m, a: int, width: int) -> int:
+    a &= -width
+    if a + width > len(m):
+        raise IndexError(f"load outside data memory at 0x{a:08x}")
+    return int.from_bytes(m[a : a + width], "little")
+
+
+def _store(m, a: int, width: int, v: int) -> None:
+    a &= -width
+    if a + width > len(m):
+        raise IndexError(f"store outside data memory at 0x{a:08x}")
+    m[a : a + width] = (v & ((1 << (8 * width)) - 1)).to_bytes(width, "little")
+
+
+def _lb(x, m, pc, rd, rs1, rs2, imm):
+    v = _load(m, (x[rs1] + imm) & MASK, 1)
+    x[rd] = (v - ((v & 0x80) << 1)) & MASK
+    return pc + 4
+
+
+def _lh(x, m, pc, rd, rs1, rs2, imm):
+    v = _load(m, (x[rs1] + imm) & MASK, 2)
+    x[rd] = (v - ((v & 0x8000) << 1)) & MASK
+    return pc + 4
+
+
+def _lw(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = _load(m, (x[rs1] + imm) & MASK, 4)
+    return pc + 4
+
+
+def _lbu(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = _load(m, (x[rs1] + imm) & MASK, 1)
+    return pc + 4
+
+
+def _lhu(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = _load(m, (x[rs1] + imm) & MASK, 2)
+    return pc + 4
+
+
+def _sb(x, m, pc, rd, rs1, rs2, imm):
+    _store(m, (x[rs1] + imm) & MASK, 1, x[rs2])
+    return pc + 4
+
+
+def _sh(x, m, pc, rd, rs1, rs2, imm):
+    _store(m, (x[rs1] + imm) & MASK, 2, x[rs2])
+    return pc + 4
+
+
+def _sw(x, m, pc, rd, rs1, rs2, imm):
+    _store(m, (x[rs1] + imm) & MASK, 4, x[rs2])
+    return pc + 4
+
+
+def _addi(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (x[rs1] + imm) & MASK
+    return pc + 4
+
+
+def _slti(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = int(_signed(x[rs1]) < imm)
+    return pc + 4
+
+
+def _sltiu(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = int(x[rs1] < (imm & MASK))
+    return pc + 4
+
+
+def _xori(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (x[rs1] ^ imm) & MASK
+    return pc + 4
+
+
+def _ori(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (x[rs1] | imm) & MASK
+    return pc + 4
+
+
+def _andi(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = x[rs1] & imm & MASK
+    return pc + 4
+
+
+def _slli(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (x[rs1] << rs2) & MASK
+    return pc + 4
+
+
+def _srli(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = x[rs1] >> rs2
+    return pc + 4
+
+
+def _srai(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (_signed(x[rs1]) >> rs2) & MASK
+    return pc + 4
+
+
+def _add(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (x[rs1] + x[rs2]) & MASK
+    return pc + 4
+
+
+def _sub(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (x[rs1] - x[rs2]) & MASK
+    return pc + 4
+
+
+def _sll(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (x[rs1] << (x[rs2] & 0x1F)) & MASK
+    return pc + 4
+
+
+def _slt(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = int(_signed(x[rs1]) < _signed(x[rs2]))
+    return pc + 4
+
+
+def _sltu(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = int(x[rs1] < x[rs2])
+    return pc + 4
+
+
+def _xor(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = x[rs1] ^ x[rs2]
+    return pc + 4
+
+
+def _srl(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = x[rs1] >> (x[rs2] & 0x1F)
+    return pc + 4
+
+
+def _sra(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = (_signed(x[rs1]) >> (x[rs2] & 0x1F)) & MASK
+    return pc + 4
+
+
+def _or(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = x[rs1] | x[rs2]
+    return pc + 4
+
+
+def _and(x, m, pc, rd, rs1, rs2, imm):
+    x[rd] = x[rs1] & x[rs2]
+    return pc + 4
+
+
+def _fence(x, m, pc, rd, rs1, rs2, imm):
+    return pc + 4
+
+
+def _halt(x, m, pc, rd, rs1, rs2, imm):
+    return HALT
+
+
+# mnemonic -> (handler, immediate decoder, writes rd)
+DISPATCH = {
+    "lui": (_lui, get_u_imm, True),
+    "auipc": (_auipc, get_u_imm, True),
+    "jal": (_jal, get_j_imm, True),
+    "jalr": (_jalr, get_i_imm, True),
+    "beq": (_beq, get_b_imm, False),
+    "bne": (_bne, get_b_imm, False),
+    "blt": (_blt, get_b_imm, False),
+    "bge": (_bge, get_b_imm, False),
+    "bltu": (_bltu, get_b_imm, False),
+    "bgeu": (_bgeu, get_b_imm, False),
+    "lb": (_lb, get_i_imm, True),
+    "lh": (_lh, get_i_imm, True),
+    "lw": (_lw, get_i_imm, True),
+    "lbu": (_lbu, get_i_imm, True),
+    "lhu": (_lhu, get_i_imm, True),
+    "sb": (_sb, get_s_imm, False),
+    "sh": (_sh, get_s_imm, False),
+    "sw": (_sw, get_s_imm, False),
+    "addi": (_addi, get_i_imm, True),
+    "slti": (_slti, get_i_imm, True),
+    "sltiu": (_sltiu, get_i_imm, True),
+    "xori": (_xori, get_i_imm, True),
+    "ori": (_ori, get_i_imm, True),
+    "andi": (_andi, get_i_imm, True),
+    "slli": (_slli, get_i_imm, True),
+    "srli": (_srli, get_i_imm, True),
+    "srai": (_srai, get_i_imm, True),
+    "add": (_add, get_i_imm, True),
+    "sub": (_sub, get_i_imm, True),
+    "sll": (_sll, get_i_imm, True),
+    "slt": (_slt, get_i_imm, True),
+    "sltu": (_sltu, get_i_imm, True),
+    "xor": (_xor, get_i_imm, True),
+    "srl": (_srl, get_i_imm, True),
+    "sra": (_sra, get_i_imm, True),
+    "or": (_or, get_i_imm, True),
+    "and": (_and, get_i_imm, True),
+    "fence": (_fence, get_i_imm, False),
+}
+
+
+def _illegal(x, m, pc, rd, rs1, rs2, imm):
+    raise IllegalInstruction(f"illegal instruction at pc=0x{pc:08x}")
+
+
+def predecode(insn: int) -> tuple:
+    """Decode an instruction into (handler, rd, rs1, rs2, imm)"""
+    entry = lookup(insn)
+    _, rd, _, rs1, rs2, _ = get_fields(insn)
+    if entry is None:
+        return (_illegal, 0, 0, 0, 0)
+
+    name = entry[0] or disassemble(insn)
+    if name in ("ecall", "ebreak"):
+        return (_halt, 0, 0, 0, 0)
+    if name not in DISPATCH:
+        return (_illegal, 0, 0, 0, 0)
+
+    handler, get_imm, writes_rd = DISPATCH[name]
+    return (handler, rd if writes_rd else 0, rs1, rs2, get_imm(insn))
+
+
+class ISS:
+    """RV32I golden model
+
+    Registers are a flat list of 32 unsigned ints, data memory a bytearray and
+    instruction memory an array('I') with a predecoded copy alongside it.
+    """
+
+    def __init__(self, program: Iterable[int], dmem_size: int = 512, dmem=b""):
+        self.imem = array("I", program)
+        self.code = [predecode(insn) for insn in self.imem]
+        self.dmem = bytearray(dmem_size)
+        self.dmem[: len(dmem)] = dmem
+        self.x = [0] * 32
+        self.pc = 0
+        self.retired = 0
+        self.halted = False
+
+    def step(self) -> tuple[int, int, int, int]:
+        """Execute one instruction and return (pc, insn, rd, value)
+
+        rd is 0 for instructions that do not write a register.
+        """
+        pc = self.pc
+        handler, rd, rs1, rs2, imm = self.code[pc >> 2]
+        next_pc = handler(self.x, self.dmem, pc, rd, rs1, rs2, imm)
+        self.x[0] = 0
+        self.retired += 1
+        if next_pc == HALT:
+            self.halted = True
+        else:
+            self.pc = next_pc
+        return pc, self.imem[pc >> 2], rd, self.x[rd]
+
+    def next_writeback(self, limit: int = 1 << 20) -> tuple[int, int, int, int]:
+        """Run until an instruction writes a register other than x0"""
+        for _ in range(limit):
+            if self.halted:
+                raise RuntimeError(f"ISS halted at pc 0x{self.pc:08x}")
+            retired = self.step()
+            if retired[2]:
+                return retired
+        raise RuntimeError(f"no register writeback within {limit} instructions")
+
+    def run(self, max_steps: int) -> int:
+        """Run up to max_steps instructions, returns the number retired"""
+        x, m, code = self.x, self.dmem, self.code
+        pc = self.pc
+        n = 0
+        while n < max_steps:
+            handler, rd, rs1, rs2, imm = code[pc >> 2]
+            next_pc = handler(x, m, pc, rd, rs1, rs2, imm)
+            x[0] = 0
+            n += 1
+            if next_pc == HALT:
+                self.halted = True
+                break
+            pc = next_pc
+        self.pc = pc
+        self.retired += n
+        return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an RV32I hex image")
+    parser.add_argument("image", help="$readmemh instruction image")
+    parser.add_argument("-n", "--steps", type=int, default=1000)
+    parser.add_argument("--trace", action="store_true", help="print each insn")
+    args = parser.parse_args()
+
+    program = read_words(args.image)
+    iss = ISS(program)
+
+    if args.trace:
+        for _ in range(args.steps):
+            if iss.halted:
+                break
+            pc, insn, rd, value = iss.step()
+            wb = f"x{rd}=0x{value:08x}" if rd else ""
+            print(f"{pc:08x}: {insn:08x}  {disassemble(insn):<28} {wb}")
+    else:
+        iss.run(args.steps)
+
+    for i in range(0, 32, 4):
+        print("  ".join(f"x{r:<2}=0x{iss.x[r]:08x}" for r in range(i, i + 4)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,110 @@
 #!/usr/bin/env python3
+"""
+Regroups `objcopy -O verilog` hex output into one `width` byte word per line
+
+The input is streamed through in chunks, so memory use stays constant however
+large the image is. Every `@address` record is honoured: gaps are zero padded
+and records that go back to an earlier address rewrite those words in place,
+which works because every output line has the same length.
+"""
 
 import argparse
 import sys
-from pathlib import Path
+from typing import BinaryIO
+
+from hexfile import format_hex, iter_hex
+
+WIDTHS = (1, 2, 4, 8, 16)
+FLUSH_SIZE = 1 << 16  # bytes buffered before words are written out
+PAD_LINES = 1 << 12  # zero words written per call when padding a gap
+
+
+class WordWriter:
+    """Writes fixed width words one per line at byte addresses"""
+
+    def __init__(self, f: BinaryIO, width: int, byteorder: str) -> None:
+        self.f = f
+        self.width = width
+        self.byteorder = byteorder
+        self.line_len = 2 * width + 1
+        self.words = 0  # words in the file so far
+        self.base = 0  # byte address of pending[0], always word aligned
+        self.pending = bytearray()
+
+    def write(self, address: int, data: bytes) -> None:
+        if address != self.base + len(self.pending):
+            self.flush(partial=True)
+            self.base = address - address % self.width
+            existing = self._read_word(self.base // self.width)
+            self.pending = bytearray(existing[: address - self.base])
+        self.pending += data
+        if len(self.pending) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self, partial: bool = False) -> None:
+        """Write out whole pending words, or everything if `partial`"""
+        n = len(self.pending) - len(self.pending) % self.width
+        if partial and n < len(self.pending):
+            # complete the last word with whatever is already in the file
+            existing = self._read_word((self.base + n) // self.width)
+            self.pending += existing[len(self.pending) - n :]
+            n = len(self.pending)
+        if n:
+            self._write_words(self.base // self.width, self.pending[:n])
+            del self.pending[:n]
+            self.base += n
+
+    def _goto(self, index: int) -> None:
+        if index > self.words:
+            self.f.seek(self.words * self.line_len)
+            zero = b"0" * (2 * self.width) + b"\n"
+            while self.words < index:
+                lines = min(index - self.words, PAD_LINES)
+                self.f.write(zero * lines)
+                self.words += lines
+        self.f.seek(index * self.line_len)
+
+    def _write_words(self, index: int, data: bytes) -> None:
+        self._goto(index)
+        text = format_hex(data, width=self.width, per_line=1, byteorder=self.byteorder)
+        self.f.write(text.encode())
+        self.words = max(self.words, index + len(data) // self.width)
+
+    def _read_word(self, index: int) -> bytes:
+        """Read back word `index` in memory (address) order"""
+        if index >= self.words:
+            return bytes(self.width)
+        self.f.seek(index * self.line_len)
+        word = bytes.fromhex(self.f.read(self.line_len).decode())
+        return word[::-1] if self.byteorder == "little" else word
 
 
 def main():
     parser = argparse.ArgumentParser(
         prog="resize_hexfile", description="resizes and reformats hex output from as"
     )
-    parser.add_argument("-i", "--input", required=True)
+    parser.add_argument("-i", "--input", required=True, help="input file, - for stdin")
     parser.add_argument("-o", "--output", required=True)
-    parser.add_argument("-w", "--width", required=True)
-    parser.add_argument("-r", "--reverse", action="store_true")
+    parser.add_argument("-w", "--width", required=True, type=int, choices=WIDTHS)
+    parser.add_argument(
+        "-e",
+        "--endian",
+        choices=["big", "little"],
+        default="big",
+        help="byte order of each output word (default: the input byte order)",
+    )
+    parser.add_argument(
+        "-r", "--reverse", action="store_true", help="same as --endian little"
+    )
     args = parser.parse_args()
-    with open(Path(args.input), "r") as infile:
-        outlines = []
-        for line in infile.readlines()[1:]:
-            # `as` has 16 bytes per line
-            line = line.strip()
-            bytes_in_line = line.split(" ")
-            n_bytes = int(args.width)
-            if n_bytes % 2 != 0:
-                sys.exit(1)
-            n_groups = len(bytes_in_line) // n_bytes
-            for i in range(n_groups):
-                bytes_to_write = bytes_in_line[i * n_bytes : (i + 1) * n_bytes]
-                if args.reverse:
-                    bytes_to_write = reversed(bytes_to_write)
-                outlines.append("".join(bytes_to_write))
-
-    with open(Path(args.output), "w") as outfile:
-        for line in outlines:
-            outfile.write(line + "\n")
+    byteorder = "little" if args.reverse else args.endian
+
+    infile = sys.stdin if args.input == "-" else open(args.input)
+    with infile, open(args.output, "w+b") as outfile:
+        writer = WordWriter(outfile, args.width, byteorder)
+        for address, data in iter_hex(infile):
+            writer.write(address, data)
+        writer.flush(partial=True)
 
 
 if __name__ == "__main__":
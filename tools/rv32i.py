@@ -0,0 +1,263 @@
+"""
+RV32I instruction field extraction and table-driven disassembler
+
+Field layouts mirror the r/i/s/b/u/j_type_t structs in cores/cpu/hdl/cpu_types.vh.
+Disassembly matches `objdump --disassembler-options=numeric,no-aliases`, except
+that branch and jump targets are printed relative to the instruction since the
+address of a word is not known.
+"""
+
+from functools import lru_cache
+
+# opcodes, see opcode_t
+OP_LUI = 0b0110111
+OP_AUIPC = 0b0010111
+OP_JAL = 0b1101111
+OP_JALR = 0b1100111
+OP_BRANCH = 0b1100011
+OP_LOAD = 0b0000011
+OP_STORE = 0b0100011
+OP_ITYPE = 0b0010011
+OP_RTYPE = 0b0110011
+OP_FENCE = 0b0001111
+OP_SYSTEM = 0b1110011
+
+NOP = 0x00000013  # addi x0,x0,0
+
+# decode table keyed on (opcode, funct3, funct7), falling back to
+# (opcode, funct3, None) and then (opcode, None, None)
+INSN_TABLE: dict[tuple[int, int | None, int | None], tuple[str, str]] = {
+    (OP_LUI, None, None): ("lui", "U"),
+    (OP_AUIPC, None, None): ("auipc", "U"),
+    (OP_JAL, None, None): ("jal", "J"),
+    (OP_JALR, 0b000, None): ("jalr", "L"),
+    (OP_BRANCH, 0b000, None): ("beq", "B"),
+    (OP_BRANCH, 0b001, None): ("bne", "B"),
+    (OP_BRANCH, 0b100, None): ("blt", "B"),
+    (OP_BRANCH, 0b101, None): ("bge", "B"),
+    (OP_BRANCH, 0b110, None): ("bltu", "B"),
+    (OP_BRANCH, 0b111, None): ("bgeu", "B"),
+    (OP_LOAD, 0b000, None): ("lb", "L"),
+    (OP_LOAD, 0b001, None): ("lh", "L"),
+    (OP_LOAD, 0b010, None): ("lw", "L"),
+    (OP_LOAD, 0b100, None): ("lbu", "L"),
+    (OP_LOAD, 0b101, None): ("lhu", "L"),
+    (OP_STORE, 0b000, None): ("sb", "S"),
+    (OP_STORE, 0b001, None): ("sh", "S"),
+    (OP_STORE, 0b010, None): ("sw", "S"),
+    (OP_ITYPE, 0b000, None): ("addi", "I"),
+    (OP_ITYPE, 0b010, None): ("slti", "I"),
+    (OP_ITYPE, 0b011, None): ("sltiu", "I"),
+    (OP_ITYPE, 0b100, None): ("xori", "I"),
+    (OP_ITYPE, 0b110, None): ("ori", "I"),
+    (OP_ITYPE, 0b111, None): ("andi", "I"),
+    (OP_ITYPE, 0b001, 0b0000000): ("slli", "SH"),
+    (OP_ITYPE, 0b101, 0b0000000): ("srli", "SH"),
+    (OP_ITYPE, 0b101, 0b0100000): ("srai", "SH"),
+    (OP_RTYPE, 0b000, 0b0000000): ("add", "R"),
+    (OP_RTYPE, 0b000, 0b0100000): ("sub", "R"),
+    (OP_RTYPE, 0b001, 0b0000000): ("sll", "R"),
+    (OP_RTYPE, 0b010, 0b0000000): ("slt", "R"),
+    (OP_RTYPE, 0b011, 0b0000000): ("sltu", "R"),
+    (OP_RTYPE, 0b100, 0b0000000): ("xor", "R"),
+    (OP_RTYPE, 0b101, 0b0000000): ("srl", "R"),
+    (OP_RTYPE, 0b101, 0b0100000): ("sra", "R"),
+    (OP_RTYPE, 0b110, 0b0000000): ("or", "R"),
+    (OP_RTYPE, 0b111, 0b0000000): ("and", "R"),
+    (OP_FENCE, 0b000, None): ("fence", "F"),
+    (OP_SYSTEM, 0b000, None): ("", "E"),
+}
+
+FENCE_BITS = "iorw"
+
+
+def sext(value: int, bits: int) -> int:
+    """Sign extend a `bits` wide value to a Python int"""
+    sign = 1 << (bits - 1)
+    return (value & (sign - 1)) - (value & sign)
+
+
+def get_fields(insn: int) -> tuple[int, int, int, int, int, int]:
+    """Split an instruction into (opcode, rd, funct3, rs1, rs2, funct7)"""
+    return (
+        insn & 0x7F,
+        (insn >> 7) & 0x1F,
+        (insn >> 12) & 0x7,
+        (insn >> 15) & 0x1F,
+        (insn >> 20) & 0x1F,
+        insn >> 25,
+    )
+
+
+def get_i_imm(insn: int) -> int:
+    return sext(insn >> 20, 12)
+
+
+def get_s_imm(insn: int) -> int:
+    return sext(((insn >> 25) << 5) | ((insn >> 7) & 0x1F), 12)
+
+
+def get_b_imm(insn: int) -> int:
+    return sext(
+        ((insn >> 31) << 12)
+        | (((insn >> 7) & 0x1) << 11)
+        | (((insn >> 25) & 0x3F) << 5)
+        | (((insn >> 8) & 0xF) << 1),
+        13,
+    )
+
+
+def get_u_imm(insn: int) -> int:
+    return sext(insn & 0xFFFFF000, 32)
+
+
+def get_j_imm(insn: int) -> int:
+    return sext(
+        ((insn >> 31) << 20)
+        | (((insn >> 12) & 0xFF) << 12)
+        | (((insn >> 20) & 0x1) << 11)
+        | (((insn >> 21) & 0x3FF) << 1),
+        21,
+    )
+
+
+def lookup(insn: int) -> tuple[str, str] | None:
+    """Find the (mnemonic, format) table entry for an instruction"""
+    opcode, _, funct3, _, _, funct7 = get_fields(insn)
+    return (
+        INSN_TABLE.get((opcode, funct3, funct7))
+        or INSN_TABLE.get((opcode, funct3, None))
+        or INSN_TABLE.get((opcode, None, None))
+    )
+
+
+def _fence_set(bits: int) -> str:
+    return "".join(c for i, c in enumerate(FENCE_BITS) if bits & (8 >> i)) or "0"
+
+
+def _target(offset: int) -> str:
+    return f"{offset & 0xFFFFFFFF:x}"
+
+
+@lru_cache(maxsize=65536)
+def disassemble(insn: int) -> str:
+    """Disassemble a 32-bit instruction word into 'mnemonic operands'"""
+    entry = lookup(insn)
+    if entry is None:
+        return f".4byte 0x{insn:x}"
+
+    name, fmt = entry
+    _, rd, _, rs1, rs2, _ = get_fields(insn)
+
+    match fmt:
+        case "R":
+            return f"{name} x{rd},x{rs1},x{rs2}"
+        case "I":
+            return f"{name} x{rd},x{rs1},{get_i_imm(insn)}"
+        case "SH":
+            return f"{name} x{rd},x{rs1},0x{rs2:x}"
+        case "L":
+            return f"{name} x{rd},{get_i_imm(insn)}(x{rs1})"
+        case "S":
+            return f"{name} x{rs2},{get_s_imm(insn)}(x{rs1})"
+        case "B":
+            return f"{name} x{rs1},x{rs2},{_target(get_b_imm(insn))}"
+        case "U":
+            return f"{name} x{rd},0x{insn >> 12:x}"
+        case "J":
+            return f"{name} x{rd},{_target(get_j_imm(insn))}"
+        case "F":
+            pred, succ = (insn >> 24) & 0xF, (insn >> 20) & 0xF
+            return f"{name} {_fence_set(pred)},{_fence_set(succ)}"
+        case "E":
+            if insn == 0x00000073:
+                return "ecall"
+            if insn == 0x00100073:
+                return "ebreak"
+
+    return f".4byte 0x{insn:x}"
+
+
+def encode_r(opcode: int, rd: int, funct3: int, rs1: int, rs2: int, funct7: int) -> int:
+    return (
+        (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+    )
+
+
+def encode_i(opcode: int, rd: int, funct3: int, rs1: int, imm: int) -> int:
+    return ((imm & 0xFFF) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+def encode_s(opcode: int, funct3: int, rs1: int, rs2: int, imm: int) -> int:
+    imm &= 0xFFF
+    return (
+        ((imm >> 5) << 25)
+        | (rs2 << 20)
+        | (rs1 << 15)
+        | (funct3 << 12)
+        | ((imm & 0x1F) << 7)
+        | opcode
+    )
+
+
+def encode_b(opcode: int, funct3: int, rs1: int, rs2: int, imm: int) -> int:
+    imm &= 0x1FFF
+    return (
+        ((imm >> 12) << 31)
+        | (((imm >> 5) & 0x3F) << 25)
+        | (rs2 << 20)
+        | (rs1 << 15)
+        | (funct3 << 12)
+        | (((imm >> 1) & 0xF) << 8)
+        | (((imm >> 11) & 0x1) << 7)
+        | opcode
+    )
+
+
+def encode_u(opcode: int, rd: int, imm: int) -> int:
+    return (imm & 0xFFFFF000) | (rd << 7) | opcode
+
+
+def encode_j(opcode: int, rd: int, imm: int) -> int:
+    imm &= 0x1FFFFF
+    return (
+        ((imm >> 20) << 31)
+        | (((imm >> 1) & 0x3FF) << 21)
+        | (((imm >> 11) & 0x1) << 20)
+        | (((imm >> 12) & 0xFF) << 12)
+        | (rd << 7)
+        | opcode
+    )
+
+
+# reverse lookup from mnemonic to its decode table key
+MNEMONICS: dict[str, tuple[tuple[int, int | None, int | None], str]] = {
+    name: (key, fmt) for key, (name, fmt) in INSN_TABLE.items() if name
+}
+
+
+def encode(name: str, rd: int = 0, rs1: int = 0, rs2: int = 0, imm: int = 0) -> int:
+    """Encode an instruction from its mnemonic and operands
+
+    Shift amounts are passed as `imm`, branch and jump offsets are relative.
+    """
+    (opcode, funct3, funct7), fmt = MNEMONICS[name]
+    funct3 = funct3 or 0
+    match fmt:
+        case "R":
+            return encode_r(opcode, rd, funct3, rs1, rs2, funct7)
+        case "I" | "L":
+            return encode_i(opcode, rd, funct3, rs1, imm)
+        case "SH":
+            return encode_r(opcode, rd, funct3, rs1, imm & 0x1F, funct7)
+        case "S":
+            return encode_s(opcode, funct3, rs1, rs2, imm)
+        case "B":
+            return encode_b(opcode, funct3, rs1, rs2, imm)
+        case "U":
+            return encode_u(opcode, rd, imm)
+        case "J":
+            return encode_j(opcode, rd, imm)
+        case "F":
+            return encode_i(opcode, 0, 0, 0, 0x0FF)
+    raise ValueError(f"cannot encode {name}")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Uploads a program image into instruction memory through uart_boot
+
+The image is cut into frames of up to MAX_WORDS words, each with a sequence
+number and a CRC-8, and sent without waiting for replies while fewer than
+`window` frames are unacknowledged. uart_boot acknowledges frames in order and
+sends a single NAK when one is corrupted, after which everything from that
+frame on is sent again (go-back-N); a silent receiver is handled the same way
+after a timeout. A final BOOT frame starts the core. See uart_boot.sv for the
+frame layout.
+
+BootSession holds the protocol state and does no I/O, so the same code drives
+a serial port here and the cocotb bench in cores/uart/tests.
+"""
+
+import argparse
+import sys
+import time
+
+from hexfile import read_hex
+
+SYNC = 0xA5
+CMD_WRITE = 0x01
+CMD_BOOT = 0x02
+ACK = 0x06
+NAK = 0x15
+
+MAX_WORDS = 64  # uart_boot MAX_WORDS
+WINDOW = 8  # frames in flight, less than half the sequence space
+HEADER_BYTES = 8  # SYNC, CMD, SEQ, LEN, ADDR
+
+
+def _crc8_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07 if crc & 0x80 else crc << 1) & 0xFF
+        table.append(crc)
+    return table
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data: bytes, crc: int = 0) -> int:
+    """CRC-8 with polynomial 0x07 and no reflection, as uart_boot computes it"""
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(cmd: int, seq: int, address: int, payload: bytes = b"") -> bytes:
+    """Build a frame, payload is a whole number of little-endian words"""
+    body = bytes([cmd, seq & 0xFF, len(payload) // 4]) + address.to_bytes(4, "little")
+    body += payload
+    return bytes([SYNC]) + body + bytes([crc8(body)])
+
+
+class BootSession:
+    """Go-back-N sender state for one upload"""
+
+    def __init__(
+        self,
+        image: bytes,
+        address: int = 0,
+        max_words: int = MAX_WORDS,
+        window: int = WINDOW,
+    ) -> None:
+        if not 0 < window < 128:
+            raise ValueError("window must be between 1 and 127 frames")
+        if len(image) % 4:
+            image = bytes(image) + bytes(4 - len(image) % 4)
+        chunk = 4 * max_words
+        self.frames = [
+            encode_frame(CMD_WRITE, i, address + offset, image[offset : offset + chunk])
+            for i, offset in enumerate(range(0, len(image), chunk))
+        ]
+        self.frames.append(encode_frame(CMD_BOOT, len(self.frames), 0))
+        self.window = window
+        self.base = 0  # first unacknowledged frame
+        self.next = 0  # next frame to send
+        self.resent = 0  # frames sent more than once
+
+    @property
+    def done(self) -> bool:
+        return self.base == len(self.frames)
+
+    def next_frame(self) -> bytes | None:
+        """The next frame to send if the window allows one, marked as sent"""
+        if self.next >= min(self.base + self.window, len(self.frames)):
+            return None
+        self.next += 1
+        return self.frames[self.next - 1]
+
+    def _index(self, seq: int) -> int:
+        """Frame index of an 8-bit sequence number, relative to the window"""
+        offset = (seq - self.base) & 0xFF
+        return self.base + offset - (256 if offset >= 128 else 0)
+
+    def on_response(self, kind: int, seq: int) -> None:
+        index = self._index(seq)
+        if kind == ACK and self.base <= index < self.next:
+            self.base = index + 1
+        elif kind == NAK and index == self.base:
+            self.rewind()
+
+    def rewind(self) -> None:
+        """Send everything unacknowledged again"""
+        self.resent += self.next - self.base
+        self.next = self.base
+
+
+def frame_time(n_bytes: int, baud_rate: int) -> float:
+    """Seconds to send `n_bytes` at 10 bits each"""
+    return 10 * n_bytes / baud_rate
+
+
+def upload(port, session: BootSession, baud_rate: int) -> None:
+    """Run a session over a pyserial port"""
+    frame_bytes = HEADER_BYTES + 4 * MAX_WORDS + 1
+    # a full window plus its replies, with a generous margin
+    port.timeout = 4 * frame_time(session.window * frame_bytes, baud_rate) + 0.05
+    response = bytearray()
+    while not session.done:
+        while (frame := session.next_frame()) is not None:
+            port.write(frame)
+        response += port.read(2 - len(response))
+        if len(response) < 2:
+            session.rewind()
+            response.clear()
+            continue
+        if response[0] not in (ACK, NAK):
+            del response[0]  # resynchronise on a damaged reply
+            continue
+        session.on_response(response[0], response[1])
+        response.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Upload a hex image into instruction memory over uart_boot"
+    )
+    parser.add_argument("image", help="$readmemh or objcopy verilog hex file")
+    parser.add_argument("-p", "--port", required=True, help="serial port")
+    parser.add_argument("-b", "--baud", type=int, default=115200)
+    parser.add_argument(
+        "-a", "--address", type=lambda x: int(x, 0), default=0, help="load address"
+    )
+    parser.add_argument(
+        "-w", "--window", type=int, default=WINDOW, help="frames in flight"
+    )
+    args = parser.parse_args()
+
+    try:
+        import serial
+    except ImportError:
+        sys.exit("uart_boot needs pyserial: uv pip install pyserial")
+
+    image = read_hex(args.image)
+    session = BootSession(image, args.address, window=args.window)
+    with serial.Serial(args.port, args.baud) as port:
+        port.reset_input_buffer()
+        t0 = time.perf_counter()
+        upload(port, session, args.baud)
+        elapsed = time.perf_counter() - t0
+
+    print(
+        f"Uploaded {len(image)} bytes in {len(session.frames)} frames, "
+        f"{elapsed:.2f} s ({len(image) / elapsed / 1024:.1f} KiB/s), "
+        f"{session.resent} frames resent"
+    )
+
+
+if __name__ == "__main__":
+    main()